@@ -0,0 +1,67 @@
+import os
+import random
+from collections.abc import Sequence
+from datetime import date, timedelta
+
+
+# 每张发票对应 0, 1, 2, 3 张截图的默认概率
+DEFAULT_SCREENSHOT_WEIGHTS: tuple[float, ...] = (0.05, 0.6, 0.25, 0.1)
+BUYERS: tuple[str, ...] = ("alice", "bob", "carol", "dave", "erin", "frank")
+SCREENSHOT_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg")
+
+
+def generate_corpus(
+        directory: str,
+        count: int,
+        screenshot_weights: Sequence[float] = DEFAULT_SCREENSHOT_WEIGHTS,
+        malformed_ratio: float = 0.05,
+        seed: int = 0,
+) -> dict[str, int]:
+    """
+    生成一个合成的发票目录：空的 PDF 文件及其截图文件
+    Args:
+        directory: 目标目录（不存在时自动创建）
+        count: 发票 PDF 数量
+        screenshot_weights: 每张发票有 0, 1, 2, ... 张截图的相对概率
+        malformed_ratio: 文件名格式错误的发票所占比例
+        seed: 随机数种子，相同参数生成的目录完全一致
+
+    Returns:
+        生成的文件统计：'invoices'、'malformed'、'screenshots'
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    stats = {"invoices": 0, "malformed": 0, "screenshots": 0}
+
+    for i in range(count):
+        invoice_date = start + timedelta(days=rng.randrange(365 * 5))
+        buyer = rng.choice(BUYERS)
+        amount = f"{rng.randrange(1, 10000)}_{rng.randrange(100):02d}"
+        basename = f"{invoice_date:%Y-%m-%d}-{buyer}-{amount}-{i:020d}"
+
+        if rng.random() < malformed_ratio:
+            # 常见的手工命名错误：日期分隔符错误、金额使用小数点
+            basename = rng.choice([
+                basename.replace("-", "_", 2),
+                basename.replace("_", ".", 1),
+                f"scan_{i}",
+            ])
+            stats["malformed"] += 1
+
+        _touch(os.path.join(directory, f"{basename}.pdf"))
+        stats["invoices"] += 1
+
+        screenshots = rng.choices(range(len(screenshot_weights)), weights=screenshot_weights)[0]
+        for n in range(screenshots):
+            suffix = "" if n == 0 else f"-{n}"
+            extension = rng.choice(SCREENSHOT_EXTENSIONS)
+            _touch(os.path.join(directory, f"{basename}{suffix}{extension}"))
+            stats["screenshots"] += 1
+
+    return stats
+
+
+def _touch(path: str) -> None:
+    with open(path, "wb"):
+        pass
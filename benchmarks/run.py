@@ -0,0 +1,221 @@
+"""
+发票处理各阶段的基准测试
+
+在合成的发票目录上分别计时目录扫描、文件名解析、截图匹配、Excel 和 LaTeX 生成，
+以及端到端的 process_invoices，输出吞吐量（发票/秒）和峰值内存，并与保存的基线比较
+
+用法示例：
+    python -m benchmarks.run --count 1000 --count 100000
+    python -m benchmarks.run --count 1000 --update-baseline
+"""
+import gc
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import tracemalloc
+from collections.abc import Callable
+
+import click
+
+from invoice_processor.main import process_invoices, scan_directory
+from invoice_processor.parser import FilenameParser
+from invoice_processor.validator import Validator
+from invoice_processor.generators.excel_generator import ExcelGenerator
+from invoice_processor.generators.latex_generator import LatexGenerator
+from .corpus import DEFAULT_SCREENSHOT_WEIGHTS, generate_corpus
+
+
+DEFAULT_BASELINE: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+STAGES: tuple[str, ...] = ("scan", "parse", "validate", "excel", "latex", "end_to_end")
+
+
+def _stages(directory: str, output_dir: str) -> list[tuple[str, Callable[[dict], None]]]:
+    """
+    构造按顺序执行的各阶段，后一阶段使用前一阶段写入 state 的结果
+    Args:
+        directory: 合成发票目录
+        output_dir: 报告输出目录
+
+    Returns:
+        [(阶段名, 阶段函数), ...]
+    """
+    def scan(state: dict) -> None:
+        pdf_entries, screenshots = scan_directory(directory)
+        state["pdfs"] = [entry.name for entry in pdf_entries]
+        state["screenshots"] = screenshots
+
+    def parse(state: dict) -> None:
+        state["invoices"] = [inv for inv in FilenameParser().parse_many(state["pdfs"])[0] if inv is not None]
+
+    def validate(state: dict) -> None:
+        validator = Validator(directory, use_index=True)
+        validator.load_index(state["screenshots"])
+        for invoice in state["invoices"]:
+            validator.validate(invoice)
+
+    def excel(state: dict) -> None:
+        ExcelGenerator(output_dir, streaming=True).generate(state["invoices"])
+
+    def latex(state: dict) -> None:
+        LatexGenerator(output_dir).generate(state["invoices"])
+
+    def end_to_end(state: dict) -> None:
+        process_invoices(directory, os.path.join(output_dir, "end_to_end"), full_rebuild=True)
+
+    return [
+        ("scan", scan), ("parse", parse), ("validate", validate),
+        ("excel", excel), ("latex", latex), ("end_to_end", end_to_end),
+    ]
+
+
+def run_benchmark(directory: str, workdir: str, trace_memory: bool) -> dict[str, dict[str, float]]:
+    """
+    依次执行所有阶段并记录耗时；trace_memory 为 True 时再执行一遍以记录各阶段的峰值内存
+    Args:
+        directory: 合成发票目录
+        workdir: 临时工作目录
+        trace_memory: 是否记录峰值内存（tracemalloc 会显著拖慢执行，因此单独执行一遍）
+
+    Returns:
+        阶段名 -> {'seconds': 耗时, 'peak_mib': 峰值内存}
+    """
+    results: dict[str, dict[str, float]] = {}
+
+    for traced in ([False, True] if trace_memory else [False]):
+        output_dir = tempfile.mkdtemp(dir=workdir)
+        os.makedirs(os.path.join(output_dir, "end_to_end"))
+        state: dict = {}
+        if traced:
+            tracemalloc.start()
+        for name, stage in _stages(directory, output_dir):
+            gc.collect()
+            if traced:
+                tracemalloc.reset_peak()
+                stage(state)
+                results[name]["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            else:
+                start = time.perf_counter()
+                stage(state)
+                results[name] = {"seconds": time.perf_counter() - start}
+        if traced:
+            tracemalloc.stop()
+        shutil.rmtree(output_dir)
+
+    return results
+
+
+def compare_with_baseline(
+        baseline: dict,
+        count: int,
+        throughput: dict[str, float],
+        tolerance: float,
+) -> list[str]:
+    """
+    与基线比较吞吐量
+    Args:
+        baseline: 基线数据，发票数量（字符串） -> 阶段名 -> 吞吐量
+        count: 本次的发票数量
+        throughput: 阶段名 -> 本次吞吐量
+        tolerance: 允许的相对下降比例
+
+    Returns:
+        性能回退的描述列表
+    """
+    regressions: list[str] = []
+    for stage, expected in baseline.get(str(count), {}).items():
+        actual = throughput.get(stage)
+        if actual is not None and actual < expected * (1 - tolerance):
+            regressions.append(
+                f"{count} invoices, stage '{stage}': {actual:,.0f}/s vs baseline {expected:,.0f}/s "
+                f"({actual / expected - 1:+.0%})"
+            )
+    return regressions
+
+
+@click.command()
+@click.option('--count', '-n', 'counts', multiple=True, type=click.IntRange(min=1), default=[1000],
+              show_default=True, help='合成目录中的发票数量，可重复指定')
+@click.option('--malformed-ratio', default=0.05, show_default=True, type=click.FloatRange(0, 1),
+              help='文件名格式错误的发票比例')
+@click.option('--screenshot-weights', default=','.join(map(str, DEFAULT_SCREENSHOT_WEIGHTS)), show_default=True,
+              help='每张发票有 0, 1, 2, ... 张截图的相对概率，以逗号分隔')
+@click.option('--seed', default=0, show_default=True, help='随机数种子')
+@click.option('--memory/--no-memory', default=True, show_default=True, help='是否记录各阶段的峰值内存')
+@click.option('--baseline', default=DEFAULT_BASELINE, show_default=True, type=click.Path(dir_okay=False),
+              help='基线文件')
+@click.option('--update-baseline', is_flag=True, default=False, help='将本次结果写入基线文件')
+@click.option('--tolerance', default=0.25, show_default=True, type=click.FloatRange(0, 1),
+              help='相对基线允许的吞吐量下降比例')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='将结果以 JSON 写入该文件')
+def main(
+        counts: tuple[int, ...],
+        malformed_ratio: float,
+        screenshot_weights: str,
+        seed: int,
+        memory: bool,
+        baseline: str,
+        update_baseline: bool,
+        tolerance: float,
+        output: str | None,
+):
+    """
+    在合成发票目录上运行各阶段的基准测试
+    """
+    # 基准测试只关心处理本身，屏蔽逐文件日志
+    logging.disable(logging.CRITICAL)
+    weights = [float(w) for w in screenshot_weights.split(',')]
+    # 预先触发 pandas 等依赖的延迟导入，避免计入第一个数据规模的解析耗时
+    FilenameParser().parse_many(["2020-01-01-warmup-1-1.pdf"])
+
+    try:
+        with open(baseline, "r", encoding="utf-8") as f:
+            baseline_data: dict = json.load(f)
+    except FileNotFoundError:
+        baseline_data = {}
+
+    report: dict[str, dict] = {}
+    regressions: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="invoice-bench-") as workdir:
+        for count in counts:
+            directory = os.path.join(workdir, f"corpus-{count}")
+            corpus = generate_corpus(directory, count, weights, malformed_ratio, seed)
+            results = run_benchmark(directory, workdir, memory)
+            shutil.rmtree(directory)
+
+            click.echo(
+                f"\n{count:,} invoices ({corpus['malformed']:,} malformed, {corpus['screenshots']:,} screenshots)"
+            )
+            click.echo(f"{'stage':<12}{'seconds':>10}{'invoices/s':>14}{'peak MiB':>10}")
+            throughput: dict[str, float] = {}
+            for stage in STAGES:
+                result = results[stage]
+                throughput[stage] = count / result["seconds"] if result["seconds"] > 0 else float("inf")
+                peak = f"{result['peak_mib']:.1f}" if "peak_mib" in result else "-"
+                click.echo(f"{stage:<12}{result['seconds']:>10.3f}{throughput[stage]:>14,.0f}{peak:>10}")
+
+            report[str(count)] = {"corpus": corpus, "stages": results, "throughput": throughput}
+            regressions += compare_with_baseline(baseline_data, count, throughput, tolerance)
+            if update_baseline:
+                baseline_data[str(count)] = {stage: round(value, 1) for stage, value in throughput.items()}
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if update_baseline:
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline_data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        click.echo(f"\nbaseline updated: {baseline}")
+    elif regressions:
+        click.echo("\nperformance regressions against baseline:")
+        for regression in regressions:
+            click.echo(f"  {regression}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
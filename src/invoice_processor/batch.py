@@ -0,0 +1,211 @@
+import os
+import logging
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .generators import DEFAULT_FORMATS
+from .json_cache import load_json_cache, save_json_cache
+from .logging_config import worker_logging
+from .main import process_invoices
+
+
+logger = logging.getLogger(__name__)
+
+
+def read_directory_list(path: str) -> list[str]:
+    """
+    读取目录列表文件：每行一个目录，忽略空行和以 '#' 开头的注释行
+    Args:
+        path: 列表文件路径
+
+    Returns:
+        目录列表
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _process_directory(directory: str, output_dir: str, options: dict) -> dict:
+    """
+    在工作进程中处理单个目录，并汇总其结果
+    Args:
+        directory: 发票目录
+        output_dir: 该目录的输出目录
+        options: 传给 process_invoices 的参数
+
+    Returns:
+        该目录的汇总信息
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = process_invoices(directory, output_dir, **options)
+    invoices = [entry.invoice for entry in manifest.entries.values() if entry.invoice is not None]
+    return {
+        "output": output_dir,
+        "files": len(manifest.entries),
+        "invoices": len(invoices),
+        "valid": sum(inv.is_valid for inv in invoices),
+        "duplicates": sum(inv.duplicate_of is not None for inv in invoices),
+        "total_amount": sum(inv.amount for inv in invoices),
+    }
+
+
+class BatchRunner:
+    """
+    在共享的进程池中批量处理多个发票目录，每个工作进程只需导入一次 pandas 等依赖
+    每个目录的报告写入 <output_root>/<目录名>，全部结果汇总到 summary.xlsx；
+    已完成的目录记录在检查点文件中，中断后重新运行时跳过
+    """
+    CHECKPOINT_FILENAME: str = ".batch_checkpoint.json"
+    SUMMARY_FILENAME: str = "summary.xlsx"
+    SUMMARY_COLUMNS: list[str] = [
+        "directory", "output", "status", "files", "invoices", "valid", "duplicates", "total amount", "error",
+    ]
+    VERSION: int = 1
+
+    def __init__(
+            self,
+            output_root: str,
+            max_workers: int | None = None,
+            resume: bool = True,
+            formats: Sequence[str] = DEFAULT_FORMATS,
+            **options,
+    ):
+        """
+        Args:
+            output_root: 输出根目录
+            max_workers: 进程池大小，默认由 ProcessPoolExecutor 决定
+            resume: 是否跳过检查点中已完成的目录
+            formats: 输出格式名
+            **options: 传给 process_invoices 的其他参数
+        """
+        self.output_root = output_root
+        self.max_workers = max_workers
+        self.resume = resume
+        self.options = {"formats": tuple(formats), **options}
+        self.checkpoint_path = os.path.join(output_root, self.CHECKPOINT_FILENAME)
+        # 目录的绝对路径 -> 汇总信息
+        self.completed: dict[str, dict] = {}
+
+    def output_dirs(self, directories: Iterable[str]) -> dict[str, str]:
+        """
+        为每个目录分配输出子目录：使用目录名（ZIP 归档去掉扩展名），重名时依次追加 '-2'、'-3' 等
+        Args:
+            directories: 发票目录
+
+        Returns:
+            目录的绝对路径 -> 输出目录，顺序与输入一致并去重
+        """
+        result: dict[str, str] = {}
+        used: set[str] = set()
+        for directory in directories:
+            directory = os.path.abspath(directory)
+            if directory in result:
+                continue
+            base = os.path.basename(directory.rstrip(os.sep))
+            if os.path.isfile(directory):
+                base = os.path.splitext(base)[0]
+            name, i = base, 1
+            while name in used:
+                i += 1
+                name = f"{base}-{i}"
+            used.add(name)
+            result[directory] = os.path.join(self.output_root, name)
+        return result
+
+    def run(self, directories: Iterable[str]) -> dict[str, dict]:
+        """
+        处理所有目录，写入检查点和汇总工作簿
+        Args:
+            directories: 发票目录
+
+        Returns:
+            目录的绝对路径 -> 汇总信息（含 status，失败时含 error）
+        """
+        os.makedirs(self.output_root, exist_ok=True)
+        outputs = self.output_dirs(directories)
+        self.completed = self._load_checkpoint() if self.resume else {}
+
+        results: dict[str, dict] = {}
+        pending: list[str] = []
+        for directory in outputs:
+            if directory in self.completed:
+                results[directory] = self.completed[directory]
+            else:
+                pending.append(directory)
+        logger.info(
+            f"batch of {len(outputs)} directories: {len(outputs) - len(pending)} already completed, "
+            f"{len(pending)} to process"
+        )
+
+        if pending:
+            with worker_logging() as (initializer, initargs), ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=initializer,
+                    initargs=initargs,
+            ) as executor:
+                futures = {
+                    executor.submit(_process_directory, directory, outputs[directory], self.options): directory
+                    for directory in pending
+                }
+                for future in as_completed(futures):
+                    directory = futures[future]
+                    try:
+                        summary = {**future.result(), "status": "done"}
+                    except Exception as e:
+                        logger.error(f"failed to process directory '{directory}': {e}")
+                        results[directory] = {"output": outputs[directory], "status": "failed", "error": str(e)}
+                        continue
+                    results[directory] = self.completed[directory] = summary
+                    # 每完成一个目录即更新检查点，中断后可从此处继续
+                    self._save_checkpoint()
+                    logger.info(f"directory '{directory}' processed: {summary['invoices']} invoices")
+
+        ordered = {directory: results[directory] for directory in outputs}
+        self.write_summary(ordered)
+        failed = sum(result["status"] == "failed" for result in ordered.values())
+        logger.info(f"batch finished: {len(ordered) - failed} directories completed, {failed} failed")
+        return ordered
+
+    def write_summary(self, results: dict[str, dict]) -> str:
+        """
+        写入汇总所有目录结果的工作簿，最后一行为总计
+        Args:
+            results: 目录的绝对路径 -> 汇总信息
+
+        Returns:
+            汇总工作簿路径
+        """
+        from openpyxl import Workbook
+
+        output_path = os.path.join(self.output_root, self.SUMMARY_FILENAME)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="summary")
+        ws.append(self.SUMMARY_COLUMNS)
+        totals = dict.fromkeys(("files", "invoices", "valid", "duplicates", "total_amount"), 0)
+        for directory, result in results.items():
+            for key in totals:
+                totals[key] += result.get(key, 0)
+            ws.append([
+                directory, result["output"], result["status"],
+                *(result.get(key) for key in totals), result.get("error"),
+            ])
+        ws.append(["total", None, None, *totals.values(), None])
+
+        try:
+            wb.save(output_path)
+            logger.info(f"batch summary written to '{output_path}'")
+        except Exception as e:
+            logger.error(f"failed to write batch summary '{output_path}': {e}", exc_info=True)
+        return output_path
+
+    def _load_checkpoint(self) -> dict[str, dict]:
+        directories = load_json_cache(
+            self.checkpoint_path,
+            lambda data: dict(data["directories"]) if data.get("version") == self.VERSION else {},
+            "batch checkpoint",
+        )
+        return directories or {}
+
+    def _save_checkpoint(self) -> None:
+        save_json_cache(
+            self.checkpoint_path, {"version": self.VERSION, "directories": self.completed}, "batch checkpoint"
+        )
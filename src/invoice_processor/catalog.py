@@ -0,0 +1,232 @@
+import os
+import sqlite3
+import logging
+from collections.abc import Iterable, Sequence
+from datetime import date
+from .invoice import Invoice
+
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceCatalog:
+    """
+    本地 SQLite 发票目录，跨多个发票目录累积保存解析结果，供按日期、购买人、金额等条件查询
+    每个发票以 (发票目录的绝对路径, 文件名) 为主键，截图按顺序保存在单独的表中
+    """
+    SCHEMA: str = """
+        CREATE TABLE IF NOT EXISTS invoices (
+            directory TEXT NOT NULL,
+            original_filename TEXT NOT NULL,
+            invoice_date TEXT NOT NULL,
+            invoice_number TEXT NOT NULL,
+            amount REAL NOT NULL,
+            buyer TEXT NOT NULL,
+            duplicate_of TEXT,
+            content_mismatch TEXT,
+            PRIMARY KEY (directory, original_filename)
+        );
+        CREATE TABLE IF NOT EXISTS screenshots (
+            directory TEXT NOT NULL,
+            invoice_filename TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            PRIMARY KEY (directory, invoice_filename, position),
+            FOREIGN KEY (directory, invoice_filename)
+                REFERENCES invoices (directory, original_filename) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices (invoice_date);
+        CREATE INDEX IF NOT EXISTS idx_invoices_buyer ON invoices (buyer);
+        CREATE INDEX IF NOT EXISTS idx_invoices_amount ON invoices (amount);
+        CREATE INDEX IF NOT EXISTS idx_invoices_number ON invoices (invoice_number);
+    """
+    # 早期版本的数据库中不存在、需要补充的列
+    ADDED_COLUMNS: dict[str, str] = {
+        "content_mismatch": "TEXT",
+    }
+
+    def __init__(self, path: str):
+        """
+        打开（必要时创建）目录数据库
+        Args:
+            path: SQLite 数据库文件路径
+        """
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(self.SCHEMA)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self) -> None:
+        """
+        为早期版本创建的数据库补充后来新增的列
+        """
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(invoices)")}
+        with self.connection:
+            for name, column_type in self.ADDED_COLUMNS.items():
+                if name not in existing:
+                    self.connection.execute(f"ALTER TABLE invoices ADD COLUMN {name} {column_type}")
+
+    def close(self) -> None:
+        """
+        关闭数据库连接
+        """
+        self.connection.close()
+
+    def __enter__(self) -> "InvoiceCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def upsert(self, directory: str, invoices: Iterable[Invoice]) -> int:
+        """
+        在一个事务中批量写入某个发票目录的所有发票，并删除该目录下已不存在的发票
+        Args:
+            directory: 发票目录
+            invoices: 该目录当前的全部发票
+
+        Returns:
+            写入的发票数量
+        """
+        directory = os.path.abspath(directory)
+        invoice_rows: list[tuple] = []
+        screenshot_rows: list[tuple] = []
+        for inv in invoices:
+            invoice_rows.append((
+                directory, inv.original_filename, inv.invoice_date.isoformat(), inv.invoice_number,
+                inv.amount, inv.buyer, inv.duplicate_of, inv.content_mismatch,
+            ))
+            screenshot_rows.extend(
+                (directory, inv.original_filename, position, name)
+                for position, name in enumerate(inv.screenshot_filenames)
+            )
+
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_files (filename TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM current_files")
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO current_files (filename) VALUES (?)", ((row[1],) for row in invoice_rows)
+            )
+            removed = self.connection.execute(
+                "DELETE FROM invoices WHERE directory = ? AND original_filename NOT IN (SELECT filename FROM current_files)",
+                (directory,),
+            ).rowcount
+            self.connection.executemany(
+                """
+                INSERT INTO invoices
+                    (directory, original_filename, invoice_date, invoice_number, amount, buyer, duplicate_of,
+                     content_mismatch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (directory, original_filename) DO UPDATE SET
+                    invoice_date = excluded.invoice_date,
+                    invoice_number = excluded.invoice_number,
+                    amount = excluded.amount,
+                    buyer = excluded.buyer,
+                    duplicate_of = excluded.duplicate_of,
+                    content_mismatch = excluded.content_mismatch
+                """,
+                invoice_rows,
+            )
+            # 截图列表整体替换，避免残留已删除的截图
+            self.connection.execute("DELETE FROM screenshots WHERE directory = ?", (directory,))
+            self.connection.executemany(
+                "INSERT INTO screenshots (directory, invoice_filename, position, filename) VALUES (?, ?, ?, ?)",
+                screenshot_rows,
+            )
+
+        logger.info(
+            f"catalog '{self.path}' updated for directory '{directory}': "
+            f"{len(invoice_rows)} invoices upserted, {removed} removed"
+        )
+        return len(invoice_rows)
+
+    def query(
+            self,
+            buyers: Sequence[str] = (),
+            start: date | None = None,
+            end: date | None = None,
+            min_amount: float | None = None,
+            max_amount: float | None = None,
+            invoice_number: str | None = None,
+            directory: str | None = None,
+    ) -> list[Invoice]:
+        """
+        按条件查询发票，结果按日期和文件名排序；未指定的条件不参与过滤
+        Args:
+            buyers: 购买人列表
+            start: 起始日期（含）
+            end: 结束日期（含）
+            min_amount: 最小金额（含）
+            max_amount: 最大金额（含）
+            invoice_number: 发票号码
+            directory: 发票目录
+
+        Returns:
+            符合条件的发票列表，包含截图
+        """
+        conditions: list[str] = []
+        params: list = []
+        if buyers:
+            conditions.append(f"invoices.buyer IN ({', '.join('?' * len(buyers))})")
+            params.extend(buyers)
+        if start is not None:
+            conditions.append("invoices.invoice_date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            conditions.append("invoices.invoice_date <= ?")
+            params.append(end.isoformat())
+        if min_amount is not None:
+            conditions.append("invoices.amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("invoices.amount <= ?")
+            params.append(max_amount)
+        if invoice_number is not None:
+            conditions.append("invoices.invoice_number = ?")
+            params.append(invoice_number)
+        if directory is not None:
+            conditions.append("invoices.directory = ?")
+            params.append(os.path.abspath(directory))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        rows = self.connection.execute(
+            f"""
+            SELECT directory, original_filename, invoice_date, invoice_number, amount, buyer, duplicate_of,
+                content_mismatch
+            FROM invoices {where}
+            ORDER BY invoice_date, directory, original_filename
+            """,
+            params,
+        ).fetchall()
+
+        invoices: list[Invoice] = []
+        by_key: dict[tuple[str, str], Invoice] = {}
+        for row_directory, filename, invoice_date, number, amount, buyer, duplicate_of, content_mismatch in rows:
+            inv = Invoice(
+                date.fromisoformat(invoice_date), number, amount, buyer, filename,
+                duplicate_of=duplicate_of, content_mismatch=content_mismatch,
+            )
+            invoices.append(inv)
+            by_key[(row_directory, filename)] = inv
+
+        if by_key:
+            screenshots = self.connection.execute(
+                f"""
+                SELECT s.directory, s.invoice_filename, s.filename
+                FROM screenshots s JOIN invoices
+                    ON invoices.directory = s.directory AND invoices.original_filename = s.invoice_filename
+                {where}
+                ORDER BY s.directory, s.invoice_filename, s.position
+                """,
+                params,
+            )
+            for row_directory, invoice_filename, name in screenshots:
+                by_key[(row_directory, invoice_filename)].screenshot_filenames.append(name)
+
+        logger.info(f"catalog query returned {len(invoices)} invoices")
+        return invoices
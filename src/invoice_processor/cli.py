@@ -1,16 +1,70 @@
 import click
+import cProfile
 import os
-from .main import process_invoices
+from datetime import datetime
+from .generators import DEFAULT_FORMATS, GENERATORS
+from .main import generate_reports, process_invoices, process_invoices_async, process_invoices_streaming
+from .metrics import Metrics
+from .sharding import SHARD_KEYS
+from .watcher import InvoiceWatcher
 import logging
 from .logging_config import setup_logging
 
 
-@click.command()
+def _parse_formats(ctx: click.Context, param: click.Parameter, value: str) -> tuple[str, ...]:
+    """
+    解析以逗号分隔的输出格式列表
+    Args:
+        ctx: click 上下文
+        param: 当前参数
+        value: 原始参数值，如 'excel,latex'
+
+    Returns:
+        去重后的输出格式名元组
+    """
+    formats: list[str] = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if not name or name in formats:
+            continue
+        if name not in GENERATORS:
+            raise click.BadParameter(f"unknown format '{name}', available: {', '.join(GENERATORS)}")
+        formats.append(name)
+    if not formats:
+        raise click.BadParameter("at least one output format is required")
+    return tuple(formats)
+
+
+def _parse_shard_by(ctx: click.Context, param: click.Parameter, value: str | None) -> tuple[str, ...]:
+    """
+    解析以逗号分隔的分片键
+    Args:
+        ctx: click 上下文
+        param: 当前参数
+        value: 原始参数值，如 'buyer,month'
+
+    Returns:
+        分片键元组，未指定时为空元组
+    """
+    if not value:
+        return ()
+    keys: list[str] = []
+    for key in value.split(','):
+        key = key.strip().lower()
+        if key not in SHARD_KEYS:
+            raise click.BadParameter(f"unknown shard key '{key}', available: {', '.join(SHARD_KEYS)}")
+        if key not in keys:
+            keys.append(key)
+    return tuple(keys)
+
+
+@click.group(invoke_without_command=True)
 @click.option(
     '--directory', '-d', # 参数名
-    required=True,
-    type=click.Path(exists=True, file_okay=False, dir_okay=True), # 已存在的目录
-    help='包含发票文件和截图的目录'
+    default=None, # 仅在不调用子命令时必需
+
+    type=click.Path(exists=True, file_okay=True, dir_okay=True), # 已存在的目录或 ZIP 归档
+    help='包含发票文件和截图的目录，或直接读取（不解压）的 ZIP 归档'
 )
 @click.option(
     '--output', '-o', # 输出目录，默认当前目录
@@ -18,21 +72,429 @@ from .logging_config import setup_logging
     type=click.Path(file_okay=False, dir_okay=True),
     help='生成的报告（Excel, TeX）的输出目录'
 )
-def main(directory: str, output: str):
+@click.option(
+    '--full-rebuild',
+    is_flag=True,
+    default=False,
+    help='忽略输出目录中的增量处理清单，重新处理所有文件'
+)
+@click.option(
+    '--watch',
+    is_flag=True,
+    default=False,
+    help='持续监视目录，在发票或截图变化后增量更新报告（Ctrl+C 退出）'
+)
+@click.option(
+    '--interval',
+    default=2.0,
+    show_default=True,
+    type=click.FloatRange(min=0.1),
+    help='监视模式下两次轮询之间的间隔（秒）'
+)
+@click.option(
+    '--format', '-f', 'formats',
+    default=','.join(DEFAULT_FORMATS),
+    show_default=True,
+    callback=_parse_formats,
+    help=f"以逗号分隔的输出格式，可选：{', '.join(GENERATORS)}"
+)
+@click.option(
+    '--optimize-images',
+    is_flag=True,
+    default=False,
+    help='将截图缩放至打印分辨率并重新编码为 JPEG（按内容哈希缓存）后再写入 LaTeX 报告'
+)
+@click.option(
+    '--stage-resources/--no-stage-resources',
+    default=True,
+    show_default=True,
+    help='将 LaTeX 报告引用的发票和截图以硬链接/reflink/复制的方式放入 <output>/resources'
+)
+@click.option(
+    '--tex-fragments',
+    is_flag=True,
+    default=False,
+    help='为每张发票写入 <output>/fragments/ 下的 .tex 片段，主文件通过 \\input 引用；仅重写内容变化的片段'
+)
+@click.option(
+    '--metrics-json',
+    default=None,
+    type=click.Path(file_okay=True, dir_okay=False),
+    help='将各阶段（scan、parse、validate、excel、latex 等）的耗时与计数写入该 JSON 文件'
+)
+@click.option(
+    '--profile',
+    default=None,
+    type=click.Path(file_okay=True, dir_okay=False),
+    help='使用 cProfile 分析本次运行，并将 pstats 数据写入该文件'
+)
+@click.option(
+    '--log-level',
+    default='INFO',
+    show_default=True,
+    type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR'], case_sensitive=False),
+    help='最低日志级别；DEBUG 会输出逐个文件的解析与匹配日志'
+)
+@click.option(
+    '--detect-duplicates/--no-detect-duplicates',
+    default=True,
+    show_default=True,
+    help='检测发票号码重复或 PDF 内容相同的发票，并在报告中标记（--streaming 和 --concurrency 不支持）'
+)
+@click.option(
+    '--recursive', '-r',
+    is_flag=True,
+    default=False,
+    help='并行扫描所有子目录，截图仅与同一目录下的发票匹配（不支持监视模式）'
+)
+@click.option(
+    '--shard-by',
+    default=None,
+    callback=_parse_shard_by,
+    help='按购买人和/或月份分片生成报告（如 buyer、month、buyer,month），并生成汇总各分片的 index.xlsx'
+)
+@click.option(
+    '--catalog',
+    default=None,
+    type=click.Path(file_okay=True, dir_okay=False),
+    help='将本次处理的所有发票批量写入该 SQLite 发票目录，供 query 子命令查询'
+)
+@click.option(
+    '--streaming',
+    is_flag=True,
+    default=False,
+    help='以有界内存流式处理超大目录：不使用清单、不检测重复，截图逐个探测'
+)
+@click.option(
+    '--concurrency',
+    default=None,
+    type=click.IntRange(min=1),
+    help='使用异步流水线，最多同时进行 N 个截图探测/文件写入（适用于 NFS 等高延迟文件系统）；不使用清单、不检测重复'
+)
+@click.option(
+    '--check-images',
+    default=None,
+    is_flag=False,
+    flag_value='header',
+    type=click.Choice(['header', 'full']),
+    help='检查截图能否被读取，损坏的截图从发票中移除；header 仅读取头部和尺寸（默认），full 完整解码'
+)
+@click.option(
+    '--verify-pdf',
+    is_flag=True,
+    default=False,
+    help='核对文件名中的发票号码和金额是否出现在 PDF 未压缩的文本和元数据中，不一致时在报告中标记（不支持 ZIP 归档）'
+)
+@click.pass_context
+def main(
+        ctx: click.Context,
+        directory: str | None,
+        output: str,
+        full_rebuild: bool,
+        watch: bool,
+        interval: float,
+        formats: tuple[str, ...],
+        optimize_images: bool,
+        stage_resources: bool,
+        tex_fragments: bool,
+        metrics_json: str | None,
+        profile: str | None,
+        log_level: str,
+        detect_duplicates: bool,
+        recursive: bool,
+        shard_by: tuple[str, ...],
+        catalog: str | None,
+        streaming: bool,
+        concurrency: int | None,
+        check_images: str | None,
+        verify_pdf: bool,
+):
     """
     一个用于解析发票文件名并生成报销报告的工具
     Args:
+        ctx: click 上下文
         directory: 发票和截图文件所存在的目录
         output: 输出目录
+        full_rebuild: 是否忽略增量处理清单
+        watch: 是否进入监视模式
+        interval: 监视模式的轮询间隔
+        formats: 输出格式名
+        optimize_images: 是否优化截图
+        stage_resources: 是否放置资源文件
+        tex_fragments: 是否以片段方式生成 LaTeX 报告
+        metrics_json: 阶段统计输出文件
+        profile: cProfile 输出文件
+        log_level: 最低日志级别
+        detect_duplicates: 是否检测重复发票
+        recursive: 是否递归扫描子目录
+        shard_by: 分片键
+        catalog: SQLite 发票目录路径
+        streaming: 是否使用有界内存的流式流水线
+        concurrency: 异步流水线的并发度，为 None 时使用同步流水线
+        check_images: 截图检查方式，为 None 时不检查
+        verify_pdf: 是否核对 PDF 内容与文件名
     Returns:
         None
     """
-    setup_logging() # 初始化日志系统
+    if ctx.invoked_subcommand is not None:
+        return
+    if directory is None:
+        raise click.UsageError("Missing option '--directory' / '-d'.")
+    if watch and directory is not None and os.path.isfile(directory):
+        raise click.UsageError("--watch requires a directory, not an archive")
+    if watch and recursive:
+        raise click.UsageError("--watch cannot be combined with --recursive")
+    if watch and shard_by:
+        raise click.UsageError("--watch cannot be combined with --shard-by")
+    if watch and check_images:
+        raise click.UsageError("--watch cannot be combined with --check-images")
+    if watch and verify_pdf:
+        raise click.UsageError("--watch cannot be combined with --verify-pdf")
+    for flag, value in (("--catalog", catalog), ("--metrics-json", metrics_json), ("--profile", profile)):
+        if watch and value:
+            raise click.UsageError(f"--watch cannot be combined with {flag}")
+    if verify_pdf and os.path.isfile(directory):
+        raise click.UsageError("--verify-pdf requires a directory, not an archive")
+    for flag, enabled in (("--streaming", streaming), ("--concurrency", concurrency is not None)):
+        if enabled and (watch or recursive or shard_by or catalog or optimize_images or check_images or verify_pdf):
+            raise click.UsageError(
+                f"{flag} cannot be combined with --watch, --recursive, --shard-by, --catalog, "
+                f"--optimize-images, --check-images or --verify-pdf"
+            )
+    if streaming and concurrency is not None:
+        raise click.UsageError("--streaming cannot be combined with --concurrency")
+    explicit_duplicates = (
+        detect_duplicates and ctx.get_parameter_source("detect_duplicates") != click.core.ParameterSource.DEFAULT
+    )
+    if (streaming or concurrency is not None) and explicit_duplicates:
+        raise click.UsageError("--detect-duplicates cannot be combined with --streaming or --concurrency")
+    if (streaming or concurrency is not None) and os.path.isfile(directory):
+        raise click.UsageError("--streaming and --concurrency require a directory, not an archive")
+    setup_logging(log_level=getattr(logging, log_level.upper()), use_queue=True) # 初始化日志系统，日志在后台线程写出
     logging.info(f"input directory: {directory}")
     logging.info(f"output directory: {output}")
 
     try:
-        process_invoices(directory, output)
+        if watch:
+            InvoiceWatcher(
+                directory, output, interval=interval, formats=formats,
+                optimize_images=optimize_images, stage_resources=stage_resources,
+                detect_duplicates=detect_duplicates, latex_fragments=tex_fragments,
+            ).run(full_rebuild=full_rebuild)
+            return
+        metrics = Metrics()
+        profiler = cProfile.Profile() if profile else None
+        if profiler:
+            profiler.enable()
+        try:
+            if concurrency is not None:
+                # asyncio 仅在使用异步流水线时导入
+                import asyncio
+                asyncio.run(process_invoices_async(
+                    directory, output, formats=formats, stage_resources=stage_resources,
+                    latex_fragments=tex_fragments, concurrency=concurrency, metrics=metrics,
+                ))
+            elif streaming:
+                process_invoices_streaming(
+                    directory, output, formats=formats, stage_resources=stage_resources,
+                    latex_fragments=tex_fragments, metrics=metrics,
+                )
+            else:
+                process_invoices(
+                    directory, output, full_rebuild=full_rebuild, formats=formats,
+                    optimize_images=optimize_images, stage_resources=stage_resources,
+                    latex_fragments=tex_fragments, detect_duplicates=detect_duplicates, recursive=recursive,
+                    shard_by=shard_by, catalog=catalog, check_images=check_images is not None,
+                    full_image_decode=check_images == 'full', verify_pdf=verify_pdf, metrics=metrics,
+                )
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(profile)
+                logging.info(f"profile written to '{profile}'")
+            metrics.log_summary()
+            if metrics_json:
+                metrics.save_json(metrics_json)
         logging.info("processing successful!")
     except Exception as e:
         logging.error(f"processing failed: {e}")
+
+
+@main.command()
+@click.option(
+    '--catalog',
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    help='SQLite 发票目录路径'
+)
+@click.option(
+    '--output', '-o',
+    default='.',
+    type=click.Path(file_okay=False, dir_okay=True),
+    help='生成的报告的输出目录'
+)
+@click.option('--buyer', 'buyers', multiple=True, help='购买人，可多次指定')
+@click.option('--from', 'start', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='起始日期（含），如 2023-07-01')
+@click.option('--to', 'end', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='结束日期（含），如 2023-09-30')
+@click.option('--min-amount', default=None, type=float, help='最小金额（含）')
+@click.option('--max-amount', default=None, type=float, help='最大金额（含）')
+@click.option('--invoice-number', default=None, help='发票号码')
+@click.option(
+    '--format', '-f', 'formats',
+    default='excel',
+    show_default=True,
+    callback=_parse_formats,
+    help=f"以逗号分隔的输出格式，可选：{', '.join(name for name in GENERATORS if name != 'latex')}"
+)
+def query(
+        catalog: str,
+        output: str,
+        buyers: tuple[str, ...],
+        start: datetime | None,
+        end: datetime | None,
+        min_amount: float | None,
+        max_amount: float | None,
+        invoice_number: str | None,
+        formats: tuple[str, ...],
+):
+    """
+    按条件查询发票目录并直接生成报告，不扫描发票目录
+    不支持 TeX 报告：结果可能来自多个发票目录，其引用的文件不在 <output>/resources 中，且文件名可能冲突
+    Args:
+        catalog: SQLite 发票目录路径
+        output: 输出目录
+        buyers: 购买人
+        start: 起始日期
+        end: 结束日期
+        min_amount: 最小金额
+        max_amount: 最大金额
+        invoice_number: 发票号码
+        formats: 输出格式名
+    Returns:
+        None
+    """
+    if 'latex' in formats:
+        raise click.UsageError("query cannot generate latex reports: the referenced invoices and screenshots are not staged")
+    setup_logging(use_queue=True)
+    # sqlite3 仅在查询时导入
+    from .catalog import InvoiceCatalog
+
+    try:
+        with InvoiceCatalog(catalog) as invoice_catalog:
+            invoices = invoice_catalog.query(
+                buyers=buyers,
+                start=start.date() if start else None,
+                end=end.date() if end else None,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                invoice_number=invoice_number,
+            )
+        os.makedirs(output, exist_ok=True)
+        generate_reports(invoices, output, formats)
+        logging.info(f"query report with {len(invoices)} invoices written to '{output}'")
+    except Exception as e:
+        logging.error(f"query failed: {e}")
+
+
+@main.command()
+@click.argument(
+    'directories',
+    nargs=-1,
+    type=click.Path(exists=True, file_okay=True, dir_okay=True),
+)
+@click.option(
+    '--from-file', '-l', 'list_file',
+    default=None,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    help='每行一个目录的列表文件（忽略空行和 # 注释）'
+)
+@click.option(
+    '--output', '-o',
+    required=True,
+    type=click.Path(file_okay=False, dir_okay=True),
+    help='输出根目录，每个目录的报告写入其中以目录名命名的子目录'
+)
+@click.option(
+    '--workers', '-j',
+    default=None,
+    type=click.IntRange(min=1),
+    help='共享进程池的大小，默认为 CPU 数量'
+)
+@click.option(
+    '--resume/--no-resume',
+    default=True,
+    show_default=True,
+    help='跳过检查点中已完成的目录'
+)
+@click.option(
+    '--format', '-f', 'formats',
+    default=','.join(DEFAULT_FORMATS),
+    show_default=True,
+    callback=_parse_formats,
+    help=f"以逗号分隔的输出格式，可选：{', '.join(GENERATORS)}"
+)
+@click.option(
+    '--stage-resources/--no-stage-resources',
+    default=True,
+    show_default=True,
+    help='将 LaTeX 报告引用的发票和截图放入各输出目录的 resources'
+)
+@click.option(
+    '--detect-duplicates/--no-detect-duplicates',
+    default=True,
+    show_default=True,
+    help='检测每个目录内的重复发票'
+)
+@click.option(
+    '--log-level',
+    default='INFO',
+    show_default=True,
+    type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR'], case_sensitive=False),
+    help='最低日志级别'
+)
+def batch(
+        directories: tuple[str, ...],
+        list_file: str | None,
+        output: str,
+        workers: int | None,
+        resume: bool,
+        formats: tuple[str, ...],
+        stage_resources: bool,
+        detect_duplicates: bool,
+        log_level: str,
+):
+    """
+    在共享的进程池中批量处理多个目录（或 ZIP 归档），写入汇总 summary.xlsx，中断后可继续
+    Args:
+        directories: 发票目录
+        list_file: 目录列表文件
+        output: 输出根目录
+        workers: 进程池大小
+        resume: 是否跳过已完成的目录
+        formats: 输出格式名
+        stage_resources: 是否放置资源文件
+        detect_duplicates: 是否检测重复发票
+        log_level: 最低日志级别
+    Returns:
+        None
+    """
+    from .batch import BatchRunner, read_directory_list
+
+    all_directories = list(directories)
+    if list_file:
+        all_directories.extend(read_directory_list(list_file))
+    if not all_directories:
+        raise click.UsageError("no directories given")
+
+    setup_logging(log_level=getattr(logging, log_level.upper()), use_queue=True)
+    try:
+        results = BatchRunner(
+            output, max_workers=workers, resume=resume, formats=formats,
+            stage_resources=stage_resources, detect_duplicates=detect_duplicates,
+        ).run(all_directories)
+    except Exception as e:
+        logging.error(f"batch failed: {e}")
+        return
+    failed = [directory for directory, result in results.items() if result["status"] == "failed"]
+    if failed:
+        logging.error(f"{len(failed)} directories failed: {', '.join(failed)}")
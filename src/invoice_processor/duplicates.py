@@ -0,0 +1,142 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .invoice import Invoice
+from .json_cache import load_json_cache, save_json_cache
+from .sources import DirectorySource, InvoiceSource
+
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateDetector:
+    """
+    检测重复报销的发票：发票号码重复，或 PDF 内容完全相同（以不同文件名保存）
+    只有大小相同的 PDF 才需要计算内容哈希；哈希在线程池中通过发票来源计算（本地目录使用 mmap），
+    并以 (路径, 大小, 修改时间) 为键缓存在输出目录中，缓存只保留本次需要比较的文件
+    """
+    CACHE_FILENAME: str = ".invoice_hashes.json"
+
+    def __init__(
+            self,
+            directory: str,
+            output_dir: str,
+            max_workers: int | None = None,
+            source: InvoiceSource | None = None,
+    ):
+        """
+        Args:
+            directory: 发票文件存放目录
+            output_dir: 输出目录，哈希缓存保存于此
+            max_workers: 哈希线程池大小，默认由 ThreadPoolExecutor 决定
+            source: 发票来源（如 ZIP 归档），默认为 directory 对应的本地目录
+        """
+        self.directory = directory
+        self.source = source or DirectorySource(directory)
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.cache_path = os.path.join(output_dir, self.CACHE_FILENAME)
+        # 绝对路径 -> (大小, 修改时间, 哈希值)
+        self._cache: dict[str, tuple[int, int, str]] = {}
+        self.hashed_count: int = 0
+
+    def detect(self, invoices: list[Invoice]) -> int:
+        """
+        标记重复的发票：同一组重复发票中按文件名排序的第一张视为原始发票，
+        其余发票的 duplicate_of 设为该原始发票的文件名
+        Args:
+            invoices: 发票列表，duplicate_of 会被重新计算
+
+        Returns:
+            被标记为重复的发票数量
+        """
+        for inv in invoices:
+            inv.duplicate_of = None
+        ordered = sorted(invoices, key=lambda inv: inv.original_filename)
+
+        # 1. 发票号码重复
+        first_by_number: dict[str, Invoice] = {}
+        for inv in ordered:
+            original = first_by_number.setdefault(inv.invoice_number, inv)
+            if original is not inv:
+                inv.duplicate_of = original.original_filename
+
+        # 2. 内容重复：先按文件大小分组，只对大小相同的文件计算哈希
+        by_size: dict[int, list[Invoice]] = {}
+        stats: dict[str, tuple[int, int]] = {}
+        for inv in ordered:
+            try:
+                stat = self.source.stat(inv.original_filename)
+            except OSError as e:
+                logger.warning(f"cannot stat invoice '{inv.original_filename}' for duplicate detection: {e}")
+                continue
+            stats[inv.original_filename] = stat
+            by_size.setdefault(stat[0], []).append(inv)
+
+        candidates = [inv for group in by_size.values() if len(group) > 1 for inv in group]
+        self._load_cache()
+        digests = self._hash_all(candidates, stats)
+        first_by_digest: dict[str, Invoice] = {}
+        for inv in candidates:
+            digest = digests.get(inv.original_filename)
+            if digest is None:
+                continue
+            original = first_by_digest.setdefault(digest, inv)
+            if original is not inv and inv.duplicate_of is None:
+                inv.duplicate_of = original.original_filename
+        # 已删除或不再需要比较的文件的缓存条目被删除，缓存大小不会随时间无限增长
+        live = {self.source.cache_key(inv.original_filename) for inv in candidates}
+        self._cache = {path: value for path, value in self._cache.items() if path in live}
+        self._save_cache()
+
+        duplicates = [inv for inv in ordered if inv.duplicate_of is not None]
+        for inv in duplicates:
+            logger.warning(f"invoice '{inv.original_filename}' duplicates '{inv.duplicate_of}'")
+        logger.info(
+            f"duplicate detection finished: {len(duplicates)} duplicates, "
+            f"{len(candidates)} same-size files compared, {self.hashed_count} hashed"
+        )
+        return len(duplicates)
+
+    def _hash_all(self, invoices: list[Invoice], stats: dict[str, tuple[int, int]]) -> dict[str, str]:
+        """
+        计算（或从缓存读取）多个 PDF 的内容哈希
+        Args:
+            invoices: 需要哈希的发票
+            stats: 发票文件名 -> (大小, 修改时间)
+
+        Returns:
+            发票文件名 -> 哈希值，读取失败的文件不在结果中
+        """
+        digests: dict[str, str] = {}
+        to_hash: list[tuple[str, str, tuple[int, int]]] = []
+        for inv in invoices:
+            path = self.source.cache_key(inv.original_filename)
+            stat = stats[inv.original_filename]
+            cached = self._cache.get(path)
+            if cached is not None and (cached[0], cached[1]) == stat:
+                digests[inv.original_filename] = cached[2]
+            else:
+                to_hash.append((inv.original_filename, path, stat))
+
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                filenames = [filename for filename, _, _ in to_hash]
+                for (filename, path, stat), digest in zip(to_hash, executor.map(self.source.hash, filenames)):
+                    if digest is None:
+                        continue
+                    digests[filename] = digest
+                    self._cache[path] = (*stat, digest)
+            self.hashed_count += len(to_hash)
+
+        return digests
+
+    def _load_cache(self) -> None:
+        self._cache = load_json_cache(
+            self.cache_path,
+            lambda data: {path: (size, mtime_ns, digest) for path, (size, mtime_ns, digest) in data.items()},
+            "hash cache",
+        ) or {}
+
+    def _save_cache(self) -> None:
+        save_json_cache(self.cache_path, self._cache, "hash cache")
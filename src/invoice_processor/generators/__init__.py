@@ -0,0 +1,59 @@
+import importlib
+from typing import NamedTuple
+
+
+class GeneratorSpec(NamedTuple):
+    """
+    报告生成器的注册信息，生成器模块仅在实际使用时才被导入
+    """
+    module: str                                                     # 生成器所在模块（相对于本包）
+    class_name: str                                                 # 生成器类名
+    filename: str                                                   # 生成的报告文件名
+
+
+# 输出格式名 -> 生成器注册信息
+GENERATORS: dict[str, GeneratorSpec] = {
+    "excel": GeneratorSpec(".excel_generator", "ExcelGenerator", "invoices.xlsx"),
+    "latex": GeneratorSpec(".latex_generator", "LatexGenerator", "invoices.tex"),
+    "csv": GeneratorSpec(".csv_generator", "CsvGenerator", "invoices.csv"),
+    "csv.gz": GeneratorSpec(".csv_generator", "CsvGenerator", "invoices.csv.gz"),
+    "jsonl": GeneratorSpec(".jsonl_generator", "JsonLinesGenerator", "invoices.jsonl"),
+    "jsonl.gz": GeneratorSpec(".jsonl_generator", "JsonLinesGenerator", "invoices.jsonl.gz"),
+}
+
+DEFAULT_FORMATS: tuple[str, ...] = ("excel", "latex")
+
+
+def get_generator_class(name: str) -> type:
+    """
+    按输出格式名导入并返回生成器类
+    Args:
+        name: 输出格式名，如 'excel'、'latex'
+
+    Returns:
+        生成器类
+
+    Raises:
+        ValueError: 未注册的输出格式
+    """
+    try:
+        spec = GENERATORS[name]
+    except KeyError:
+        raise ValueError(f"unknown output format: '{name}', available: {', '.join(GENERATORS)}") from None
+    module = importlib.import_module(spec.module, __name__)
+    return getattr(module, spec.class_name)
+
+
+def create_generator(name: str, output_dir: str, **options):
+    """
+    创建指定输出格式的生成器实例，默认输出文件名取自注册信息
+    Args:
+        name: 输出格式名
+        output_dir: 报告输出目录
+        **options: 传给生成器构造函数的额外参数（可用 filename 覆盖输出文件名）
+
+    Returns:
+        生成器实例
+    """
+    generator_class = get_generator_class(name)
+    return generator_class(output_dir, **{"filename": GENERATORS[name].filename, **options})
@@ -0,0 +1,54 @@
+import os
+import csv
+import logging
+from collections.abc import Iterable
+from .tabular import COLUMNS, invoice_to_record, open_text_output
+from ..invoice import Invoice
+
+
+logger = logging.getLogger(__name__)
+
+
+class CsvGenerator:
+    """
+    以流式方式逐行写出 CSV 报告，列与 Excel 报告一致，不包含合计行
+    文件名以 .gz 结尾时进行 gzip 压缩
+    """
+    # 同一单元格中多个截图文件名之间的分隔符
+    SCREENSHOT_SEPARATOR: str = ";"
+
+    def __init__(self, output_dir: str, filename: str = "invoices.csv"):
+        """
+        Args:
+            output_dir: 输出目录
+            filename: 输出文件名，以 .gz 结尾时压缩输出
+        """
+        self.output_dir = output_dir
+        self.filename = filename
+        self.compress = filename.endswith(".gz")
+
+    def generate(self, invoices: Iterable[Invoice]) -> int:
+        """
+        逐张发票写入 CSV 文件
+        Args:
+            invoices: 任意 Invoice 可迭代对象（包括生成器）
+
+        Returns:
+            写入的发票数量
+        """
+        output_path = os.path.join(self.output_dir, self.filename)
+        logger.info(f"writing csv file: '{output_path}'")
+        count = 0
+        try:
+            with open_text_output(output_path, self.compress) as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                for inv in invoices:
+                    record = invoice_to_record(inv)
+                    record["screenshot filenames"] = self.SCREENSHOT_SEPARATOR.join(record["screenshot filenames"])
+                    writer.writerow(record.values())
+                    count += 1
+            logger.info(f"successfully generated csv file at '{output_path}' with {count} invoices")
+        except OSError as e:
+            logger.error(f"failed to write csv file to '{output_path}': {e}", exc_info=True)
+        return count
@@ -1,6 +1,9 @@
-import pandas as pd
 import logging
 import os
+from collections.abc import Iterable
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from .tabular import COLUMNS, invoice_to_record
 from ..invoice import Invoice
 
 
@@ -11,39 +14,65 @@ class ExcelGenerator:
     """
     将发票数据列表生成 Excel 文件
     """
-    def __init__(self, output_path: str):
+    # 报表列名，顺序即为输出顺序
+    COLUMNS: list[str] = COLUMNS
+    # 单个工作表的最大行数（Excel 限制），超出后切换到新的工作表
+    MAX_SHEET_ROWS: int = 1_048_576
+
+    def __init__(self, output_path: str, streaming: bool = False, filename: str = "invoices.xlsx"):
+        """
+        Args:
+            output_path: 报表输出目录
+            streaming: 是否使用 openpyxl 只写模式逐行写入，不构建 pandas DataFrame
+            filename: 输出文件名
+        """
         self.output_path = output_path
+        self.streaming = streaming
+        self.filename = filename
         logger.info(f"excel report file output directory: '{output_path}'")
 
-    def generate(self, invoices: list[Invoice]) -> None:
+    def generate(self, invoices: Iterable[Invoice]) -> None:
         logger.info(f"starting excel generation process")
 
+        if self.streaming:
+            logger.info(f"generating streaming report for all invoices")
+            self._generate_excel_report_streaming(invoices, self.filename)
+            logger.info("excel generation process finished")
+            return
+
+        invoices = list(invoices)
         if not invoices:
             logger.warning("no invoices to process")
             return
 
         logger.info(f"found {len(invoices)} invoices to process")
         logger.info(f"generating report for all invoices")
-        self._generate_excel_report(invoices, "invoices.xlsx")
+        self._generate_excel_report(invoices, self.filename)
 
         logger.info("excel generation process finished")
 
+    def _invoice_to_row(self, inv: Invoice) -> dict:
+        """
+        将单张发票转换为报表中的一行
+        Args:
+            inv: 发票信息
+
+        Returns:
+            列名 -> 单元格值，列与其他表格报告相同
+        """
+        row = invoice_to_record(inv)
+        # 日期单元格需要 date 对象才能按日期格式写入，记录中为 ISO 字符串
+        row["date"] = inv.invoice_date
+        return row
+
     def _generate_excel_report(self, invoices: list[Invoice], file_name: str) -> None:
+        # pandas 导入开销较大，仅在使用 DataFrame 路径时导入
+        import pandas as pd
+
         logger.info(f"generating excel report for {len(invoices)} invoices")
-        data = [
-            {
-                "date": inv.invoice_date,
-                "amount": inv.amount,
-                "buyer": inv.buyer,
-                "invoice number": inv.invoice_number,
-                "invoice filename": inv.original_filename,
-                "screenshot filenames": inv.screenshot_filenames,
-                "valid": inv.is_valid,
-            }
-            for inv in invoices
-        ]
-
-        df = pd.DataFrame(data)
+        data = [self._invoice_to_row(inv) for inv in invoices]
+
+        df = pd.DataFrame(data, columns=self.COLUMNS)
         total_amount = df["amount"].sum()
         total_row = pd.DataFrame([{"amount": total_amount}], index=["total"])
         df = pd.concat([df, total_row])
@@ -56,3 +85,88 @@ class ExcelGenerator:
             logger.info(f"successfully generated excel report: '{output_file_path}'")
         except Exception as e:
             logger.error(f"failed to generate excel report: '{output_file_path}': {e}", exc_info=True)
+
+    def _generate_excel_report_streaming(self, invoices: Iterable[Invoice], file_name: str) -> None:
+        """
+        使用 openpyxl 只写工作簿逐行追加发票，边写边累计总金额
+        输出的列、索引列和合计行与 pandas 路径一致；行数达到单表上限时切换到新的工作表
+        Args:
+            invoices: 任意 Invoice 可迭代对象（包括生成器）
+            file_name: 输出文件名
+
+        Returns:
+            None
+        """
+        output_file_path = os.path.join(self.output_path, file_name)
+
+        wb = Workbook(write_only=True)
+        ws = None
+        sheet_rows = 0
+        count = 0
+        total_amount = 0.0
+
+        for inv in invoices:
+            if ws is None or sheet_rows >= self.MAX_SHEET_ROWS:
+                ws = self._create_sheet(wb)
+                sheet_rows = 1
+            row = self._invoice_to_row(inv)
+            ws.append(self._to_cells(ws, count, row))
+            sheet_rows += 1
+            count += 1
+            total_amount += inv.amount
+
+        if count == 0:
+            logger.warning("no invoices to process")
+            return
+
+        # 最后一个工作表已满时，合计行写入新的工作表
+        if sheet_rows >= self.MAX_SHEET_ROWS:
+            ws = self._create_sheet(wb)
+
+        total_row = [None] * (len(self.COLUMNS) + 1)
+        total_row[0] = "total"
+        total_row[1 + self.COLUMNS.index("amount")] = total_amount
+        ws.append(total_row)
+
+        logger.info(f"saving excel report with {count} invoices to '{output_file_path}'")
+        try:
+            wb.save(output_file_path)
+            logger.info(f"successfully generated excel report: '{output_file_path}'")
+        except Exception as e:
+            logger.error(f"failed to generate excel report: '{output_file_path}': {e}", exc_info=True)
+
+    def _create_sheet(self, wb: Workbook):
+        """
+        新建一个工作表并写入表头（首列为索引列，表头为空）
+        Args:
+            wb: 只写工作簿
+
+        Returns:
+            新建的工作表
+        """
+        ws = wb.create_sheet(title=f"Sheet{len(wb.worksheets) + 1}")
+        ws.append([None] + self.COLUMNS)
+        return ws
+
+    def _to_cells(self, ws, index: int, row: dict) -> list:
+        """
+        将一行数据转换为 openpyxl 可写入的单元格列表，格式与 pandas 输出保持一致
+        Args:
+            ws: 当前工作表
+            index: 行索引
+            row: 列名 -> 单元格值
+
+        Returns:
+            单元格值列表
+        """
+        date_cell = WriteOnlyCell(ws, value=row["date"])
+        date_cell.number_format = "YYYY-MM-DD"
+        values: list = [index]
+        for column in self.COLUMNS:
+            if column == "date":
+                values.append(date_cell)
+            elif column == "screenshot filenames":
+                values.append(str(row[column]))
+            else:
+                values.append(row[column])
+        return values
@@ -0,0 +1,50 @@
+import os
+import json
+import logging
+from collections.abc import Iterable
+from .tabular import invoice_to_record, open_text_output
+from ..invoice import Invoice
+
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLinesGenerator:
+    """
+    以流式方式逐行写出 JSON Lines 报告，每行一个 JSON 对象，键与 Excel 报告的列一致
+    文件名以 .gz 结尾时进行 gzip 压缩
+    """
+    def __init__(self, output_dir: str, filename: str = "invoices.jsonl"):
+        """
+        Args:
+            output_dir: 输出目录
+            filename: 输出文件名，以 .gz 结尾时压缩输出
+        """
+        self.output_dir = output_dir
+        self.filename = filename
+        self.compress = filename.endswith(".gz")
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def generate(self, invoices: Iterable[Invoice]) -> int:
+        """
+        逐张发票写入 JSON Lines 文件
+        Args:
+            invoices: 任意 Invoice 可迭代对象（包括生成器）
+
+        Returns:
+            写入的发票数量
+        """
+        output_path = os.path.join(self.output_dir, self.filename)
+        logger.info(f"writing json lines file: '{output_path}'")
+        count = 0
+        encode = self._encoder.encode
+        try:
+            with open_text_output(output_path, self.compress) as f:
+                for inv in invoices:
+                    f.write(encode(invoice_to_record(inv)))
+                    f.write("\n")
+                    count += 1
+            logger.info(f"successfully generated json lines file at '{output_path}' with {count} invoices")
+        except OSError as e:
+            logger.error(f"failed to write json lines file to '{output_path}': {e}", exc_info=True)
+        return count
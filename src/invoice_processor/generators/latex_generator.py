@@ -1,7 +1,10 @@
 import os
+import hashlib
 import logging
-from PIL import Image
+from collections.abc import Iterable
+from typing import TextIO
 from ..invoice import Invoice
+from ..json_cache import load_json_cache, save_json_cache
 from textwrap import dedent
 
 
@@ -12,8 +15,34 @@ class LatexGenerator:
     """
     生成一个包含所有发票和截图图像的 LaTeX 文件，使用相对路径
     """
-    def __init__(self, output_dir: str):
+    # 写入 .tex 文件时使用的缓冲区大小
+    WRITE_BUFFER_SIZE: int = 1 << 20
+    # 片段模式下每张发票的 .tex 片段所在的子目录（相对于输出目录）
+    FRAGMENT_SUBDIR: str = "fragments"
+    # 片段目录中记录各片段内容哈希的文件，按主文件名区分，使多个主文件（如分片报告）可共用片段目录
+    FRAGMENT_HASHES_FILENAME: str = ".{name}.hashes.json"
+
+    def __init__(
+            self,
+            output_dir: str,
+            image_paths: dict[str, str] | None = None,
+            filename: str = "invoices.tex",
+            fragments: bool = False,
+    ):
+        """
+        Args:
+            output_dir: 输出目录
+            image_paths: 截图文件名 -> 相对于输出目录的替代路径（如优化后的截图），
+                未出现在映射中的截图使用 ./resources/ 下的原图
+            filename: 输出文件名，文件必须位于输出目录中以保证资源的相对路径有效
+            fragments: 是否为每张发票写入单独的片段文件，主文件通过 \\input 按顺序引用；
+                片段仅在内容哈希变化时重写，未变化的片段保持原有修改时间
+        """
         self.output_dir = output_dir
+        self.image_paths = image_paths or {}
+        self.filename = filename
+        self.fragments = fragments
+        self.fragments_written: int = 0                             # 片段模式下实际重写的片段数量
         logger.info(f"latex generator initialized with output directory: '{self.output_dir}'")
 
     def _get_tex_header(self) -> str:
@@ -58,6 +87,19 @@ class LatexGenerator:
             \end{{center}}
         """)
 
+    def _get_screenshot_path(self, filename: str) -> str:
+        """
+        Args:
+            filename: 截图文件名
+
+        Returns:
+            LaTeX 中引用该截图的相对路径
+        """
+        image_path = self.image_paths.get(filename)
+        if image_path is not None:
+            return "./" + image_path
+        return "./resources/" + filename
+
     def _get_tex_for_screenshot(self, invoice: Invoice) -> str:
         """
         为购物截图生成发票信息
@@ -68,14 +110,15 @@ class LatexGenerator:
             LaTeX 代码块
         """
         if not invoice.is_valid:
-            logger.warning(f"skipping screenshot for invalid invoice: '{invoice.original_filename}'")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("skipping screenshot for invalid invoice: '%s'", invoice.original_filename)
             return "\\newpage\n"
 
         width_fraction: float = 0.95 / invoice.screenshot_nums
 
         graphics_commands = []
         for filename in invoice.screenshot_filenames:
-            screenshot_path: str = "./resources/" + filename
+            screenshot_path: str = self._get_screenshot_path(filename)
             command: str = (
                 f"\\includegraphics[width={width_fraction:.2f}\\textwidth, "
                 f"height=0.49\\textheight, keepaspectratio]{{{screenshot_path}}}"
@@ -91,27 +134,187 @@ class LatexGenerator:
             \newpage
         """)
 
-    def generate(self, invoices: list[Invoice]):
+    def generate(self, invoices: Iterable[Invoice]) -> None:
         """
         生成包含所有有效发票图像的 .tex 文件
+        以流式方式逐张发票写入带缓冲的文件句柄，不在内存中拼接整个文档
         Args:
-            invoices:
+            invoices: 任意 Invoice 可迭代对象（包括生成器）
 
         Returns:
             无
         """
-        tex_context: str = self._get_tex_header()
-
-        for inv in invoices:
-            tex_context += self._get_tex_for_invoice(inv)
-            tex_context += self._get_tex_for_screenshot(inv)
+        if self.fragments:
+            self.generate_fragments(invoices)
+            return
 
-        tex_context += self._get_tex_footer()
-        output_path: str = os.path.join(self.output_dir, "invoices.tex")
+        output_path: str = os.path.join(self.output_dir, self.filename)
         logger.info(f"writing latex file: '{output_path}")
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(tex_context)
-            logger.info(f"successfully generated latex file at '{output_path}'")
+            with open(output_path, "w", encoding="utf-8", buffering=self.WRITE_BUFFER_SIZE) as f:
+                count = self.write(f, invoices)
+            logger.info(f"successfully generated latex file at '{output_path}' with {count} invoices")
         except IOError as e:
             logger.error(f"failed to write latex file to '{output_path}': {e}", exc_info=True)
+
+    def write(self, f: TextIO, invoices: Iterable[Invoice]) -> int:
+        """
+        将完整的 LaTeX 文档（头部、每张发票及其截图、尾部）依次写入文件句柄
+        Args:
+            f: 已打开的文本文件句柄
+            invoices: 任意 Invoice 可迭代对象
+
+        Returns:
+            写入的发票数量
+        """
+        count = 0
+        invalid_count = 0
+        f.write(self._get_tex_header())
+        for inv in invoices:
+            f.write(self._get_tex_for_invoice(inv))
+            f.write(self._get_tex_for_screenshot(inv))
+            count += 1
+            invalid_count += not inv.is_valid
+        f.write(self._get_tex_footer())
+
+        if invalid_count:
+            logger.warning(f"skipped screenshots for {invalid_count} invalid invoices")
+
+        return count
+
+    def _fragment_name(self, invoice: Invoice) -> str:
+        """
+        Args:
+            invoice: 发票信息
+
+        Returns:
+            片段文件名；递归模式下发票文件名中的目录分隔符替换为 '__'
+        """
+        basename, _ = os.path.splitext(invoice.original_filename)
+        return basename.replace("/", "__") + ".tex"
+
+    def generate_fragments(self, invoices: Iterable[Invoice]) -> int:
+        """
+        为每张发票写入 <output>/fragments/ 下的片段文件，并写入按顺序 \\input 各片段的主文件
+        片段及主文件仅在内容哈希与上次写入时不同（或文件被外部修改）时才重写；
+        不再被引用的片段会被删除
+        主文件边消费发票边写入临时文件，不在内存中累积；片段哈希表（每张发票一项）仍保存在内存中，
+        用于判断片段是否变化及删除不再被引用的片段，其大小与发票数量成正比
+        Args:
+            invoices: 任意 Invoice 可迭代对象
+
+        Returns:
+            写入主文件的发票数量
+        """
+        fragment_dir = os.path.join(self.output_dir, self.FRAGMENT_SUBDIR)
+        os.makedirs(fragment_dir, exist_ok=True)
+        hashes_path = os.path.join(
+            fragment_dir, self.FRAGMENT_HASHES_FILENAME.format(name=os.path.splitext(self.filename)[0])
+        )
+        previous = self._load_fragment_hashes(hashes_path)
+        hashes: dict[str, list] = {}
+
+        self.fragments_written = 0
+        count = 0
+        invalid_count = 0
+        output_path = os.path.join(self.output_dir, self.filename)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8", buffering=self.WRITE_BUFFER_SIZE) as master:
+                master.write(self._get_tex_header())
+                for inv in invoices:
+                    name = self._fragment_name(inv)
+                    content = self._get_tex_for_invoice(inv) + self._get_tex_for_screenshot(inv)
+                    hashes[name], written = self._write_if_changed(
+                        os.path.join(fragment_dir, name), content, previous.get(name)
+                    )
+                    self.fragments_written += written
+                    master.write(f"\\input{{{self.FRAGMENT_SUBDIR}/{name}}}\n")
+                    count += 1
+                    invalid_count += not inv.is_valid
+                master.write(self._get_tex_footer())
+
+            for name in previous.keys() - hashes.keys():
+                try:
+                    os.remove(os.path.join(fragment_dir, name))
+                except FileNotFoundError:
+                    pass
+
+            # 主文件内容未变化时保留原文件（及其修改时间），避免触发 LaTeX 的重新编译
+            if not self._same_content(tmp_path, output_path):
+                os.replace(tmp_path, output_path)
+            save_json_cache(hashes_path, hashes, "fragment hashes")
+        except OSError as e:
+            logger.error(f"failed to write latex file to '{output_path}': {e}", exc_info=True)
+            return count
+        finally:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+
+        if invalid_count:
+            logger.warning(f"skipped screenshots for {invalid_count} invalid invoices")
+        logger.info(
+            f"successfully generated latex file at '{output_path}' with {count} invoices, "
+            f"{self.fragments_written} fragments rewritten"
+        )
+        return count
+
+    @staticmethod
+    def _same_content(path: str, other: str) -> bool:
+        """
+        Args:
+            path: 文件路径
+            other: 另一个文件路径，可以不存在
+
+        Returns:
+            两个文件内容是否相同（先比较大小，再比较内容哈希）
+        """
+        try:
+            if os.path.getsize(path) != os.path.getsize(other):
+                return False
+            with open(path, "rb") as f, open(other, "rb") as g:
+                return hashlib.file_digest(f, "sha256").digest() == hashlib.file_digest(g, "sha256").digest()
+        except FileNotFoundError:
+            return False
+
+    def _write_if_changed(self, path: str, content: str, cached: list | None) -> tuple[list, bool]:
+        """
+        仅在内容哈希变化时写入文件，写入时先写临时文件再替换
+        Args:
+            path: 文件路径
+            content: 文件内容
+            cached: 上次写入时记录的 [内容哈希, 修改时间]；为 None 时读取现有文件计算哈希
+
+        Returns:
+            (本次的 [内容哈希, 修改时间], 是否实际写入)
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            stat = os.stat(path)
+            if cached is not None:
+                unchanged = cached == [digest, stat.st_mtime_ns]
+            else:
+                with open(path, "rb") as f:
+                    unchanged = hashlib.sha256(f.read()).hexdigest() == digest
+            if unchanged:
+                return [digest, stat.st_mtime_ns], False
+        except FileNotFoundError:
+            pass
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return [digest, os.stat(path).st_mtime_ns], True
+
+    def _load_fragment_hashes(self, path: str) -> dict[str, list]:
+        """
+        Args:
+            path: 片段哈希文件路径
+
+        Returns:
+            片段文件名 -> [内容哈希, 修改时间]；文件不存在或损坏时为空
+        """
+        hashes = load_json_cache(path, description="fragment hashes")
+        return hashes if isinstance(hashes, dict) else {}
@@ -0,0 +1,71 @@
+import io
+import gzip
+from contextlib import contextmanager
+from collections.abc import Iterator
+from typing import TextIO
+from ..invoice import Invoice
+
+
+# 表格类报告的列名，顺序即为输出顺序（Excel、CSV、JSON Lines 共用）
+COLUMNS: list[str] = [
+    "date",
+    "amount",
+    "buyer",
+    "invoice number",
+    "invoice filename",
+    "screenshot filenames",
+    "valid",
+    "duplicate of",
+    "content mismatch",
+]
+
+# 写入文本报告时使用的缓冲区大小
+WRITE_BUFFER_SIZE: int = 1 << 20
+# gzip 压缩级别：6 在压缩率与速度之间折中，明显快于默认的 9
+GZIP_COMPRESS_LEVEL: int = 6
+
+
+def invoice_to_record(inv: Invoice) -> dict:
+    """
+    将单张发票转换为可直接序列化的一行记录
+    Args:
+        inv: 发票信息
+
+    Returns:
+        列名 -> 值（日期为 ISO 格式字符串，截图为文件名列表）
+    """
+    return {
+        "date": inv.invoice_date.isoformat(),
+        "amount": inv.amount,
+        "buyer": inv.buyer,
+        "invoice number": inv.invoice_number,
+        "invoice filename": inv.original_filename,
+        "screenshot filenames": inv.screenshot_filenames,
+        "valid": inv.is_valid,
+        "duplicate of": inv.duplicate_of,
+        "content mismatch": inv.content_mismatch,
+    }
+
+
+@contextmanager
+def open_text_output(path: str, compress: bool = False) -> Iterator[TextIO]:
+    """
+    以大缓冲区打开文本输出文件，可选 gzip 压缩
+    Args:
+        path: 输出文件路径
+        compress: 是否 gzip 压缩（压缩头中不写入时间戳，相同内容得到相同的文件）
+
+    Returns:
+        文本文件句柄的上下文管理器
+    """
+    if not compress:
+        with open(path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+            yield f
+        return
+
+    with open(path, "wb") as raw, \
+            gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_COMPRESS_LEVEL, mtime=0) as compressed, \
+            io.TextIOWrapper(
+                io.BufferedWriter(compressed, buffer_size=WRITE_BUFFER_SIZE), encoding="utf-8", newline=""
+            ) as f:
+        yield f
@@ -0,0 +1,160 @@
+import os
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, UnidentifiedImageError
+from .invoice import Invoice
+from .json_cache import load_json_cache, save_json_cache
+from .sources import DirectorySource, InvoiceSource
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImageIntegrityChecker:
+    """
+    检查截图是否为可读的图像，避免损坏的截图直到 LaTeX 编译时才暴露
+    默认只读取图像头部和尺寸，并检查 PNG/JPEG 的结尾标记以发现被截断的文件；full_decode 时完整解码。
+    检查在线程池中进行，结果以 (路径, 大小, 修改时间) 为键缓存在输出目录中，每个文件只检查一次；
+    缓存只保留本次检查的截图
+    """
+    CACHE_FILENAME: str = ".image_checks.json"
+    # 各格式文件末尾（TRAILER_WINDOW 字节内）应出现的结束标记，容许部分设备在结束标记后追加的少量数据
+    TRAILER_WINDOW: int = 1024
+    TRAILERS: dict[str, bytes] = {
+        "PNG": b"IEND\xaeB`\x82",
+        "JPEG": b"\xff\xd9",
+    }
+
+    def __init__(
+            self,
+            directory: str,
+            output_dir: str,
+            full_decode: bool = False,
+            max_workers: int | None = None,
+            source: InvoiceSource | None = None,
+    ):
+        """
+        Args:
+            directory: 截图所在目录
+            output_dir: 输出目录，检查结果缓存保存于此
+            full_decode: 是否完整解码图像（更慢，但能发现数据损坏）
+            max_workers: 线程池大小，默认由 ThreadPoolExecutor 决定
+            source: 发票来源（如 ZIP 归档），默认为 directory 对应的本地目录
+        """
+        self.output_dir = output_dir
+        self.full_decode = full_decode
+        self.max_workers = max_workers
+        self.source = source or DirectorySource(directory)
+        self.cache_path = os.path.join(output_dir, self.CACHE_FILENAME)
+        # 缓存键 -> (大小, 修改时间, 是否完整解码, 错误信息)，错误信息为 None 表示图像完好
+        self._cache: dict[str, tuple[int, int, bool, str | None]] = {}
+        self.checked_count: int = 0
+
+    def check(self, invoices: Iterable[Invoice]) -> int:
+        """
+        检查所有发票的截图，并从 screenshot_filenames 中移除损坏的截图，
+        所有截图都损坏的发票因此变为无效，LaTeX 报告也不会引用损坏的文件
+        Args:
+            invoices: 发票列表
+
+        Returns:
+            被移除的损坏截图数量
+        """
+        invoices = [inv for inv in invoices if inv.screenshot_filenames]
+        names = list(dict.fromkeys(name for inv in invoices for name in inv.screenshot_filenames))
+        if not names:
+            return 0
+
+        self._load_cache()
+        errors = self._check_all(names)
+        # 已删除或不再被引用的截图的缓存条目被删除
+        live = {self.source.cache_key(name) for name in names}
+        self._cache = {key: value for key, value in self._cache.items() if key in live}
+        self._save_cache()
+
+        removed = 0
+        for inv in invoices:
+            broken = [name for name in inv.screenshot_filenames if errors.get(name)]
+            if not broken:
+                continue
+            inv.screenshot_filenames[:] = [name for name in inv.screenshot_filenames if name not in broken]
+            removed += len(broken)
+            for name in broken:
+                logger.warning(f"screenshot '{name}' of invoice '{inv.original_filename}' is broken: {errors[name]}")
+
+        logger.info(
+            f"image integrity check finished: {len(names)} screenshots, {self.checked_count} checked, "
+            f"{removed} broken"
+        )
+        return removed
+
+    def _check_all(self, names: list[str]) -> dict[str, str | None]:
+        """
+        检查（或从缓存读取）多个截图
+        Args:
+            names: 截图文件名
+
+        Returns:
+            截图文件名 -> 错误信息，图像完好时为 None
+        """
+        errors: dict[str, str | None] = {}
+        to_check: list[tuple[str, str, tuple[int, int]]] = []
+        for name in names:
+            try:
+                stat = self.source.stat(name)
+            except OSError as e:
+                errors[name] = f"cannot stat file: {e}"
+                continue
+            key = self.source.cache_key(name)
+            cached = self._cache.get(key)
+            # 只做过头部检查的结果不能用于完整解码的请求
+            if cached is not None and (cached[0], cached[1]) == stat and (cached[2] or not self.full_decode):
+                errors[name] = cached[3]
+            else:
+                to_check.append((name, key, stat))
+
+        if to_check:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(self._check_image, [name for name, _, _ in to_check])
+                for (name, key, stat), error in zip(to_check, results):
+                    errors[name] = error
+                    self._cache[key] = (*stat, self.full_decode, error)
+            self.checked_count += len(to_check)
+
+        return errors
+
+    def _check_image(self, name: str) -> str | None:
+        """
+        检查单个截图
+        Args:
+            name: 截图文件名
+
+        Returns:
+            错误信息，图像完好时为 None
+        """
+        try:
+            with self.source.open(name) as f, Image.open(f) as image:
+                width, height = image.size
+                if width <= 0 or height <= 0:
+                    return f"invalid dimensions {width}x{height}"
+                if self.full_decode:
+                    image.load()
+                    return None
+                trailer = self.TRAILERS.get(image.format)
+                if trailer is not None:
+                    size = f.seek(0, os.SEEK_END)
+                    f.seek(max(0, size - self.TRAILER_WINDOW))
+                    if trailer not in f.read():
+                        return "image file is truncated"
+        except (OSError, UnidentifiedImageError, ValueError, SyntaxError) as e:
+            return str(e) or type(e).__name__
+        return None
+
+    def _load_cache(self) -> None:
+        self._cache = load_json_cache(
+            self.cache_path, lambda data: {key: tuple(value) for key, value in data.items()}, "image check cache"
+        ) or {}
+
+    def _save_cache(self) -> None:
+        save_json_cache(self.cache_path, self._cache, "image check cache")
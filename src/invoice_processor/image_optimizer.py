@@ -0,0 +1,167 @@
+import os
+import hashlib
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, UnidentifiedImageError
+from .invoice import Invoice
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImageOptimizer:
+    """
+    将购物截图缩放到 LaTeX 版面实际需要的打印分辨率并重新编码为 JPEG
+    结果按内容哈希缓存，内容未变化的截图不会被重复处理；本次未用到的缓存文件会被删除
+    """
+    # 版面尺寸（厘米），与 LatexGenerator 的 a4paper + margin=0.1cm 一致
+    TEXT_WIDTH_CM: float = 21.0 - 2 * 0.1
+    TEXT_HEIGHT_CM: float = 29.7 - 2 * 0.1
+    # 截图最大高度占 \textheight 的比例，与 LatexGenerator 一致
+    HEIGHT_FRACTION: float = 0.49
+    # 优化后的截图相对于输出目录的存放位置
+    CACHE_SUBDIR: str = os.path.join("resources", "optimized")
+
+    def __init__(self, output_dir: str, dpi: int = 300, quality: int = 85, max_workers: int | None = None):
+        """
+        Args:
+            output_dir: 报告输出目录，优化后的截图保存在其下的 resources/optimized
+            dpi: 打印分辨率
+            quality: JPEG 质量
+            max_workers: 进程池大小，默认为 CPU 核数
+        """
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.quality = quality
+        self.max_workers = max_workers
+        self.cache_dir = os.path.join(output_dir, self.CACHE_SUBDIR)
+
+    def target_size(self, screenshot_nums: int) -> tuple[int, int]:
+        """
+        计算单张截图在版面中的最大像素尺寸
+        Args:
+            screenshot_nums: 同一页中并排的截图数量
+
+        Returns:
+            (最大宽度, 最大高度)，单位为像素
+        """
+        # 与 LatexGenerator 保持一致：宽度比例保留两位小数
+        width_fraction = round(0.95 / screenshot_nums, 2)
+        width = width_fraction * self.TEXT_WIDTH_CM / 2.54 * self.dpi
+        height = self.HEIGHT_FRACTION * self.TEXT_HEIGHT_CM / 2.54 * self.dpi
+        return max(1, round(width)), max(1, round(height))
+
+    def optimize(self, source_dir: str, invoices: Iterable[Invoice]) -> dict[str, str]:
+        """
+        在进程池中并行优化所有有效发票的截图
+        Args:
+            source_dir: 截图所在目录
+            invoices: 发票列表
+
+        Returns:
+            截图文件名 -> 优化后文件相对于输出目录的路径（使用 '/' 分隔）；
+            处理失败的截图不在结果中，调用方应回退到原图
+        """
+        tasks = []
+        filenames: list[str] = []
+        for inv in invoices:
+            if not inv.is_valid:
+                continue
+            size = self.target_size(inv.screenshot_nums)
+            for filename in inv.screenshot_filenames:
+                tasks.append((os.path.join(source_dir, filename), self.cache_dir, size, self.quality))
+                filenames.append(filename)
+
+        if not tasks:
+            self._prune(set())
+            return {}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        logger.info(f"optimizing {len(tasks)} screenshots into '{self.cache_dir}'")
+
+        image_paths: dict[str, str] = {}
+        cached_count = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for filename, result in zip(filenames, executor.map(_optimize_image, tasks, chunksize=16)):
+                cache_name, cached, error = result
+                if error is not None:
+                    logger.warning(f"failed to optimize screenshot '{filename}', using original: {error}")
+                    continue
+                cached_count += cached
+                image_paths[filename] = f"{self.CACHE_SUBDIR.replace(os.sep, '/')}/{cache_name}"
+        self._prune({path.rsplit('/', 1)[-1] for path in image_paths.values()})
+
+        logger.info(
+            f"screenshot optimization finished: {len(image_paths)} optimized, "
+            f"{cached_count} reused from cache, {len(tasks) - len(image_paths)} failed"
+        )
+        return image_paths
+
+    def _prune(self, keep: set[str]) -> None:
+        """
+        删除缓存目录中本次未用到的文件（已删除或内容已变化的截图的旧版本）
+        Args:
+            keep: 本次用到的缓存文件名
+        """
+        removed = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name not in keep:
+                        os.remove(entry.path)
+                        removed += 1
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"failed to prune optimized screenshots in '{self.cache_dir}': {e}")
+        if removed:
+            logger.info(f"removed {removed} unused optimized screenshots from '{self.cache_dir}'")
+
+
+def _optimize_image(task: tuple[str, str, tuple[int, int], int]) -> tuple[str | None, bool, str | None]:
+    """
+    进程池任务：按内容哈希查找缓存，未命中时缩放并重新编码为 JPEG
+    Args:
+        task: (源文件路径, 缓存目录, (最大宽度, 最大高度), JPEG 质量)
+
+    Returns:
+        (缓存文件名, 是否命中缓存, 错误信息)
+    """
+    source_path, cache_dir, (max_width, max_height), quality = task
+    try:
+        with open(source_path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256")
+    except OSError as e:
+        return None, False, str(e)
+
+    # 目标尺寸和质量也是缓存键的一部分，版面变化后会重新生成
+    digest.update(f"{max_width}x{max_height}q{quality}".encode())
+    cache_name = f"{digest.hexdigest()}.jpg"
+    cache_path = os.path.join(cache_dir, cache_name)
+    if os.path.exists(cache_path):
+        return cache_name, True, None
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG 不支持透明通道，以白色背景合成
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            image.save(tmp_path, "JPEG", quality=quality, optimize=True)
+            os.replace(tmp_path, cache_path)
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        return None, False, str(e)
+    finally:
+        # 保存失败时不留下不完整的临时文件
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+    return cache_name, False, None
@@ -2,10 +2,11 @@ from dataclasses import dataclass, field
 from datetime import date
 
 
-@dataclass
+@dataclass(slots=True)
 class Invoice:
     """
     用于存储单张发票信息的结构化数据类型
+    使用 __slots__ 以减少大量实例时的内存占用；需要批量存储时使用 InvoiceBatch
     """
     invoice_date: date                                              # 发票日期
     invoice_number: str                                             # 发票号码
@@ -13,6 +14,8 @@ class Invoice:
     buyer: str                                                      # 购买人
     original_filename: str                                          # 发票文件名
     screenshot_filenames: list[str] = field(default_factory=list)    # 发票文件名列表
+    duplicate_of: str | None = None                                 # 重复时为原始发票的文件名
+    content_mismatch: str | None = None                             # PDF 内容核对不一致的字段，如 'amount'
 
     @property
     def is_valid(self) -> bool:
@@ -31,3 +34,41 @@ class Invoice:
 
         """
         return len(self.screenshot_filenames)
+
+    def to_dict(self) -> dict:
+        """
+        转换为可 JSON 序列化的字典
+        Returns:
+            字段名 -> 值，日期以 ISO 格式字符串表示
+        """
+        return {
+            "invoice_date": self.invoice_date.isoformat(),
+            "invoice_number": self.invoice_number,
+            "amount": self.amount,
+            "buyer": self.buyer,
+            "original_filename": self.original_filename,
+            "screenshot_filenames": list(self.screenshot_filenames),
+            "duplicate_of": self.duplicate_of,
+            "content_mismatch": self.content_mismatch,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Invoice":
+        """
+        从 to_dict 生成的字典还原 Invoice
+        Args:
+            data: 字段名 -> 值
+
+        Returns:
+            Invoice 对象
+        """
+        return cls(
+            invoice_date=date.fromisoformat(data["invoice_date"]),
+            invoice_number=data["invoice_number"],
+            amount=data["amount"],
+            buyer=data["buyer"],
+            original_filename=data["original_filename"],
+            screenshot_filenames=list(data["screenshot_filenames"]),
+            duplicate_of=data.get("duplicate_of"),
+            content_mismatch=data.get("content_mismatch"),
+        )
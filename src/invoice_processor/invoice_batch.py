@@ -0,0 +1,193 @@
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from datetime import date
+import numpy as np
+from .invoice import Invoice
+
+
+# date.toordinal() 与 numpy datetime64[D]（以 1970-01-01 为 0）之间的偏移
+_EPOCH_ORDINAL: int = date(1970, 1, 1).toordinal()
+
+
+class InvoiceBatch:
+    """
+    以列式结构紧凑存储大量发票
+    日期和金额保存在连续的数值数组中，购买人以字典编码存储（相同字符串只保存一份），
+    截图文件名保存在一个扁平列表中并以偏移数组索引
+    可直接迭代得到 Invoice 对象，因此所有接受 Iterable[Invoice] 的生成器都可以直接消费
+
+    Notes:
+        dates、amounts 等属性返回底层缓冲区的 numpy 视图，持有视图期间不能继续 append
+    """
+    __slots__ = (
+        "_date_days", "_amounts", "_buyer_codes", "_buyer_table", "_buyer_lookup",
+        "invoice_numbers", "original_filenames", "_screenshot_offsets", "_screenshot_filenames",
+        "duplicate_of", "content_mismatch",
+    )
+
+    def __init__(self):
+        self._date_days = array("i")                                # 自 1970-01-01 起的天数
+        self._amounts = array("d")                                  # 金额
+        self._buyer_codes = array("i")                              # 购买人编码
+        self._buyer_table: list[str] = []                           # 购买人编码 -> 购买人
+        self._buyer_lookup: dict[str, int] = {}                     # 购买人 -> 购买人编码
+        self.invoice_numbers: list[str] = []                        # 发票号码
+        self.original_filenames: list[str] = []                     # 发票文件名
+        self._screenshot_offsets = array("q", [0])                  # 第 i 张发票的截图位于 [offsets[i], offsets[i+1])
+        self._screenshot_filenames: list[str] = []                  # 所有发票的截图文件名
+        self.duplicate_of: list[str | None] = []                    # 重复时为原始发票的文件名
+        self.content_mismatch: list[str | None] = []                # PDF 内容核对不一致的字段
+
+    @classmethod
+    def from_invoices(cls, invoices: Iterable[Invoice]) -> "InvoiceBatch":
+        """
+        从任意 Invoice 可迭代对象构建批量容器
+        Args:
+            invoices: Invoice 可迭代对象
+
+        Returns:
+            InvoiceBatch 对象
+        """
+        batch = cls()
+        batch.extend(invoices)
+        return batch
+
+    def append(self, invoice: Invoice) -> None:
+        """
+        追加一张发票
+        Args:
+            invoice: Invoice 对象
+
+        Returns:
+            None
+        """
+        code = self._buyer_lookup.get(invoice.buyer)
+        if code is None:
+            code = len(self._buyer_table)
+            buyer = sys.intern(invoice.buyer)
+            self._buyer_table.append(buyer)
+            self._buyer_lookup[buyer] = code
+
+        self._date_days.append(invoice.invoice_date.toordinal() - _EPOCH_ORDINAL)
+        self._amounts.append(invoice.amount)
+        self._buyer_codes.append(code)
+        self.invoice_numbers.append(invoice.invoice_number)
+        self.original_filenames.append(invoice.original_filename)
+        self._screenshot_filenames.extend(invoice.screenshot_filenames)
+        self._screenshot_offsets.append(len(self._screenshot_filenames))
+        self.duplicate_of.append(invoice.duplicate_of)
+        self.content_mismatch.append(invoice.content_mismatch)
+
+    def extend(self, invoices: Iterable[Invoice]) -> None:
+        """
+        追加多张发票
+        Args:
+            invoices: Invoice 可迭代对象
+
+        Returns:
+            None
+        """
+        for invoice in invoices:
+            self.append(invoice)
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __getitem__(self, i: int) -> Invoice:
+        """
+        还原第 i 张发票，返回的是新的 Invoice 对象，对其修改不会写回容器
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("invoice batch index out of range")
+
+        return Invoice(
+            invoice_date=date.fromordinal(self._date_days[i] + _EPOCH_ORDINAL),
+            invoice_number=self.invoice_numbers[i],
+            amount=self._amounts[i],
+            buyer=self._buyer_table[self._buyer_codes[i]],
+            original_filename=self.original_filenames[i],
+            screenshot_filenames=self.screenshot_filenames(i),
+            duplicate_of=self.duplicate_of[i],
+            content_mismatch=self.content_mismatch[i],
+        )
+
+    def __iter__(self) -> Iterator[Invoice]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def screenshot_filenames(self, i: int) -> list[str]:
+        """
+        Args:
+            i: 发票下标
+
+        Returns:
+            第 i 张发票的截图文件名列表
+        """
+        return self._screenshot_filenames[self._screenshot_offsets[i]:self._screenshot_offsets[i + 1]]
+
+    @property
+    def dates(self) -> np.ndarray:
+        """
+        Returns:
+            发票日期数组，dtype 为 datetime64[D]
+        """
+        return np.frombuffer(self._date_days, dtype=np.int32).astype("datetime64[D]")
+
+    @property
+    def amounts(self) -> np.ndarray:
+        """
+        Returns:
+            金额数组（float64 只读视图）
+        """
+        return np.frombuffer(self._amounts, dtype=np.float64)
+
+    @property
+    def buyer_codes(self) -> np.ndarray:
+        """
+        Returns:
+            购买人编码数组（int32 只读视图），配合 buyers 使用
+        """
+        return np.frombuffer(self._buyer_codes, dtype=np.int32)
+
+    @property
+    def buyers(self) -> list[str]:
+        """
+        Returns:
+            购买人编码 -> 购买人
+        """
+        return self._buyer_table
+
+    @property
+    def screenshot_offsets(self) -> np.ndarray:
+        """
+        Returns:
+            长度为 len(self) + 1 的截图偏移数组（int64 只读视图）
+        """
+        return np.frombuffer(self._screenshot_offsets, dtype=np.int64)
+
+    @property
+    def screenshot_nums(self) -> np.ndarray:
+        """
+        Returns:
+            每张发票关联截图的数量
+        """
+        return np.diff(self.screenshot_offsets)
+
+    @property
+    def is_valid(self) -> np.ndarray:
+        """
+        Returns:
+            每张发票是否至少有一个关联截图的布尔数组
+        """
+        return self.screenshot_nums > 0
+
+    @property
+    def total_amount(self) -> float:
+        """
+        Returns:
+            所有发票的金额合计
+        """
+        return float(self.amounts.sum())
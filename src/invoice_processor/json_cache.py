@@ -0,0 +1,59 @@
+import os
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_json_cache(
+        path: str,
+        convert: Callable[[Any], Any] | None = None,
+        description: str = "cache",
+) -> Any | None:
+    """
+    读取输出目录中的 JSON 缓存文件（清单、哈希缓存、检查点等）
+    Args:
+        path: 文件路径
+        convert: 将 JSON 数据转换为所需结构的函数，其抛出的 KeyError、TypeError 等视为文件已损坏
+        description: 日志中对该文件的称呼
+
+    Returns:
+        转换后的数据；文件不存在或已损坏时为 None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return convert(data) if convert is not None else data
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"ignoring corrupted {description} '{path}': {e}")
+        return None
+
+
+def save_json_cache(path: str, data: Any, description: str = "cache") -> bool:
+    """
+    写入 JSON 缓存文件：先写临时文件再替换，中断时不会留下损坏的文件
+    Args:
+        path: 文件路径
+        data: 可 JSON 序列化的数据
+        description: 日志中对该文件的称呼
+
+    Returns:
+        是否写入成功
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"failed to save {description} to '{path}': {e}")
+        return False
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
@@ -1,16 +1,45 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
 
 
-def setup_logging(logs_dir: str = "logs", log_level = logging.INFO) -> None:
+LOG_FORMAT: str = "%(asctime)s - %(levelname)s - [%(name)s] - %(message)s"
+LOG_DATE_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    直接将日志记录放入队列，消息的 % 格式化与异常堆栈格式化全部推迟到监听线程中完成
+    （标准 QueueHandler 会在调用方线程中先格式化消息）
+
+    Notes:
+        仅适用于同一进程内的队列；日志参数在写出前不应被修改
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+        logs_dir: str = "logs",
+        log_level = logging.INFO,
+        use_queue: bool = False,
+) -> logging.handlers.QueueListener | None:
     """
     配置日志记录器
     Args:
+        logs_dir: 日志文件目录
         log_level: 最低日志级别
+        use_queue: 是否使用队列模式。启用后调用方只把日志记录放入队列，
+            由后台线程完成格式化及文件、控制台输出，不阻塞处理流程
 
     Returns:
-        None
+        QueueListener: 队列模式下的后台监听器（进程退出时自动停止）
+        None: 同步模式
     """
     # 创建 logs 目录
     os.makedirs(logs_dir, exist_ok=True)
@@ -20,18 +49,69 @@ def setup_logging(logs_dir: str = "logs", log_level = logging.INFO) -> None:
     log_filename: str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S.log")
     log_file_path: str = os.path.join(logs_dir, log_filename)
 
+    # 指定日志处理器
+    handlers: list[logging.Handler] = [
+        logging.FileHandler(log_file_path, encoding="utf-8"), # 输出到文件
+        logging.StreamHandler(),  # 输出到控制台
+    ]
+
+    listener: logging.handlers.QueueListener | None = None
+    if use_queue:
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # 进程退出前停止监听器，确保队列中剩余的日志全部写出
+        atexit.register(listener.stop)
+        handlers = [_DeferredQueueHandler(log_queue)]
+
     # 配置日志
     logging.basicConfig(
         level=log_level, # 设置最低日志级别
         # 定义日志格式
-        format="%(asctime)s - %(levelname)s - [%(name)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        # 指定日志处理器
-        handlers=[
-            logging.FileHandler(log_file_path, encoding="utf-8"), # 输出到文件
-            logging.StreamHandler(),  # 输出到控制台
-        ],
+        format=LOG_FORMAT,
+        datefmt=LOG_DATE_FORMAT,
+        handlers=handlers,
     )
 
     logging.info("logging system is running, and the log files are located in: %s",
                  os.path.join(os.getcwd(), log_file_path))
+    return listener
+
+
+def init_worker_logging(log_queue, log_level: int) -> None:
+    """
+    工作进程初始化：日志记录经由队列交给主进程统一写出
+    Args:
+        log_queue: 跨进程日志队列
+        log_level: 最低日志级别
+
+    Returns:
+        None
+    """
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(log_level)
+
+
+@contextmanager
+def worker_logging() -> Iterator[tuple[Callable, tuple]]:
+    """
+    在主进程中接收工作进程的日志记录，并交给根日志记录器当前的处理器写出
+    （队列模式下工作进程无法访问主进程的内存队列，不转发时其日志会全部丢失）
+    Returns:
+        (initializer, initargs)，传给 ProcessPoolExecutor 的同名参数
+    """
+    # multiprocessing 仅在使用进程池时导入，不影响 CLI 启动耗时
+    import multiprocessing
+
+    root = logging.getLogger()
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *root.handlers)
+    listener.start()
+    try:
+        yield init_worker_logging, (log_queue, root.getEffectiveLevel())
+    finally:
+        listener.stop()
@@ -1,69 +1,590 @@
 import os
 import logging
+import threading
+from collections.abc import Collection, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from .duplicates import DuplicateDetector
 from .invoice import Invoice
+from .manifest import Manifest
+from .metrics import Metrics
 from .parser import FilenameParser
+from .pipeline import (
+    PipelineStats, chunked, fan_out, flatten, iter_pdf_filenames, parse_stage, stage_resources_stage, validate_stage,
+)
+from .sharding import ShardedReportGenerator
+from .sources import DirectorySource, InvoiceSource, ZipSource, open_source
+from .staging import ResourceStager
 from .validator import Validator
-from .generators.excel_generator import ExcelGenerator
+from .generators import DEFAULT_FORMATS, GENERATORS, create_generator
 from .generators.latex_generator import LatexGenerator
 
 
 logger = logging.getLogger(__name__)
 
+# 异步流水线中默认同时进行的文件系统操作数量
+DEFAULT_CONCURRENCY: int = 16
 
-def process_invoices(directory: str, output_dir: str):
+# 各输出格式生成器的额外构造参数
+GENERATOR_OPTIONS: dict[str, dict] = {
+    "excel": {"streaming": True},
+}
+
+
+def generated_directories(output_dir: str) -> list[str]:
     """
-    处理指定目录下的所有发票文件
+    递归扫描时需要跳过的目录：输出目录本身，以及其中放置的资源文件（含优化后的截图）和 LaTeX 片段
+    输出目录与发票目录相同时，排除输出目录本身不会跳过任何子目录，因此需单独列出这些子目录
+    Args:
+        output_dir: 输出目录
+
+    Returns:
+        目录路径列表
+    """
+    return [
+        output_dir,
+        os.path.join(output_dir, ResourceStager.RESOURCES_SUBDIR),
+        os.path.join(output_dir, LatexGenerator.FRAGMENT_SUBDIR),
+    ]
+
+
+def scan_directory(directory: str) -> tuple[list[os.DirEntry], list[str]]:
+    """
+    扫描目录一次，分别收集发票 PDF 文件和截图文件
     Args:
         directory: 发票文件存放目录
+
+    Returns:
+        (PDF 文件的目录项列表, 截图文件名列表)
+    """
+    pdf_entries: list[os.DirEntry] = []
+    screenshot_filenames: list[str] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.split('.')[-1] == 'pdf':
+                pdf_entries.append(entry)
+            elif Validator.is_screenshot(entry.name) and entry.is_file():
+                screenshot_filenames.append(entry.name)
+
+    return pdf_entries, screenshot_filenames
+
+
+def generate_reports(
+        invoices: Collection[Invoice],
+        output_dir: str,
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        options: dict[str, dict] | None = None,
+        metrics: Metrics | None = None,
+) -> None:
+    """
+    根据发票列表生成所选格式的报告，只导入所选格式的生成器
+    Args:
+        invoices: 发票列表
+        output_dir: 处理结果输出目录
+        formats: 输出格式名，如 ('excel', 'latex')
+        options: 输出格式名 -> 额外的生成器构造参数，覆盖 GENERATOR_OPTIONS 中的默认值
+        metrics: 记录各生成阶段耗时的统计对象，每种格式为一个阶段
+
+    Returns:
+        None
+    """
+    metrics = metrics or Metrics()
+    for name in formats:
+        with metrics.stage(name) as stage:
+            logger.info(f"starting to generate {name} report")
+            generator_options = {**GENERATOR_OPTIONS.get(name, {}), **(options or {}).get(name, {})}
+            generator = create_generator(name, output_dir, **generator_options)
+            generator.generate(invoices)
+            logger.info(f"{name} report generated successfully")
+
+            stage.items += len(invoices)
+            output_path = os.path.join(output_dir, GENERATORS[name].filename)
+            if os.path.exists(output_path):
+                stage.bytes_written += os.path.getsize(output_path)
+
+
+def generate_sharded_reports(
+        invoices: Collection[Invoice],
+        output_dir: str,
+        shard_by: Sequence[str],
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        options: dict[str, dict] | None = None,
+        metrics: Metrics | None = None,
+) -> None:
+    """
+    按分片键生成每个分片的报告及索引工作簿，各分片在工作进程中并行生成
+    Args:
+        invoices: 发票列表
+        output_dir: 处理结果输出目录
+        shard_by: 分片键，如 ('buyer', 'month')
+        formats: 输出格式名
+        options: 输出格式名 -> 额外的生成器构造参数，覆盖 GENERATOR_OPTIONS 中的默认值
+        metrics: 记录耗时的统计对象，所有分片合为一个 'shards' 阶段
+
+    Returns:
+        None
+    """
+    metrics = metrics or Metrics()
+    generator_options = {
+        name: {**GENERATOR_OPTIONS.get(name, {}), **(options or {}).get(name, {})} for name in formats
+    }
+    with metrics.stage("shards") as stage:
+        summaries = ShardedReportGenerator(output_dir, shard_by, formats, generator_options).generate(invoices)
+        stage.items += len(invoices)
+        for filename in [ShardedReportGenerator.INDEX_FILENAME, *(f for s in summaries for f in s.files)]:
+            output_path = os.path.join(output_dir, filename)
+            if os.path.exists(output_path):
+                stage.bytes_written += os.path.getsize(output_path)
+
+
+def prepare_reports(
+        invoices: Collection[Invoice],
+        directory: str,
+        output_dir: str,
+        formats: Sequence[str],
+        optimize_images: bool = False,
+        stage_resources: bool = True,
+        latex_fragments: bool = False,
+        metrics: Metrics | None = None,
+        source: InvoiceSource | None = None,
+) -> dict[str, dict]:
+    """
+    执行报告生成前的预处理阶段（截图优化、资源文件放置），返回需要传给各生成器的额外参数
+    Args:
+        invoices: 发票列表
+        directory: 发票文件存放目录
+        output_dir: 处理结果输出目录
+        formats: 输出格式名
+        optimize_images: 是否优化截图
+        stage_resources: 是否将 LaTeX 报告引用的文件放入 <output>/resources
+        latex_fragments: 是否以每张发票一个片段文件的方式生成 LaTeX 报告
+        metrics: 记录各预处理阶段耗时的统计对象
+        source: 发票来源（如 ZIP 归档），默认为 directory 对应的本地目录
+
+    Returns:
+        输出格式名 -> 额外的生成器构造参数
+    """
+    metrics = metrics or Metrics()
+    options: dict[str, dict] = {}
+    if "latex" not in formats:
+        return options
+
+    if latex_fragments:
+        options["latex"] = {"fragments": True}
+
+    image_paths: dict[str, str] = {}
+    if optimize_images:
+        # Pillow 仅在启用截图优化时导入
+        from .image_optimizer import ImageOptimizer
+        with metrics.stage("optimize_images") as stage:
+            image_paths = ImageOptimizer(output_dir).optimize(directory, invoices)
+            stage.items += len(image_paths)
+        options.setdefault("latex", {})["image_paths"] = image_paths
+
+    if stage_resources:
+        # 已优化的截图由 LaTeX 直接引用优化后的文件，无需放入原图
+        filenames: list[str] = []
+        for inv in invoices:
+            filenames.append(inv.original_filename)
+            filenames.extend(name for name in inv.screenshot_filenames if name not in image_paths)
+        with metrics.stage("stage_resources") as stage:
+            staged = (source or DirectorySource(directory)).stage(output_dir, filenames)
+            stage.items += staged.total()
+            stage.stat_calls += 2 * staged.total()
+
+    return options
+
+
+def process_invoices(
+        directory: str,
+        output_dir: str,
+        full_rebuild: bool = False,
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        optimize_images: bool = False,
+        stage_resources: bool = True,
+        latex_fragments: bool = False,
+        detect_duplicates: bool = True,
+        recursive: bool = False,
+        shard_by: Sequence[str] = (),
+        catalog: str | None = None,
+        check_images: bool = False,
+        full_image_decode: bool = False,
+        verify_pdf: bool = False,
+        metrics: Metrics | None = None,
+) -> Manifest:
+    """
+    处理指定目录下的所有发票文件
+    默认使用输出目录中的清单跳过自上次运行以来未变化的文件
+    Args:
+        directory: 发票文件存放目录，也可以是 ZIP 归档（成员按完整路径处理，不解压到磁盘）
         output_dir: 处理结果输出目录
+        full_rebuild: 忽略已有清单，重新处理所有文件
+        formats: 输出格式名
+        optimize_images: 是否将截图缩放至打印分辨率并重新编码为 JPEG 后再写入 LaTeX 报告
+        stage_resources: 是否将 LaTeX 报告引用的发票和截图放入 <output>/resources
+        latex_fragments: 是否为每张发票写入单独的 .tex 片段，仅重写内容变化的片段
+        detect_duplicates: 是否检测发票号码或 PDF 内容重复的发票
+        recursive: 是否并行扫描所有子目录；此时文件名为相对于 directory 的路径，截图仅在发票所在目录内匹配
+        shard_by: 分片键，如 ('buyer', 'month')；非空时按分片生成报告及索引工作簿，代替单一报告
+        catalog: SQLite 发票目录数据库路径；指定时将本目录的所有发票批量写入其中
+        check_images: 是否检查截图能否被读取（读取头部和尺寸），损坏的截图从发票中移除
+        full_image_decode: 检查截图时是否完整解码
+        verify_pdf: 是否核对文件名中的发票号码和金额是否出现在 PDF 中，结果写入报告的 content mismatch 列
+        metrics: 记录各阶段（scan、parse、validate 及各输出格式）耗时与计数的统计对象
 
     Returns:
+        Manifest: 本次运行的处理清单，包含所有发票文件的解析及校验结果
 
     """
+    metrics = metrics or Metrics()
     parser = FilenameParser()
-    validator = Validator(directory)
+    validator = Validator(directory, use_index=True)
 
-    all_invoices: list[Invoice] = []
+    invoices: list[Invoice] = []
     # 数量统计
     total_invoices_count: int = 0
     parsed_invoices_count: int = 0
     skipped_invoices_count: int = 0
+    cached_invoices_count: int = 0
 
     logger.info(f"starting to process invoices in directory: {directory}")
-    for filename in os.listdir(directory):
-        if filename.split('.')[-1] == 'pdf':
-            total_invoices_count += 1
-            invoice: Invoice = parser.parse(filename)
-            if invoice:
-                parsed_invoices_count += 1
-                validated_invoice: Invoice = validator.validate(invoice)
-                all_invoices.append(validated_invoice)
-                logger.info(f"successfully parsed and validated invoice: {filename}")
-            else:
-                skipped_invoices_count += 1
-                logger.warning(f"filename '{filename}' is not in correct format, skipped")
+    with open_source(directory) as source:
+        with metrics.stage("scan") as stage:
+            if optimize_images and isinstance(source, ZipSource):
+                raise ValueError("optimize_images is not supported for ZIP sources")
+            if verify_pdf and isinstance(source, ZipSource):
+                raise ValueError("verify_pdf is not supported for ZIP sources")
+            pdf_files, screenshot_filenames = source.list_files(recursive, exclude=generated_directories(output_dir))
+            filenames: list[str] = [file.name for file in pdf_files]
+            # 索引键包含目录前缀，因此截图匹配限定在发票所在目录内
+            validator.load_index(screenshot_filenames)
+
+            previous = None if full_rebuild else Manifest.load(output_dir, directory)
+            manifest = Manifest(output_dir, directory)
+            manifest.screenshots = sorted(screenshot_filenames)
+            manifest.options = {
+                "formats": list(formats),
+                "optimize_images": optimize_images,
+                "stage_resources": stage_resources,
+                "latex_fragments": latex_fragments,
+                "detect_duplicates": detect_duplicates,
+                "check_images": check_images,
+                "full_image_decode": full_image_decode,
+                "verify_pdf": verify_pdf,
+                "shard_by": list(shard_by),
+            }
+            # 报告选项变化时，即使所有输入都未变化也需重新生成报告
+            options_changed: bool = previous is None or previous.options != manifest.options
+            # 截图增删会改变匹配结果，此时缓存的解析结果仍可复用，但需重新匹配截图
+            screenshots_changed: bool = previous is None or previous.screenshots != manifest.screenshots
+
+            # 先根据清单区分未变化的文件，再批量解析新增或修改过的文件
+            cached_entries: list = [
+                previous.lookup(file.name, file.size, file.mtime_ns) if previous else None for file in pdf_files
+            ]
+            stage.items += len(pdf_files) + len(screenshot_filenames)
+            stage.stat_calls += len(pdf_files)
+
+        with metrics.stage("parse") as stage:
+            to_parse: list[str] = [file.basename for file, cached in zip(pdf_files, cached_entries) if cached is None]
+            parsed = iter(parser.parse_many(to_parse)[0])
+            stage.items += len(to_parse)
+
+        previous_screenshots: dict[str, list[str]] = {}
+        with metrics.stage("validate") as stage:
+            for file, cached in zip(pdf_files, cached_entries):
+                filename = file.name
+                total_invoices_count += 1
+
+                if cached is not None:
+                    cached_invoices_count += 1
+                    invoice = cached.invoice
+                    # 启用截图检查时重新匹配，使修复后的截图重新被检查；
+                    # 选项变化（如关闭截图检查）时重新匹配，恢复上次检查移除的截图
+                    if invoice is not None and (screenshots_changed or options_changed or check_images):
+                        previous_screenshots[filename] = list(invoice.screenshot_filenames)
+                        invoice.screenshot_filenames.clear()
+                        validator.validate(invoice)
+                        stage.items += 1
+                else:
+                    invoice = next(parsed)
+                    if invoice:
+                        # 解析时使用文件名，递归模式下需还原为相对路径
+                        invoice.original_filename = filename
+                        validator.validate(invoice)
+                        stage.items += 1
+
+                manifest.record(filename, file.size, file.mtime_ns, invoice)
+                if invoice:
+                    parsed_invoices_count += 1
+                    invoices.append(invoice)
+                    if cached is None and logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("successfully parsed and validated invoice: %s", filename)
+                else:
+                    skipped_invoices_count += 1
+            stage.stat_calls += validator.stat_calls
+        validator.log_summary()
+
+        images_changed: bool = False
+        if check_images:
+            # Pillow 仅在启用截图检查时导入
+            from .image_check import ImageIntegrityChecker
+            with metrics.stage("image_check") as stage:
+                checker = ImageIntegrityChecker(directory, output_dir, full_decode=full_image_decode, source=source)
+                checker.check(invoices)
+                stage.items += checker.checked_count
+                stage.stat_calls += checker.checked_count
+            images_changed = any(
+                inv.screenshot_filenames != previous_screenshots[inv.original_filename]
+                for inv in invoices
+                if inv.original_filename in previous_screenshots
+            )
+
+        if detect_duplicates:
+            with metrics.stage("duplicates") as stage:
+                detector = DuplicateDetector(directory, output_dir, source=source)
+                detector.detect(invoices)
+                stage.items += len(invoices)
+                stage.stat_calls += len(invoices)
+        else:
+            # 清单中缓存的发票可能带有上次检测的结果
+            for inv in invoices:
+                inv.duplicate_of = None
+
+        mismatches_changed: bool = False
+        if verify_pdf:
+            from .pdf_check import PdfContentChecker
+            with metrics.stage("pdf_check") as stage:
+                previous_mismatches = {inv.original_filename: inv.content_mismatch for inv in invoices}
+                checker = PdfContentChecker(directory, output_dir, source=source)
+                checker.check(invoices)
+                stage.items += checker.checked_count
+                stage.stat_calls += len(invoices)
+            # 首次启用核对时，未变化的文件也可能得到新的核对结果
+            mismatches_changed = any(
+                inv.content_mismatch != previous_mismatches[inv.original_filename] for inv in invoices
+            )
+        else:
+            for inv in invoices:
+                inv.content_mismatch = None
+
+        if catalog:
+            # sqlite3 仅在使用发票目录时导入
+            from .catalog import InvoiceCatalog
+            with metrics.stage("catalog") as stage, InvoiceCatalog(catalog) as invoice_catalog:
+                stage.items += invoice_catalog.upsert(directory, invoices)
+
+        logger.info(
+            f"total PDF files found: {total_invoices_count}, parsed: {parsed_invoices_count}, "
+            f"skipped: {skipped_invoices_count}"
+        )
+        logger.info(f"unchanged files reused from manifest: {cached_invoices_count}")
+
+        # 输出校验结果
+        invalid_count: int = sum(1 for inv in invoices if inv.is_valid)
+        logger.info(f"validation completed. total invoices: {invalid_count}")
+        if invalid_count > 0:
+            for inv in invoices:
+                if not inv.is_valid:
+                    logger.error(f"files '{inv.original_filename}' is invalid")
 
+        if shard_by:
+            report_filenames = [ShardedReportGenerator.INDEX_FILENAME]
+        else:
+            report_filenames = [GENERATORS[name].filename for name in formats]
+        unchanged: bool = (
+            previous is not None
+            and not screenshots_changed
+            and not options_changed
+            and not images_changed
+            and not mismatches_changed
+            and cached_invoices_count == total_invoices_count
+            and len(previous.entries) == total_invoices_count
+            and all(os.path.exists(os.path.join(output_dir, filename)) for filename in report_filenames)
+        )
+        if unchanged:
+            logger.info("no files changed since last run, skipping report generation")
+            logger.info("all processing completed")
+            return manifest
+
+        # 生成输出
+        options = prepare_reports(
+            invoices, directory, output_dir, formats, optimize_images, stage_resources, latex_fragments, metrics,
+            source,
+        )
+        if shard_by:
+            generate_sharded_reports(invoices, output_dir, shard_by, formats, options, metrics)
+        else:
+            generate_reports(invoices, output_dir, formats, options, metrics)
+
+        manifest.save()
+        logger.info("all processing completed")
+        return manifest
+
+
+def process_invoices_streaming(
+        directory: str,
+        output_dir: str,
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        stage_resources: bool = True,
+        latex_fragments: bool = False,
+        metrics: Metrics | None = None,
+) -> PipelineStats:
+    """
+    以有界内存流式处理目录：扫描 -> 批量解析 -> 校验 -> 放置资源文件 -> 同时分发给各格式的生成器
+    各阶段均为生成器，计数与合计边处理边累计，内存占用与目录大小无关
+    为保持内存有界，截图逐个探测而不建立目录索引，且不使用清单、不检测重复发票
+    Args:
+        directory: 发票文件存放目录
+        output_dir: 处理结果输出目录
+        formats: 输出格式名
+        stage_resources: 是否将 LaTeX 报告引用的发票和截图放入 <output>/resources
+        latex_fragments: 是否以每张发票一个片段文件的方式生成 LaTeX 报告
+        metrics: 记录耗时的统计对象，整个流水线为一个 'stream' 阶段
+
+    Returns:
+        PipelineStats: 本次运行的计数与合计
+    """
+    metrics = metrics or Metrics()
+    stats = PipelineStats()
+    validator = Validator(directory)
+
+    logger.info(f"starting to stream invoices in directory: {directory}")
+    with metrics.stage("stream") as stage:
+        chunks = parse_stage(chunked(iter_pdf_filenames(directory)), FilenameParser(), stats)
+        chunks = validate_stage(chunks, validator, stats)
+        if stage_resources and "latex" in formats:
+            chunks = stage_resources_stage(chunks, ResourceStager(output_dir), directory)
+
+        consumers = {}
+        for name in formats:
+            generator_options = dict(GENERATOR_OPTIONS.get(name, {}))
+            if name == "latex" and latex_fragments:
+                generator_options["fragments"] = True
+            consumers[name] = create_generator(name, output_dir, **generator_options).generate
+        fan_out(flatten(chunks), consumers)
+
+        stage.items += stats.total
+        stage.stat_calls += validator.stat_calls
+        for name in formats:
+            output_path = os.path.join(output_dir, GENERATORS[name].filename)
+            if os.path.exists(output_path):
+                stage.bytes_written += os.path.getsize(output_path)
+    validator.log_summary()
+
+    logger.info(f"total PDF files found: {stats.total}, parsed: {stats.parsed}, skipped: {stats.skipped}")
     logger.info(
-        f"total PDF files found: {total_invoices_count}, parsed: {parsed_invoices_count}, skipped: {skipped_invoices_count}"
+        f"validation completed. valid: {stats.valid}, invalid: {stats.invalid}, total amount: {stats.total_amount:.2f}"
     )
+    logger.info("all processing completed")
+    return stats
+
+
+async def process_invoices_async(
+        directory: str,
+        output_dir: str,
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        stage_resources: bool = True,
+        latex_fragments: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        metrics: Metrics | None = None,
+) -> PipelineStats:
+    """
+    process_invoices 的异步版本，适用于每次 stat/写入都需要一次网络往返的目录（如 NFS）
+    扫描、截图探测、资源文件放置和各格式报告的写入均通过容量为 concurrency 的线程池执行，
+    多张发票的截图探测同时进行；结果始终按文件名顺序输出，与并发度无关
+    不使用清单、不检测重复发票
+    Args:
+        directory: 发票文件存放目录
+        output_dir: 处理结果输出目录
+        formats: 输出格式名
+        stage_resources: 是否将 LaTeX 报告引用的发票和截图放入 <output>/resources
+        latex_fragments: 是否以每张发票一个片段文件的方式生成 LaTeX 报告
+        concurrency: 同时进行的文件系统操作数量上限
+        metrics: 记录各阶段耗时的统计对象
+
+    Returns:
+        PipelineStats: 本次运行的计数与合计
+    """
+    # asyncio 仅在使用异步流水线时导入，不影响 CLI 启动耗时
+    import asyncio
+
+    metrics = metrics or Metrics()
+    stats = PipelineStats()
+    loop = asyncio.get_running_loop()
+
+    # Validator 的计数不是线程安全的，每个工作线程使用各自的实例，结束后汇总
+    validators: list[Validator] = []
+    local = threading.local()
+
+    def validate(invoice: Invoice) -> Invoice:
+        validator = getattr(local, "validator", None)
+        if validator is None:
+            validator = local.validator = Validator(directory)
+            validators.append(validator)
+        return validator.validate(invoice)
+
+    logger.info(f"starting to process invoices in directory: {directory} with concurrency {concurrency}")
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        with metrics.stage("scan") as stage:
+            pdf_entries, _ = await loop.run_in_executor(executor, scan_directory, directory)
+            filenames = sorted(entry.name for entry in pdf_entries)
+            stage.items += len(filenames)
 
-    # 输出校验结果
-    invalid_count: int = sum(1 for inv in all_invoices if inv.is_valid)
-    logger.info(f"validation completed. total invoices: {invalid_count}")
-    if invalid_count > 0:
-        for inv in all_invoices:
-            if not inv.is_valid:
-                logger.error(f"files '{inv.original_filename}' is invalid")
-
-    # 生成输出
-    logger.info("starting to generate excel report")
-    excel_gen = ExcelGenerator(output_dir)
-    excel_gen.generate(all_invoices)
-    logger.info("excel report generated successfully")
-
-    logger.info("starting to generate LaTeX report")
-    latex_gen = LatexGenerator(output_dir)
-    latex_gen.generate(all_invoices)
-    logger.info("LaTeX report generated successfully")
+        with metrics.stage("parse") as stage:
+            parsed = FilenameParser().parse_many(filenames)[0]
+            invoices = [inv for inv in parsed if inv is not None]
+            stats.total, stats.parsed = len(filenames), len(invoices)
+            stats.skipped = stats.total - stats.parsed
+            stage.items += len(filenames)
 
+        with metrics.stage("validate") as stage:
+            # 分批提交，限制同时挂起的 future 数量；gather 按提交顺序返回结果
+            for chunk in chunked(invoices):
+                await asyncio.gather(*(loop.run_in_executor(executor, validate, inv) for inv in chunk))
+            for inv in invoices:
+                stats.total_amount += inv.amount
+                if inv.is_valid:
+                    stats.valid += 1
+                else:
+                    stats.invalid += 1
+                    logger.error(f"files '{inv.original_filename}' is invalid")
+            stage.items += len(invoices)
+            stage.stat_calls += sum(validator.stat_calls for validator in validators)
+
+        summary = Validator(directory)
+        for validator in validators:
+            summary.validated_count += validator.validated_count
+            summary.invalid_count += validator.invalid_count
+            summary.screenshots_found += validator.screenshots_found
+        summary.log_summary()
+
+        if stage_resources and "latex" in formats:
+            with metrics.stage("stage_resources") as stage:
+                resources: list[str] = []
+                for inv in invoices:
+                    resources.append(inv.original_filename)
+                    resources.extend(inv.screenshot_filenames)
+                staged = ResourceStager(output_dir, max_workers=concurrency).stage(directory, resources)
+                stage.items += staged.total()
+
+        # 各格式的报告同时写出
+        with metrics.stage("reports") as stage:
+            generators = []
+            for name in formats:
+                generator_options = dict(GENERATOR_OPTIONS.get(name, {}))
+                if name == "latex" and latex_fragments:
+                    generator_options["fragments"] = True
+                generators.append(create_generator(name, output_dir, **generator_options))
+            await asyncio.gather(*(loop.run_in_executor(executor, g.generate, invoices) for g in generators))
+            stage.items += len(invoices) * len(generators)
+            for name in formats:
+                output_path = os.path.join(output_dir, GENERATORS[name].filename)
+                if os.path.exists(output_path):
+                    stage.bytes_written += os.path.getsize(output_path)
+
+    logger.info(f"total PDF files found: {stats.total}, parsed: {stats.parsed}, skipped: {stats.skipped}")
+    logger.info(
+        f"validation completed. valid: {stats.valid}, invalid: {stats.invalid}, total amount: {stats.total_amount:.2f}"
+    )
     logger.info("all processing completed")
+    return stats
@@ -0,0 +1,135 @@
+import os
+import logging
+from dataclasses import dataclass
+from .invoice import Invoice
+from .json_cache import load_json_cache, save_json_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ManifestEntry:
+    """
+    清单中单个发票文件的缓存记录
+    """
+    size: int                                                       # 文件大小（字节）
+    mtime_ns: int                                                   # 修改时间（纳秒）
+    invoice: Invoice | None                                         # 解析结果，解析失败时为 None
+
+
+class Manifest:
+    """
+    保存在输出目录中的增量处理清单
+    以 (文件名, 大小, 修改时间) 为键缓存解析后的 Invoice 及其截图匹配结果，
+    并记录目录中的截图文件集合，截图增删时使缓存的匹配结果失效；
+    同时记录影响报告内容的处理选项，选项变化时即使输入未变化也需重新生成报告
+    """
+    FILENAME: str = ".invoice_manifest.json"
+    VERSION: int = 1
+
+    def __init__(self, output_dir: str, directory: str):
+        """
+        Args:
+            output_dir: 输出目录，清单文件保存于此
+            directory: 发票所在目录
+        """
+        self.output_dir = output_dir
+        self.directory = os.path.abspath(directory)
+        self.entries: dict[str, ManifestEntry] = {}
+        self.screenshots: list[str] = []
+        # 影响报告内容的处理选项，值须可 JSON 序列化
+        self.options: dict = {}
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.output_dir, self.FILENAME)
+
+    @classmethod
+    def load(cls, output_dir: str, directory: str) -> "Manifest | None":
+        """
+        从输出目录读取清单
+        Args:
+            output_dir: 输出目录
+            directory: 发票所在目录，与清单记录的目录不一致时视为无清单
+
+        Returns:
+            Manifest: 读取成功
+            None: 清单不存在、版本不符或已损坏
+        """
+        manifest = cls(output_dir, directory)
+        data = load_json_cache(manifest.path, description="manifest")
+        if not isinstance(data, dict):
+            logger.info(f"no usable manifest found at '{manifest.path}', processing all files")
+            return None
+
+        if data.get("version") != cls.VERSION or data.get("directory") != manifest.directory:
+            logger.info(f"manifest '{manifest.path}' is outdated, processing all files")
+            return None
+
+        try:
+            for filename, entry in data["entries"].items():
+                invoice = Invoice.from_dict(entry["invoice"]) if entry["invoice"] is not None else None
+                manifest.entries[filename] = ManifestEntry(entry["size"], entry["mtime_ns"], invoice)
+            manifest.screenshots = list(data["screenshots"])
+            manifest.options = dict(data.get("options", {}))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"manifest '{manifest.path}' is corrupted: {e}, processing all files")
+            return None
+
+        logger.info(f"loaded manifest with {len(manifest.entries)} entries from '{manifest.path}'")
+        return manifest
+
+    def save(self) -> None:
+        """
+        将清单写入输出目录（先写临时文件再替换，避免中断时留下损坏的清单）
+        Returns:
+            None
+        """
+        data = {
+            "version": self.VERSION,
+            "directory": self.directory,
+            "screenshots": self.screenshots,
+            "options": self.options,
+            "entries": {
+                filename: {
+                    "size": entry.size,
+                    "mtime_ns": entry.mtime_ns,
+                    "invoice": entry.invoice.to_dict() if entry.invoice is not None else None,
+                }
+                for filename, entry in self.entries.items()
+            },
+        }
+        if save_json_cache(self.path, data, "manifest"):
+            logger.info(f"manifest with {len(self.entries)} entries saved to '{self.path}'")
+
+    def lookup(self, filename: str, size: int, mtime_ns: int) -> ManifestEntry | None:
+        """
+        查找未发生变化的缓存记录
+        Args:
+            filename: 发票文件名
+            size: 当前文件大小
+            mtime_ns: 当前修改时间
+
+        Returns:
+            ManifestEntry: 文件未变化
+            None: 文件为新增或已修改
+        """
+        entry = self.entries.get(filename)
+        if entry is None or entry.size != size or entry.mtime_ns != mtime_ns:
+            return None
+        return entry
+
+    def record(self, filename: str, size: int, mtime_ns: int, invoice: Invoice | None) -> None:
+        """
+        记录单个发票文件的处理结果
+        Args:
+            filename: 发票文件名
+            size: 文件大小
+            mtime_ns: 修改时间
+            invoice: 解析及校验后的 Invoice，解析失败时为 None
+
+        Returns:
+            None
+        """
+        self.entries[filename] = ManifestEntry(size, mtime_ns, invoice)
@@ -0,0 +1,89 @@
+import json
+import time
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageMetrics:
+    """
+    单个处理阶段的统计数据，同名阶段多次执行时累加
+    """
+    name: str                                                       # 阶段名
+    wall_seconds: float = 0.0                                       # 墙钟耗时（秒）
+    cpu_seconds: float = 0.0                                        # 进程 CPU 耗时（秒）
+    items: int = 0                                                  # 处理的条目数
+    stat_calls: int = 0                                             # stat 调用次数
+    bytes_written: int = 0                                          # 写入的字节数
+    calls: int = 0                                                  # 执行次数
+
+
+class Metrics:
+    """
+    记录处理流水线各阶段的耗时与计数
+    """
+    def __init__(self):
+        self.stages: dict[str, StageMetrics] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """
+        统计 with 代码块的墙钟耗时和 CPU 耗时，代码块内可通过返回的对象累加计数
+        Args:
+            name: 阶段名
+
+        Returns:
+            该阶段的 StageMetrics
+        """
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageMetrics(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds += time.perf_counter() - wall_start
+            stage.cpu_seconds += time.process_time() - cpu_start
+            stage.calls += 1
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            可 JSON 序列化的统计数据
+        """
+        return {
+            "stages": [asdict(stage) for stage in self.stages.values()],
+            "total_wall_seconds": sum(stage.wall_seconds for stage in self.stages.values()),
+            "total_cpu_seconds": sum(stage.cpu_seconds for stage in self.stages.values()),
+        }
+
+    def save_json(self, path: str) -> None:
+        """
+        将统计数据写入 JSON 文件
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            None
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        logger.info(f"metrics written to '{path}'")
+
+    def log_summary(self) -> None:
+        """
+        以日志形式输出各阶段的统计摘要
+        Returns:
+            None
+        """
+        for stage in self.stages.values():
+            logger.info(
+                f"stage '{stage.name}': wall={stage.wall_seconds:.3f}s, cpu={stage.cpu_seconds:.3f}s, "
+                f"items={stage.items}, stat_calls={stage.stat_calls}, bytes_written={stage.bytes_written}"
+            )
@@ -1,5 +1,6 @@
 import re
 import logging
+from collections.abc import Sequence
 from datetime import date
 from .invoice import Invoice
 
@@ -21,6 +22,14 @@ class FilenameParser:
         r'(?P<invoice_number>\d+)$'
     )
 
+    # parse_many 返回的拒绝原因
+    REJECT_NO_EXTENSION: str = "cannot separate extension"
+    REJECT_NOT_PDF: str = "extension is not pdf"
+    REJECT_PATTERN: str = "does not match expected pattern"
+    REJECT_DATE: str = "invalid date"
+    # 文件名达到该数量时才使用 pandas 批量解析，少量文件名逐个解析更快
+    BULK_PARSE_THRESHOLD: int = 2000
+
     def parse(self, filename: str) -> Invoice | None:
         """
         解析文件吗，提取发票信息
@@ -31,38 +40,180 @@ class FilenameParser:
             Invoice: 解析成功
             None: 解析失败
         """
+        result = self._parse(filename)
+        if isinstance(result, str):
+            logger.warning("filename rejected, %s: %s", result, filename)
+            return None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("successfully parsed invoice: date=%s, buyer=%s, amount=%s, invoice_number=%s",
+                         result.invoice_date, result.buyer, result.amount, result.invoice_number)
+        return result
+
+    def _parse(self, filename: str) -> Invoice | str:
+        """
+        解析单个文件名，不记录日志
+        Args:
+            filename: 发票文件名（包含扩展名）
+
+        Returns:
+            解析成功时为 Invoice，失败时为拒绝原因
+        """
         # 去掉扩展名
         try:
             name, extension = filename.strip().rsplit('.', 1)
         except ValueError:
-            logger.error(f"invalid filename format, cannot separate extension: {filename}")
-            return None
+            return self.REJECT_NO_EXTENSION
         if extension != 'pdf':
-            logger.warning(f"file extension is not pdf: {extension}, filename: {filename}")
-            return None
+            return self.REJECT_NOT_PDF
 
         match = self.FILE_PATTERN.match(name)
         if not match:
-            logger.warning(f"filename does not match expected pattern: {name}")
-            return None
+            return self.REJECT_PATTERN
 
         try:
-            year = int(match.group('year'))
-            month = int(match.group('month'))
-            day = int(match.group('day'))
-            invoice_date = date(year, month, day)
-            amount = float(match.group('amount').replace('_', '.'))
-            buyer = match.group('buyer')
-            invoice_number = match.group('invoice_number')
-            logger.info(f"successfully parsed invoice: date={invoice_date}, buyer={buyer}, amount={amount}, invoice_number={invoice_number}")
-            return Invoice(
+            invoice_date = date(int(match.group('year')), int(match.group('month')), int(match.group('day')))
+        except ValueError:
+            return self.REJECT_DATE
+        return Invoice(
+            invoice_date=invoice_date,
+            invoice_number=match.group('invoice_number'),
+            amount=float(match.group('amount').replace('_', '.')),
+            buyer=match.group('buyer'),
+            original_filename=filename,
+            screenshot_filenames=[],
+        )
+
+    def parse_many(self, filenames: Sequence[str]) -> tuple[list[Invoice | None], dict[str, str]]:
+        """
+        批量解析文件名，结果与逐个调用 parse 一致，被拒绝的文件名汇总为一条日志
+        文件名不少于 BULK_PARSE_THRESHOLD 个时使用 pandas 向量化解析，否则逐个解析，
+        避免监视模式等小批量场景导入 pandas 和 numpy
+        Args:
+            filenames: 发票文件名（包含扩展名）列表
+
+        Returns:
+            (与 filenames 一一对应的 Invoice 或 None, 被拒绝的文件名 -> 拒绝原因)
+        """
+        if not filenames:
+            return [], {}
+
+        if len(filenames) < self.BULK_PARSE_THRESHOLD:
+            invoices: list[Invoice | None] = []
+            rejections: dict[str, str] = {}
+            for filename in filenames:
+                result = self._parse(filename)
+                if isinstance(result, str):
+                    invoices.append(None)
+                    rejections[filename] = result
+                else:
+                    invoices.append(result)
+        else:
+            invoices, rejections = self._parse_vectorized(filenames)
+
+        logger.info(
+            f"bulk parsed {len(filenames)} filenames: {len(filenames) - len(rejections)} parsed, "
+            f"{len(rejections)} rejected"
+        )
+        if rejections:
+            grouped: dict[str, list[str]] = {}
+            for filename, reason in rejections.items():
+                grouped.setdefault(reason, []).append(filename)
+            logger.warning(
+                "rejected filenames: " + "; ".join(
+                    f"{reason} ({len(group)}): {', '.join(group)}" for reason, group in grouped.items()
+                )
+            )
+
+        return invoices, rejections
+
+    def _parse_vectorized(self, filenames: Sequence[str]) -> tuple[list[Invoice | None], dict[str, str]]:
+        """
+        使用 pandas 的 str.extract 一次性匹配 FILE_PATTERN，日期和金额以向量化方式转换
+        Args:
+            filenames: 发票文件名（包含扩展名）列表，非空
+
+        Returns:
+            (与 filenames 一一对应的 Invoice 或 None, 被拒绝的文件名 -> 拒绝原因)
+        """
+        # pandas 导入开销较大，仅在文件名足够多时导入
+        import numpy as np
+        import pandas as pd
+
+        names = pd.Series(list(filenames), dtype=object)
+        parts = names.str.strip().str.rsplit('.', n=1, expand=True)
+        if parts.shape[1] < 2:
+            parts[1] = None
+        stem, extension = parts[0], parts[1]
+
+        no_extension = extension.isna().to_numpy()
+        not_pdf = ~no_extension & (extension != 'pdf').to_numpy()
+        candidates = ~(no_extension | not_pdf)
+
+        fields = stem[candidates].str.extract(self.FILE_PATTERN)
+        matched = fields['year'].notna().to_numpy()
+        fields = fields[matched]
+
+        year = fields['year'].astype(np.int64).to_numpy()
+        month = fields['month'].astype(np.int64).to_numpy()
+        day = fields['day'].astype(np.int64).to_numpy()
+        valid_date = self._valid_dates(year, month, day)
+
+        # 只转换日期合法的行；datetime64 经 astype(object) 得到 datetime.date
+        year, month, day = year[valid_date], month[valid_date], day[valid_date]
+        dates = (
+            (year - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+            + (month - 1).astype('timedelta64[M]')
+        ).astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+        fields = fields[valid_date]
+        amounts = fields['amount'].str.replace('_', '.', regex=False).astype(np.float64).to_numpy()
+
+        invoices: list[Invoice | None] = [None] * len(names)
+        positions = np.flatnonzero(candidates)[matched][valid_date]
+        for position, invoice_date, amount, buyer, invoice_number in zip(
+                positions.tolist(),
+                dates.astype(object).tolist(),
+                amounts.tolist(),
+                fields['buyer'].tolist(),
+                fields['invoice_number'].tolist(),
+        ):
+            invoices[position] = Invoice(
                 invoice_date=invoice_date,
                 invoice_number=invoice_number,
                 amount=amount,
                 buyer=buyer,
-                original_filename=filename,
+                original_filename=names.iat[position],
                 screenshot_filenames=[],
             )
-        except (ValueError, IndexError) as e:
-            logger.error(f"error parsing invoice information: {e}, filename={filename}")
-            return None
+
+        reasons = np.full(len(names), None, dtype=object)
+        reasons[no_extension] = self.REJECT_NO_EXTENSION
+        reasons[not_pdf] = self.REJECT_NOT_PDF
+        candidate_positions = np.flatnonzero(candidates)
+        reasons[candidate_positions[~matched]] = self.REJECT_PATTERN
+        reasons[candidate_positions[matched][~valid_date]] = self.REJECT_DATE
+        rejections: dict[str, str] = {
+            names.iat[position]: reasons[position] for position in np.flatnonzero(pd.notna(reasons)).tolist()
+        }
+
+        return invoices, rejections
+
+    @staticmethod
+    def _valid_dates(year, month, day):
+        """
+        向量化地判断年月日能否构成合法的 datetime.date
+        Args:
+            year: 年份数组
+            month: 月份数组
+            day: 日数组
+
+        Returns:
+            布尔数组
+        """
+        import numpy as np
+
+        days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+        valid_month = (month >= 1) & (month <= 12)
+        leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+        max_day = days_in_month[np.where(valid_month, month, 1) - 1] + ((month == 2) & leap)
+
+        return (year >= 1) & valid_month & (day >= 1) & (day <= max_day)
@@ -0,0 +1,182 @@
+import os
+import re
+import mmap
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from .invoice import Invoice
+from .json_cache import load_json_cache, save_json_cache
+from .sources import DirectorySource, InvoiceSource
+
+
+logger = logging.getLogger(__name__)
+
+# 流数据的起始位置：'stream' 关键字及其后的换行（排除 'endstream'）
+_STREAM_START = re.compile(rb"(?<!end)stream\r?\n")
+
+
+def amount_needles(amount: float) -> tuple[bytes, ...]:
+    """
+    Args:
+        amount: 发票金额
+
+    Returns:
+        PDF 中可能出现的金额写法，如 b'1234.50' 和 b'1,234.50'
+    """
+    return tuple(dict.fromkeys((f"{amount:.2f}".encode(), f"{amount:,.2f}".encode())))
+
+
+def searchable_ranges(mm: mmap.mmap) -> list[tuple[int, int]]:
+    """
+    找出 PDF 中可直接搜索的区间：未压缩的流和流之外的对象（含 /Info 等元数据字典），
+    字典中带有 /Filter 的（压缩）流被跳过
+    Args:
+        mm: 映射整个 PDF 文件的 mmap
+
+    Returns:
+        按位置排序的 [起始, 结束) 区间
+    """
+    ranges: list[tuple[int, int]] = []
+    pos = 0
+    # re 直接在 mmap 上搜索，不把文件内容复制为 bytes
+    for match in _STREAM_START.finditer(mm):
+        if match.start() < pos:
+            continue
+        data_start = match.end()
+        data_end = mm.find(b"endstream", data_start)
+        if data_end == -1:
+            data_end = len(mm)
+        # 流字典位于上一个对象结束与 'stream' 关键字之间
+        if mm.find(b"/Filter", pos, match.start()) == -1:
+            ranges.append((pos, data_end))
+        else:
+            ranges.append((pos, match.start()))
+        pos = data_end
+    ranges.append((pos, len(mm)))
+    return ranges
+
+
+def _scan_pdf(task: tuple[str, bytes, tuple[bytes, ...]]) -> str | None:
+    """
+    在工作进程中通过 mmap 检查单个 PDF 是否包含发票号码和金额
+    Args:
+        task: (PDF 路径, 发票号码, 金额的各种写法)
+
+    Returns:
+        不一致的字段（如 'invoice number, amount'），全部找到时为 None，无法读取时为 'unreadable'
+    """
+    path, number, amounts = task
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return "unreadable"
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = searchable_ranges(mm)
+
+                def contains(needle: bytes) -> bool:
+                    return any(mm.find(needle, start, end) != -1 for start, end in ranges)
+
+                missing = []
+                if not contains(number):
+                    missing.append("invoice number")
+                if not any(contains(needle) for needle in amounts):
+                    missing.append("amount")
+    except (OSError, ValueError):
+        return "unreadable"
+    return ", ".join(missing) or None
+
+
+class PdfContentChecker:
+    """
+    核对文件名中手工输入的发票号码和金额是否出现在 PDF 中，发现录入错误
+    每个 PDF 通过 mmap 映射，只搜索未压缩的流和元数据，不把整个文件读入 Python bytes 对象；
+    核对在进程池中进行，结果以 (路径, 大小, 修改时间) 为键缓存在输出目录中，缓存只保留本次核对的发票
+    """
+    CACHE_FILENAME: str = ".pdf_checks.json"
+
+    def __init__(
+            self,
+            directory: str,
+            output_dir: str,
+            max_workers: int | None = None,
+            source: InvoiceSource | None = None,
+    ):
+        """
+        Args:
+            directory: 发票文件存放目录
+            output_dir: 输出目录，核对结果缓存保存于此
+            max_workers: 进程池大小，默认由 ProcessPoolExecutor 决定
+            source: 发票来源，默认为 directory 对应的本地目录；ZIP 归档中的成员无法映射，不支持
+
+        Raises:
+            ValueError: source 不是本地目录
+        """
+        self.source = source or DirectorySource(directory)
+        if not isinstance(self.source, DirectorySource):
+            raise ValueError("PDF content check is only supported for directory sources")
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.cache_path = os.path.join(output_dir, self.CACHE_FILENAME)
+        # 绝对路径 -> (大小, 修改时间, 发票号码, 金额, 不一致的字段)
+        self._cache: dict[str, tuple[int, int, str, float, str | None]] = {}
+        self.checked_count: int = 0
+
+    def check(self, invoices: Iterable[Invoice]) -> int:
+        """
+        核对所有发票，并设置 content_mismatch
+        Args:
+            invoices: 发票列表，content_mismatch 会被重新计算
+
+        Returns:
+            存在不一致的发票数量
+        """
+        invoices = list(invoices)
+        self._load_cache()
+
+        to_check: list[tuple[Invoice, str, tuple[int, int]]] = []
+        for inv in invoices:
+            inv.content_mismatch = None
+            try:
+                stat = self.source.stat(inv.original_filename)
+            except OSError as e:
+                logger.warning(f"cannot stat invoice '{inv.original_filename}' for content check: {e}")
+                inv.content_mismatch = "unreadable"
+                continue
+            path = self.source.cache_key(inv.original_filename)
+            cached = self._cache.get(path)
+            # 文件名被更正后，即使 PDF 未变化也需重新核对
+            if cached is not None and cached[:4] == (*stat, inv.invoice_number, inv.amount):
+                inv.content_mismatch = cached[4]
+            else:
+                to_check.append((inv, path, stat))
+
+        if to_check:
+            tasks = [(path, inv.invoice_number.encode(), amount_needles(inv.amount)) for inv, path, _ in to_check]
+            # 每个工作进程分到若干批，减少大量小文件时的进程间通信次数
+            chunksize = max(1, len(tasks) // (4 * (self.max_workers or os.cpu_count() or 1)))
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                for (inv, path, stat), mismatch in zip(to_check, executor.map(_scan_pdf, tasks, chunksize=chunksize)):
+                    inv.content_mismatch = mismatch
+                    self._cache[path] = (*stat, inv.invoice_number, inv.amount, mismatch)
+            self.checked_count += len(to_check)
+        # 已删除的发票的缓存条目被删除
+        live = {self.source.cache_key(inv.original_filename) for inv in invoices}
+        self._cache = {path: value for path, value in self._cache.items() if path in live}
+        self._save_cache()
+
+        mismatched = [inv for inv in invoices if inv.content_mismatch is not None]
+        for inv in mismatched:
+            logger.warning(f"invoice '{inv.original_filename}' does not match its PDF content: {inv.content_mismatch}")
+        logger.info(
+            f"pdf content check finished: {len(invoices)} invoices, {self.checked_count} checked, "
+            f"{len(mismatched)} mismatched"
+        )
+        return len(mismatched)
+
+    def _load_cache(self) -> None:
+        self._cache = load_json_cache(
+            self.cache_path, lambda data: {path: tuple(value) for path, value in data.items()}, "pdf check cache"
+        ) or {}
+
+    def _save_cache(self) -> None:
+        save_json_cache(self.cache_path, self._cache, "pdf check cache")
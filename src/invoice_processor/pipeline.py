@@ -0,0 +1,236 @@
+import os
+import queue
+import logging
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from .invoice import Invoice
+from .parser import FilenameParser
+from .staging import ResourceStager
+from .validator import Validator
+
+
+logger = logging.getLogger(__name__)
+
+# 每批解析的文件数量，决定流水线中同时驻留的发票数量上限
+CHUNK_SIZE: int = 4096
+# 每个消费者队列的容量，生产者在队列已满时阻塞，限制最快与最慢的消费者之间的差距
+QUEUE_SIZE: int = 1024
+
+# 队列结束标记
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """
+    流式处理过程中边处理边累计的计数与合计
+    """
+    total: int = 0                                                  # 找到的 PDF 文件数量
+    parsed: int = 0                                                 # 成功解析的发票数量
+    skipped: int = 0                                                # 文件名无法解析的数量
+    valid: int = 0                                                  # 有效发票数量
+    invalid: int = 0                                                # 无效发票数量
+    total_amount: float = 0.0                                       # 所有发票的总金额
+
+
+def iter_pdf_filenames(directory: str) -> Iterator[str]:
+    """
+    惰性地逐个产出目录中的 PDF 文件名，不在内存中保存整个目录列表
+    Args:
+        directory: 发票文件存放目录
+
+    Returns:
+        PDF 文件名的迭代器
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.split('.')[-1] == 'pdf':
+                yield entry.name
+
+
+def chunked(items: Iterable, size: int | None = None) -> Iterator[list]:
+    """
+    Args:
+        items: 任意可迭代对象
+        size: 每批的最大数量，默认为 CHUNK_SIZE
+
+    Returns:
+        按顺序产出的批次列表
+    """
+    size = size or CHUNK_SIZE
+    chunk: list = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_stage(
+        filename_chunks: Iterable[list[str]],
+        parser: FilenameParser,
+        stats: PipelineStats,
+) -> Iterator[list[Invoice]]:
+    """
+    逐批解析文件名，丢弃无法解析的文件
+    Args:
+        filename_chunks: 文件名批次
+        parser: 文件名解析器
+        stats: 累计计数
+
+    Returns:
+        解析成功的发票批次
+    """
+    for filenames in filename_chunks:
+        invoices = [inv for inv in parser.parse_many(filenames)[0] if inv is not None]
+        stats.total += len(filenames)
+        stats.parsed += len(invoices)
+        stats.skipped += len(filenames) - len(invoices)
+        yield invoices
+
+
+def validate_stage(
+        invoice_chunks: Iterable[list[Invoice]],
+        validator: Validator,
+        stats: PipelineStats,
+) -> Iterator[list[Invoice]]:
+    """
+    逐批匹配截图，同时累计有效数量和总金额并记录无效文件
+    Args:
+        invoice_chunks: 发票批次
+        validator: 校验器
+        stats: 累计计数
+
+    Returns:
+        校验后的发票批次
+    """
+    for invoices in invoice_chunks:
+        for inv in invoices:
+            validator.validate(inv)
+            stats.total_amount += inv.amount
+            if inv.is_valid:
+                stats.valid += 1
+            else:
+                stats.invalid += 1
+                logger.error(f"files '{inv.original_filename}' is invalid")
+        yield invoices
+
+
+def stage_resources_stage(
+        invoice_chunks: Iterable[list[Invoice]],
+        stager: ResourceStager,
+        source_dir: str,
+) -> Iterator[list[Invoice]]:
+    """
+    逐批将发票及其截图放入 <output>/resources
+    Args:
+        invoice_chunks: 发票批次
+        stager: 资源文件放置器
+        source_dir: 发票文件存放目录
+
+    Returns:
+        原样产出的发票批次
+    """
+    for invoices in invoice_chunks:
+        filenames: list[str] = []
+        for inv in invoices:
+            filenames.append(inv.original_filename)
+            filenames.extend(inv.screenshot_filenames)
+        stager.stage(source_dir, filenames)
+        yield invoices
+
+
+def flatten(invoice_chunks: Iterable[list[Invoice]]) -> Iterator[Invoice]:
+    """
+    Args:
+        invoice_chunks: 发票批次
+
+    Returns:
+        逐张发票的迭代器
+    """
+    for invoices in invoice_chunks:
+        yield from invoices
+
+
+def fan_out(
+        invoices: Iterable[Invoice],
+        consumers: dict[str, Callable[[Iterable[Invoice]], object]],
+        queue_size: int = QUEUE_SIZE,
+) -> None:
+    """
+    将同一个发票流同时分发给多个消费者（如各格式的生成器），每个消费者在独立线程中增量消费
+    每个消费者只持有一个有界队列，整个流不会被物化
+    Args:
+        invoices: 发票流
+        consumers: 名称 -> 接收可迭代对象的消费函数（如 generator.generate）
+        queue_size: 每个消费者队列的容量
+
+    Returns:
+        None
+
+    Raises:
+        Exception: 任一消费者抛出的第一个异常，在所有消费者结束后重新抛出
+    """
+    errors: dict[str, BaseException] = {}
+    queues: list[queue.Queue] = []
+    threads: list[threading.Thread] = []
+    for name, consumer in consumers.items():
+        q: queue.Queue = queue.Queue(maxsize=queue_size)
+        thread = threading.Thread(target=_consume, args=(name, q, consumer, errors), name=f"fan-out-{name}")
+        thread.start()
+        queues.append(q)
+        threads.append(thread)
+
+    try:
+        for inv in invoices:
+            for q in queues:
+                q.put(inv)
+    finally:
+        for q in queues:
+            q.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    for name, error in errors.items():
+        raise RuntimeError(f"consumer '{name}' failed: {error}") from error
+
+
+def _consume(
+        name: str,
+        q: queue.Queue,
+        consumer: Callable[[Iterable[Invoice]], object],
+        errors: dict[str, BaseException],
+) -> None:
+    """
+    在工作线程中以迭代器形式将队列交给消费者；消费者出错或提前返回时继续清空队列，避免生产者阻塞
+    Args:
+        name: 消费者名称
+        q: 该消费者的队列
+        consumer: 消费函数
+        errors: 消费者名称 -> 异常
+
+    Returns:
+        None
+    """
+    finished = False
+
+    def items() -> Iterator[Invoice]:
+        nonlocal finished
+        while True:
+            item = q.get()
+            if item is _DONE:
+                finished = True
+                return
+            yield item
+
+    try:
+        consumer(items())
+    except BaseException as e:
+        logger.error(f"consumer '{name}' failed: {e}", exc_info=True)
+        errors[name] = e
+    finally:
+        while not finished:
+            finished = q.get() is _DONE
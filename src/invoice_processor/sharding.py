@@ -0,0 +1,216 @@
+import os
+import logging
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from .invoice import Invoice
+from .generators import GENERATORS, create_generator
+from .logging_config import worker_logging
+
+
+logger = logging.getLogger(__name__)
+
+# 可用的分片键
+SHARD_KEYS: tuple[str, ...] = ("buyer", "month")
+
+
+@dataclass
+class ShardSummary:
+    """
+    单个分片的生成结果，用于写入索引工作簿
+    """
+    name: str                                                       # 分片名，即报告文件名（不含扩展名）
+    key: dict[str, str]                                             # 分片键 -> 取值
+    count: int = 0                                                  # 发票数量
+    valid_count: int = 0                                            # 有效发票数量
+    total_amount: float = 0.0                                       # 总金额
+    files: list[str] = field(default_factory=list)                  # 实际生成的报告文件名
+
+
+def shard_key(invoice: Invoice, shard_by: Sequence[str]) -> tuple[str, ...]:
+    """
+    Args:
+        invoice: 发票信息
+        shard_by: 分片键，如 ('buyer', 'month')
+
+    Returns:
+        发票所属分片的键值
+    """
+    return tuple(invoice.buyer if key == "buyer" else invoice.invoice_date.strftime("%Y-%m") for key in shard_by)
+
+
+def shard_name(values: Sequence[str]) -> str:
+    """
+    Args:
+        values: 分片键值
+
+    Returns:
+        分片名，如 'invoices-abc-2023-10'
+    """
+    return "-".join(["invoices", *values])
+
+
+def _render_shard(task: tuple) -> ShardSummary:
+    """
+    在工作进程中生成单个分片的所有格式的报告
+    Args:
+        task: (输出目录, 分片结果, 发票列表, 输出格式名, 输出格式名 -> 生成器构造参数)
+
+    Returns:
+        填充了计数和文件名的分片结果
+    """
+    output_dir, summary, invoices, formats, options = task
+    for name in formats:
+        # 保留完整的多级扩展名，如 .csv.gz
+        filename = summary.name + GENERATORS[name].filename.removeprefix("invoices")
+        generator = create_generator(name, output_dir, **{**options.get(name, {}), "filename": filename})
+        generator.generate(invoices)
+        # 生成器出错时只记录日志，未写出的文件不列入索引
+        if os.path.isfile(os.path.join(output_dir, filename)):
+            summary.files.append(filename)
+
+    summary.count = len(invoices)
+    summary.valid_count = sum(inv.is_valid for inv in invoices)
+    summary.total_amount = sum(inv.amount for inv in invoices)
+    return summary
+
+
+class ShardedReportGenerator:
+    """
+    按购买人和/或月份将发票分片，在进程池中并行生成每个分片的报告，并写入汇总各分片的索引工作簿
+    分片报告与 invoices.tex 一样直接位于输出目录中，以保证 ./resources/ 相对路径有效
+    """
+    INDEX_FILENAME: str = "index.xlsx"
+    INDEX_COLUMNS: list[str] = ["shard", *SHARD_KEYS, "invoices", "valid", "total amount", "files"]
+
+    def __init__(
+            self,
+            output_dir: str,
+            shard_by: Sequence[str],
+            formats: Sequence[str],
+            options: dict[str, dict] | None = None,
+            max_workers: int | None = None,
+    ):
+        """
+        Args:
+            output_dir: 输出目录
+            shard_by: 分片键，取值见 SHARD_KEYS
+            formats: 每个分片生成的输出格式名
+            options: 输出格式名 -> 生成器构造参数
+            max_workers: 进程池大小，默认由 ProcessPoolExecutor 决定
+
+        Raises:
+            ValueError: 未知或重复的分片键
+        """
+        unknown = [key for key in shard_by if key not in SHARD_KEYS]
+        if unknown or not shard_by or len(set(shard_by)) != len(shard_by):
+            raise ValueError(f"invalid shard keys: {', '.join(shard_by)}, available: {', '.join(SHARD_KEYS)}")
+        self.output_dir = output_dir
+        self.shard_by = tuple(shard_by)
+        self.formats = tuple(formats)
+        self.options = options or {}
+        self.max_workers = max_workers
+
+    def partition(self, invoices: Iterable[Invoice]) -> dict[tuple[str, ...], list[Invoice]]:
+        """
+        Args:
+            invoices: 任意 Invoice 可迭代对象
+
+        Returns:
+            分片键值 -> 发票列表，按键值排序
+        """
+        shards: dict[tuple[str, ...], list[Invoice]] = {}
+        for inv in invoices:
+            shards.setdefault(shard_key(inv, self.shard_by), []).append(inv)
+        return dict(sorted(shards.items()))
+
+    def generate(self, invoices: Iterable[Invoice]) -> list[ShardSummary]:
+        """
+        生成所有分片的报告及索引工作簿
+        Args:
+            invoices: 任意 Invoice 可迭代对象
+
+        Returns:
+            各分片的生成结果，顺序与索引工作簿一致
+        """
+        shards = self.partition(invoices)
+        logger.info(f"generating {len(shards)} shards by {', '.join(self.shard_by)}")
+
+        tasks = []
+        for values, shard_invoices in shards.items():
+            summary = ShardSummary(shard_name(values), dict(zip(self.shard_by, values)))
+            tasks.append((self.output_dir, summary, shard_invoices, self.formats, self._shard_options(shard_invoices)))
+
+        summaries: list[ShardSummary] = []
+        if tasks:
+            # 生成器捕获错误后只记录日志，须把工作进程的日志转发回主进程
+            with worker_logging() as (initializer, initargs), ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=initializer, initargs=initargs,
+            ) as executor:
+                summaries = list(executor.map(_render_shard, tasks))
+
+        self.write_index(summaries)
+        return summaries
+
+    def _shard_options(self, invoices: list[Invoice]) -> dict[str, dict]:
+        """
+        只向工作进程传递与该分片相关的截图替代路径，减少序列化开销
+        Args:
+            invoices: 分片中的发票
+
+        Returns:
+            输出格式名 -> 生成器构造参数
+        """
+        latex_options = self.options.get("latex", {})
+        image_paths = latex_options.get("image_paths")
+        if not image_paths:
+            return self.options
+
+        shard_paths = {
+            name: image_paths[name]
+            for inv in invoices
+            for name in inv.screenshot_filenames
+            if name in image_paths
+        }
+        return {**self.options, "latex": {**latex_options, "image_paths": shard_paths}}
+
+    def write_index(self, summaries: Sequence[ShardSummary]) -> str:
+        """
+        写入列出所有分片及其合计的索引工作簿，最后一行为总计
+        Args:
+            summaries: 各分片的生成结果
+
+        Returns:
+            索引工作簿路径
+        """
+        # openpyxl 仅在生成索引时导入
+        from openpyxl import Workbook
+
+        output_path = os.path.join(self.output_dir, self.INDEX_FILENAME)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="shards")
+        ws.append(self.INDEX_COLUMNS)
+        for summary in summaries:
+            ws.append([
+                summary.name,
+                *(summary.key.get(key) for key in SHARD_KEYS),
+                summary.count,
+                summary.valid_count,
+                summary.total_amount,
+                ", ".join(summary.files),
+            ])
+        ws.append([
+            "total",
+            *(None for _ in SHARD_KEYS),
+            sum(summary.count for summary in summaries),
+            sum(summary.valid_count for summary in summaries),
+            sum(summary.total_amount for summary in summaries),
+            None,
+        ])
+
+        try:
+            wb.save(output_path)
+            logger.info(f"shard index with {len(summaries)} shards written to '{output_path}'")
+        except Exception as e:
+            logger.error(f"failed to write shard index '{output_path}': {e}", exc_info=True)
+        return output_path
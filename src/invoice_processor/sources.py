@@ -0,0 +1,327 @@
+import os
+import mmap
+import shutil
+import hashlib
+import logging
+import zipfile
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+from typing import BinaryIO, NamedTuple
+from .staging import ResourceStager
+from .validator import Validator
+from .walker import scan_listing, walk_directories
+
+
+logger = logging.getLogger(__name__)
+
+
+class SourceFile(NamedTuple):
+    """
+    发票来源中的单个 PDF 文件
+    """
+    name: str                                                       # 相对于来源根目录、以 '/' 分隔的路径
+    size: int                                                       # 文件大小（字节）
+    mtime_ns: int                                                   # 修改时间（纳秒）
+
+    @property
+    def basename(self) -> str:
+        """
+        Returns:
+            不含目录的文件名，用于文件名解析
+        """
+        return self.name.rsplit('/', 1)[-1]
+
+
+class InvoiceSource(ABC):
+    """
+    发票和截图的来源，process_invoices 及其后续阶段只通过该接口访问源文件
+    文件名统一为相对于来源根目录、以 '/' 分隔的路径
+    """
+    def __init__(self, location: str):
+        """
+        Args:
+            location: 来源路径（目录或归档文件），用于清单和发票目录中的标识
+        """
+        self.location = location
+
+    @abstractmethod
+    def list_files(self, recursive: bool = False, exclude: Iterable[str] = ()) -> tuple[list[SourceFile], list[str]]:
+        """
+        列出来源中的 PDF 文件和截图文件
+        Args:
+            recursive: 是否包含子目录
+            exclude: 需要跳过的目录
+
+        Returns:
+            (PDF 文件列表, 截图文件名列表)，均按相对路径排序，使报告的行顺序在多次运行间保持一致
+        """
+
+    @abstractmethod
+    def stat(self, name: str) -> tuple[int, int]:
+        """
+        Args:
+            name: 文件名
+
+        Returns:
+            (大小, 修改时间纳秒)
+
+        Raises:
+            OSError: 文件不存在或无法访问
+        """
+
+    @abstractmethod
+    def open(self, name: str) -> BinaryIO:
+        """
+        Args:
+            name: 文件名
+
+        Returns:
+            以二进制方式读取的文件对象
+        """
+
+    @abstractmethod
+    def cache_key(self, name: str) -> str:
+        """
+        Args:
+            name: 文件名
+
+        Returns:
+            跨运行稳定的唯一标识，用作哈希等缓存的键
+        """
+
+    def hash(self, name: str) -> str | None:
+        """
+        计算文件内容的 SHA-256
+        Args:
+            name: 文件名
+
+        Returns:
+            十六进制哈希值，读取失败时返回 None
+        """
+        try:
+            with self.open(name) as f:
+                return hashlib.file_digest(f, "sha256").hexdigest()
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning(f"failed to hash invoice '{self.cache_key(name)}': {e}")
+            return None
+
+    @abstractmethod
+    def stage(self, output_dir: str, filenames: Iterable[str]) -> Counter:
+        """
+        将文件放入 <output>/resources，供 LaTeX 报告引用
+        Args:
+            output_dir: 输出目录
+            filenames: 需要放入的文件名
+
+        Returns:
+            各处理方式的文件数量
+        """
+
+    def close(self) -> None:
+        """
+        释放来源占用的资源
+        """
+
+    def __enter__(self) -> "InvoiceSource":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class DirectorySource(InvoiceSource):
+    """
+    本地目录来源
+    """
+    def list_files(self, recursive: bool = False, exclude: Iterable[str] = ()) -> tuple[list[SourceFile], list[str]]:
+        if recursive:
+            # 输出目录位于发票目录内时需跳过，避免把已放置的资源文件当作发票
+            listings = list(walk_directories(self.location, exclude=exclude))
+        else:
+            listings = [scan_listing(self.location)[0]]
+
+        files: list[SourceFile] = []
+        screenshot_filenames: list[str] = []
+        for listing in listings:
+            for entry in listing.pdf_entries:
+                stat = entry.stat()
+                files.append(SourceFile(listing.relative(entry.name), stat.st_size, stat.st_mtime_ns))
+            screenshot_filenames.extend(listing.screenshot_filenames)
+        # 子目录按线程完成的顺序返回，排序后结果才是确定的
+        files.sort(key=lambda file: file.name)
+        screenshot_filenames.sort()
+        return files, screenshot_filenames
+
+    def stat(self, name: str) -> tuple[int, int]:
+        stat = os.stat(os.path.join(self.location, name))
+        return stat.st_size, stat.st_mtime_ns
+
+    def open(self, name: str) -> BinaryIO:
+        return open(os.path.join(self.location, name), "rb")
+
+    def cache_key(self, name: str) -> str:
+        return os.path.abspath(os.path.join(self.location, name))
+
+    def hash(self, name: str) -> str | None:
+        """
+        通过 mmap 计算文件的 SHA-256，不把文件内容读入 Python bytes 对象
+        """
+        path = os.path.join(self.location, name)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return hashlib.sha256().hexdigest()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return hashlib.sha256(mm).hexdigest()
+        except (OSError, ValueError) as e:
+            logger.warning(f"failed to hash invoice '{path}': {e}")
+            return None
+
+    def stage(self, output_dir: str, filenames: Iterable[str]) -> Counter:
+        return ResourceStager(output_dir).stage(self.location, filenames)
+
+
+class ZipSource(InvoiceSource):
+    """
+    ZIP 归档来源，无需解压到磁盘
+    只读取一次中央目录来列出成员并匹配截图；成员仅在需要放入 <output>/resources 时才被解压写出。
+    归档中的所有成员均以完整成员路径列出（相当于目录来源的递归模式），截图只与同一目录下的发票匹配
+    """
+    def __init__(self, location: str):
+        super().__init__(location)
+        self._zip: zipfile.ZipFile | None = None
+        self._members: dict[str, zipfile.ZipInfo] = {}
+
+    @property
+    def archive(self) -> zipfile.ZipFile:
+        """
+        首次访问时打开归档并读取中央目录
+        Returns:
+            已打开的 ZipFile
+        """
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.location)
+            self._members = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+            logger.debug(f"zip central directory read: '{self.location}', {len(self._members)} members")
+        return self._zip
+
+    def close(self) -> None:
+        """
+        关闭归档
+        """
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def _info(self, name: str) -> zipfile.ZipInfo:
+        self.archive
+        try:
+            return self._members[name]
+        except KeyError:
+            raise FileNotFoundError(f"no member '{name}' in archive '{self.location}'") from None
+
+    @staticmethod
+    def _mtime_ns(info: zipfile.ZipInfo) -> int:
+        return int(datetime(*info.date_time).timestamp()) * 1_000_000_000
+
+    def list_files(self, recursive: bool = False, exclude: Iterable[str] = ()) -> tuple[list[SourceFile], list[str]]:
+        self.archive
+        files: list[SourceFile] = []
+        screenshot_filenames: list[str] = []
+        for name, info in self._members.items():
+            if name.split('.')[-1] == 'pdf':
+                files.append(SourceFile(name, info.file_size, self._mtime_ns(info)))
+            elif Validator.is_screenshot(name):
+                screenshot_filenames.append(name)
+        files.sort(key=lambda file: file.name)
+        screenshot_filenames.sort()
+        return files, screenshot_filenames
+
+    def stat(self, name: str) -> tuple[int, int]:
+        info = self._info(name)
+        return info.file_size, self._mtime_ns(info)
+
+    def open(self, name: str) -> BinaryIO:
+        return self.archive.open(self._info(name))
+
+    def cache_key(self, name: str) -> str:
+        return f"{os.path.abspath(self.location)}!{name}"
+
+    @staticmethod
+    def _target_path(resources_dir: str, name: str) -> str:
+        """
+        与 zipfile.extract 一样拒绝绝对路径、盘符和 '..'，防止恶意归档把文件写到 resources 目录之外
+        Args:
+            resources_dir: resources 目录
+            name: 成员名
+
+        Returns:
+            成员在 resources 目录中的目标路径
+
+        Raises:
+            ValueError: 成员名不安全
+        """
+        parts = name.replace("\\", "/").split("/")
+        if name.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts:
+            raise ValueError(f"unsafe member name '{name}'")
+        target_path = os.path.join(resources_dir, *(part for part in parts if part not in ("", ".")))
+        root = os.path.realpath(resources_dir)
+        if os.path.commonpath([root, os.path.realpath(target_path)]) != root:
+            raise ValueError(f"member '{name}' resolves outside '{resources_dir}'")
+        return target_path
+
+    def stage(self, output_dir: str, filenames: Iterable[str]) -> Counter:
+        """
+        将需要的成员解压写入 <output>/resources；目标文件大小和修改时间与成员一致时跳过
+        成员名不安全（绝对路径、盘符、'..' 或经符号链接指向 resources 之外）时拒绝写入
+        """
+        resources_dir = os.path.join(output_dir, ResourceStager.RESOURCES_SUBDIR)
+        stats: Counter = Counter()
+        for name in dict.fromkeys(filenames):
+            try:
+                target_path = self._target_path(resources_dir, name)
+                size, mtime_ns = self.stat(name)
+                try:
+                    target_stat = os.stat(target_path)
+                    if target_stat.st_size == size and target_stat.st_mtime_ns == mtime_ns:
+                        stats["skipped"] += 1
+                        continue
+                except FileNotFoundError:
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+                # 先写入临时文件再替换，避免中断时留下不完整的目标文件
+                tmp_path = f"{target_path}.{os.getpid()}.tmp"
+                try:
+                    with self.open(name) as src, open(tmp_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+                    os.replace(tmp_path, target_path)
+                finally:
+                    if os.path.lexists(tmp_path):
+                        os.remove(tmp_path)
+                stats["extracted"] += 1
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                logger.error(f"failed to extract resource '{name}' from '{self.location}': {e}")
+                stats["failed"] += 1
+
+        if stats:
+            logger.info(
+                "resource staging finished: " + ", ".join(f"{method}={count}" for method, count in sorted(stats.items()))
+            )
+        return stats
+
+
+def open_source(location: str) -> InvoiceSource:
+    """
+    根据路径选择发票来源：ZIP 文件使用 ZipSource，其余视为目录
+    Args:
+        location: 目录或 ZIP 文件路径
+
+    Returns:
+        发票来源
+    """
+    if os.path.isfile(location) and zipfile.is_zipfile(location):
+        return ZipSource(location)
+    return DirectorySource(location)
@@ -0,0 +1,170 @@
+import os
+import errno
+import shutil
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+# Linux FICLONE ioctl 请求码，用于在支持的文件系统（btrfs、xfs 等）上创建 reflink
+FICLONE: int = 0x40049409
+
+
+class ResourceStager:
+    """
+    将 LaTeX 报告引用的发票和截图放入 <output>/resources
+    同一文件系统上优先使用硬链接或 reflink，否则使用 os.copy_file_range / os.sendfile 复制；
+    目标文件大小和修改时间与源文件一致时跳过
+    """
+    RESOURCES_SUBDIR: str = "resources"
+
+    def __init__(self, output_dir: str, max_workers: int | None = None):
+        """
+        Args:
+            output_dir: 报告输出目录
+            max_workers: 复制线程池大小，默认由 ThreadPoolExecutor 决定
+        """
+        self.output_dir = output_dir
+        self.resources_dir = os.path.join(output_dir, self.RESOURCES_SUBDIR)
+        self.max_workers = max_workers
+
+    def stage(self, source_dir: str, filenames: Iterable[str]) -> Counter:
+        """
+        并行地将文件放入 resources 目录
+        Args:
+            source_dir: 源文件所在目录
+            filenames: 需要放入的文件名
+
+        Returns:
+            各处理方式的文件数量，键为 'skipped'、'linked'、'reflinked'、'copied'、'failed'
+        """
+        filenames = list(dict.fromkeys(filenames))
+        stats: Counter = Counter()
+        if not filenames:
+            return stats
+
+        os.makedirs(self.resources_dir, exist_ok=True)
+        logger.info(f"staging {len(filenames)} resource files into '{self.resources_dir}'")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for method in executor.map(self._stage_file, [source_dir] * len(filenames), filenames):
+                stats[method] += 1
+
+        logger.info(
+            "resource staging finished: " + ", ".join(f"{method}={count}" for method, count in sorted(stats.items()))
+        )
+        return stats
+
+    def _stage_file(self, source_dir: str, filename: str) -> str:
+        """
+        放入单个文件
+        Args:
+            source_dir: 源文件所在目录
+            filename: 文件名
+
+        Returns:
+            处理方式：'skipped'、'linked'、'reflinked'、'copied' 或 'failed'
+        """
+        source_path = os.path.join(source_dir, filename)
+        target_path = os.path.join(self.resources_dir, filename)
+        try:
+            source_stat = os.stat(source_path)
+            try:
+                target_stat = os.stat(target_path)
+                if target_stat.st_size == source_stat.st_size and target_stat.st_mtime_ns == source_stat.st_mtime_ns:
+                    return "skipped"
+            except FileNotFoundError:
+                # 递归模式下文件名包含子目录
+                if os.path.dirname(filename):
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+            # 先写入临时文件再替换，避免中断时留下不完整的目标文件
+            tmp_path = f"{target_path}.{os.getpid()}.tmp"
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            try:
+                if self._try_link(source_path, tmp_path):
+                    method = "linked"
+                elif self._try_reflink(source_path, tmp_path):
+                    method = "reflinked"
+                else:
+                    self._copy(source_path, tmp_path, source_stat.st_size)
+                    method = "copied"
+                if method != "linked":
+                    os.utime(tmp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+                os.replace(tmp_path, target_path)
+            finally:
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+        except OSError as e:
+            logger.error(f"failed to stage resource '{source_path}': {e}")
+            return "failed"
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("staged resource '%s' (%s)", filename, method)
+        return method
+
+    @staticmethod
+    def _try_link(source_path: str, target_path: str) -> bool:
+        """
+        尝试创建硬链接，跨文件系统或文件系统不支持时返回 False
+        """
+        try:
+            os.link(source_path, target_path)
+            return True
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+                return False
+            raise
+
+    @staticmethod
+    def _try_reflink(source_path: str, target_path: str) -> bool:
+        """
+        尝试通过 FICLONE 创建 reflink（写时复制），仅在 Linux 上可用
+        """
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return True
+            except OSError:
+                pass
+        os.remove(target_path)
+        return False
+
+    @staticmethod
+    def _copy(source_path: str, target_path: str, size: int) -> None:
+        """
+        在内核中复制文件内容，依次尝试 os.copy_file_range、os.sendfile，最后回退到 shutil
+        """
+        with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+            copied = 0
+            for copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+                if copy is None:
+                    continue
+                try:
+                    os.lseek(dst.fileno(), copied, os.SEEK_SET)
+                    while copied < size:
+                        if copy is os.sendfile:
+                            n = copy(dst.fileno(), src.fileno(), copied, size - copied)
+                        else:
+                            n = copy(src.fileno(), dst.fileno(), size - copied, copied, copied)
+                        if n == 0:
+                            break
+                        copied += n
+                    if copied >= size:
+                        return
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EBADF):
+                        raise
+
+            # 内核复制不可用或中途失败时，从已复制的位置继续用户态复制
+            src.seek(copied)
+            dst.seek(copied)
+            shutil.copyfileobj(src, dst, 1 << 20)
@@ -1,5 +1,6 @@
 import os
 import logging
+from collections.abc import Iterable
 from .invoice import Invoice
 
 
@@ -10,9 +11,26 @@ class Validator:
     """
     校验发票数据的规则集
     """
-    def __init__(self, invoice_dir: str):
+    SCREENSHOT_EXTENSIONS: tuple[str, ...] = ('.jpg', '.png', '.jpeg')
+
+    def __init__(self, invoice_dir: str, use_index: bool = False):
+        """
+        Args:
+            invoice_dir: 发票和截图所在目录
+            use_index: 是否启用目录索引模式。启用后只对目录执行一次 os.scandir，
+                之后每张发票的截图匹配均在内存中完成，不再逐个 stat 文件
+        """
         self.invoice_dir = invoice_dir
-        logger.debug(f"validator initialized with directory: {self.invoice_dir}")
+        self.use_index = use_index
+        # basename -> {小写扩展名: [实际文件名, ...]}，首次使用时构建
+        self._index: dict[str, dict[str, list[str]]] | None = None
+        # 逐个探测模式下调用 os.path.exists 的次数，用于性能统计
+        self.stat_calls: int = 0
+        # 本次运行的校验统计，用于汇总日志
+        self.validated_count: int = 0
+        self.invalid_count: int = 0
+        self.screenshots_found: int = 0
+        logger.debug(f"validator initialized with directory: {self.invoice_dir}, use_index={self.use_index}")
 
     def validate(self, invoice: Invoice) -> Invoice:
         """
@@ -27,14 +45,177 @@ class Validator:
         Notes:
             需在调用前检查 invoice 不为 None
         """
-        logger.info(f"starting validation for invoice from file: '{invoice.original_filename}'")
-        self._find_screenshots(invoice)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("starting validation for invoice from file: '%s'", invoice.original_filename)
+        if self.use_index:
+            self._find_screenshots_indexed(invoice)
+        else:
+            self._find_screenshots(invoice)
 
+        self.validated_count += 1
+        self.screenshots_found += invoice.screenshot_nums
         if not invoice.is_valid:
-            logger.error(f"no screenshot found for invoice: '{invoice.original_filename}")
+            self.invalid_count += 1
+            if debug:
+                logger.debug("no screenshot found for invoice: '%s'", invoice.original_filename)
 
         return invoice
 
+    def log_summary(self) -> None:
+        """
+        输出本次运行的校验汇总，代替逐张发票的日志
+        Returns:
+            None
+        """
+        logger.info(
+            "validation summary: %d invoices validated, %d screenshots found, %d invoices without screenshot",
+            self.validated_count, self.screenshots_found, self.invalid_count,
+        )
+
+    def refresh_index(self) -> None:
+        """
+        丢弃已构建的目录索引，下一次校验时重新扫描目录
+        Returns:
+            None
+        """
+        self._index = None
+
+    def load_index(self, screenshot_filenames: Iterable[str]) -> None:
+        """
+        使用调用方已扫描得到的截图文件名建立目录索引，避免重复扫描目录
+        Args:
+            screenshot_filenames: 目录中的截图文件名
+
+        Returns:
+            None
+        """
+        self._index = self._index_filenames(screenshot_filenames)
+
+    def add_screenshot(self, filename: str) -> None:
+        """
+        向已构建的目录索引中加入一个截图文件
+        Args:
+            filename: 截图文件名
+
+        Returns:
+            None
+        """
+        if self._index is None or not self.is_screenshot(filename):
+            return
+        basename, extension = os.path.splitext(filename)
+        names = self._index.setdefault(basename, {}).setdefault(extension.lower(), [])
+        if filename not in names:
+            names.append(filename)
+            names.sort()
+
+    def remove_screenshot(self, filename: str) -> None:
+        """
+        从已构建的目录索引中移除一个截图文件
+        Args:
+            filename: 截图文件名
+
+        Returns:
+            None
+        """
+        if self._index is None:
+            return
+        basename, extension = os.path.splitext(filename)
+        by_extension = self._index.get(basename)
+        if not by_extension:
+            return
+        names = by_extension.get(extension.lower(), [])
+        if filename in names:
+            names.remove(filename)
+        if not names:
+            by_extension.pop(extension.lower(), None)
+        if not by_extension:
+            del self._index[basename]
+
+    @classmethod
+    def is_screenshot(cls, filename: str) -> bool:
+        """
+        判断文件名是否具有截图扩展名（大小写不敏感）
+        Args:
+            filename: 文件名
+
+        Returns:
+            bool
+        """
+        return os.path.splitext(filename)[1].lower() in cls.SCREENSHOT_EXTENSIONS
+
+    def _build_index(self) -> dict[str, dict[str, list[str]]]:
+        """
+        对目录执行一次 os.scandir，建立 basename 到截图文件的映射
+        扩展名按大小写不敏感的方式匹配
+        Returns:
+            basename -> {小写扩展名: [实际文件名, ...]}
+        """
+        with os.scandir(self.invoice_dir) as entries:
+            names = [entry.name for entry in entries if self.is_screenshot(entry.name) and entry.is_file()]
+
+        return self._index_filenames(names)
+
+    def _index_filenames(self, screenshot_filenames: Iterable[str]) -> dict[str, dict[str, list[str]]]:
+        """
+        建立 basename 到截图文件的映射
+        Args:
+            screenshot_filenames: 截图文件名，非截图扩展名的文件会被忽略
+
+        Returns:
+            basename -> {小写扩展名: [实际文件名, ...]}
+        """
+        index: dict[str, dict[str, list[str]]] = {}
+        count = 0
+        for name in screenshot_filenames:
+            basename, extension = os.path.splitext(name)
+            extension = extension.lower()
+            if extension not in self.SCREENSHOT_EXTENSIONS:
+                continue
+            index.setdefault(basename, {}).setdefault(extension, []).append(name)
+            count += 1
+
+        # 同一扩展名的多个大小写变体按文件名排序，保证结果稳定
+        for by_extension in index.values():
+            for names in by_extension.values():
+                names.sort()
+
+        logger.debug(f"screenshot index built for directory: {self.invoice_dir}, {count} screenshots")
+        return index
+
+    def _find_screenshots_indexed(self, invoice: Invoice) -> None:
+        """
+        基于目录索引查找截图，匹配规则及结果顺序与 _find_screenshots 一致
+        Args:
+            invoice: Invoice 对象
+
+        Returns:
+            None
+        """
+        if self._index is None:
+            self._index = self._build_index()
+
+        basename, _ = os.path.splitext(invoice.original_filename)
+
+        # 先匹配相同 basename，再依次匹配 '-1', '-2', ... 后缀，直到某一级缺失
+        candidate = basename
+        i = 0
+        while True:
+            by_extension = self._index.get(candidate)
+            if not by_extension:
+                if i > 0:
+                    break
+            else:
+                for extension in self.SCREENSHOT_EXTENSIONS:
+                    for screenshot_name in by_extension.get(extension, ()):
+                        invoice.screenshot_filenames.append(screenshot_name)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("found screenshot: '%s' for invoice: '%s'",
+                                         screenshot_name, invoice.original_filename)
+
+            i += 1
+            candidate = f"{basename}-{i}"
+
     def _find_screenshots(self, invoice: Invoice) -> None:
         """
         查找与发票对应的截图文件，并更新 invoice.screenshot_filenames 列表
@@ -47,17 +228,21 @@ class Validator:
         Returns:
 
         """
-        logger.debug(f"checking for screenshots for invoice: '{invoice.original_filename}'")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("checking for screenshots for invoice: '%s'", invoice.original_filename)
         basename, _ = os.path.splitext(invoice.original_filename)
-        possible_extensions = ['.jpg', '.png', '.jpeg']
+        possible_extensions = self.SCREENSHOT_EXTENSIONS
 
         # 1. 检查具有相同 basename 的文件
         for extension in possible_extensions:
             screenshot_name = f"{basename}{extension}"
             screenshot_path = os.path.join(self.invoice_dir, screenshot_name)
+            self.stat_calls += 1
             if os.path.exists(screenshot_path):
                 invoice.screenshot_filenames.append(screenshot_name)
-                logger.info(f"found screenshot: '{screenshot_name}' for invoice: '{invoice.original_filename}'")
+                if debug:
+                    logger.debug("found screenshot: '%s' for invoice: '%s'", screenshot_name, invoice.original_filename)
 
         # 2. 检查带有 '-1', '-2', ... 后缀的文件
         i = 1
@@ -67,13 +252,15 @@ class Validator:
             for extension in possible_extensions:
                 screenshot_name = f"{suffixed_basename}{extension}"
                 screenshot_path = os.path.join(self.invoice_dir, screenshot_name)
+                self.stat_calls += 1
                 if os.path.exists(screenshot_path):
                     invoice.screenshot_filenames.append(screenshot_name)
-                    logger.info(f"found screenshot: '{screenshot_name}' for invoice: '{invoice.original_filename}'")
+                    if debug:
+                        logger.debug("found screenshot: '%s' for invoice: '%s'",
+                                     screenshot_name, invoice.original_filename)
                     found_in_iteration = True
 
             if not found_in_iteration:
                 break
 
             i += 1
-
@@ -0,0 +1,89 @@
+import os
+import logging
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from .validator import Validator
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DirectoryListing:
+    """
+    单个目录的扫描结果，文件名均为相对于根目录、以 '/' 分隔的路径
+    """
+    path: str                                                       # 相对于根目录的路径，根目录为 ''
+    pdf_entries: list[os.DirEntry] = field(default_factory=list)    # PDF 文件的目录项
+    screenshot_filenames: list[str] = field(default_factory=list)   # 截图文件（相对路径）
+
+    def relative(self, name: str) -> str:
+        """
+        Args:
+            name: 该目录下的文件名
+
+        Returns:
+            相对于根目录的路径
+        """
+        return f"{self.path}/{name}" if self.path else name
+
+
+def scan_listing(root: str, path: str = "") -> tuple[DirectoryListing, list[str]]:
+    """
+    使用 os.scandir 扫描单个目录
+    Args:
+        root: 根目录
+        path: 相对于根目录的路径
+
+    Returns:
+        (目录扫描结果, 子目录的相对路径列表)
+    """
+    listing = DirectoryListing(path)
+    subdirectories: list[str] = []
+    with os.scandir(os.path.join(root, path) if path else root) as entries:
+        for entry in entries:
+            if entry.name.split('.')[-1] == 'pdf':
+                listing.pdf_entries.append(entry)
+            elif Validator.is_screenshot(entry.name) and entry.is_file():
+                listing.screenshot_filenames.append(listing.relative(entry.name))
+            elif entry.is_dir(follow_symlinks=False):
+                subdirectories.append(listing.relative(entry.name))
+
+    return listing, subdirectories
+
+
+def walk_directories(
+        root: str,
+        exclude: Iterable[str] = (),
+        max_workers: int | None = None,
+) -> Iterator[DirectoryListing]:
+    """
+    在线程池中并行扫描目录树，每扫描完一个目录即产出其结果
+    不跟随符号链接，避免目录环
+    Args:
+        root: 根目录
+        exclude: 需要跳过的目录（如位于根目录内的输出目录）
+        max_workers: 线程池大小，默认由 ThreadPoolExecutor 决定
+
+    Returns:
+        各目录扫描结果的迭代器，顺序取决于扫描完成的先后
+    """
+    excluded = {os.path.realpath(path) for path in exclude}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: dict[Future, str] = {executor.submit(scan_listing, root, ""): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    listing, subdirectories = future.result()
+                except OSError as e:
+                    logger.error(f"failed to scan directory '{os.path.join(root, path)}': {e}")
+                    continue
+                for subdirectory in subdirectories:
+                    if os.path.realpath(os.path.join(root, subdirectory)) in excluded:
+                        logger.debug("skipping excluded directory: %s", subdirectory)
+                        continue
+                    pending[executor.submit(scan_listing, root, subdirectory)] = subdirectory
+                yield listing
@@ -0,0 +1,235 @@
+import os
+import re
+import time
+import logging
+from collections.abc import Sequence
+from .duplicates import DuplicateDetector
+from .generators import DEFAULT_FORMATS
+from .main import generate_reports, process_invoices, prepare_reports, scan_directory
+from .manifest import Manifest
+from .parser import FilenameParser
+from .validator import Validator
+
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceWatcher:
+    """
+    轮询监视发票目录，在 PDF 或截图新增、修改、删除后增量更新发票集合并重新生成报告
+    基于 os.scandir 轮询，不依赖外部服务；一批连续写入在稳定 debounce 秒后才会被处理
+    """
+    # 截图文件名末尾的 '-1', '-2', ... 后缀
+    SUFFIX_PATTERN = re.compile(r'-\d+$')
+
+    def __init__(
+            self,
+            directory: str,
+            output_dir: str,
+            interval: float = 2.0,
+            debounce: float = 1.0,
+            formats: Sequence[str] = DEFAULT_FORMATS,
+            optimize_images: bool = False,
+            stage_resources: bool = True,
+            detect_duplicates: bool = True,
+            latex_fragments: bool = False,
+    ):
+        """
+        Args:
+            directory: 发票文件存放目录
+            output_dir: 处理结果输出目录
+            formats: 输出格式名
+            optimize_images: 是否优化截图
+            stage_resources: 是否将报告引用的文件放入 <output>/resources
+            detect_duplicates: 是否检测重复发票
+            latex_fragments: 是否以片段方式生成 LaTeX 报告
+            interval: 两次轮询之间的间隔（秒）
+            debounce: 目录内容保持不变多久（秒）后才处理变化
+        """
+        self.directory = directory
+        self.output_dir = output_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.formats = formats
+        self.optimize_images = optimize_images
+        self.stage_resources = stage_resources
+        self.detect_duplicates = detect_duplicates
+        self.latex_fragments = latex_fragments
+        self.parser = FilenameParser()
+        self.validator = Validator(directory, use_index=True)
+        self.manifest: Manifest | None = None
+
+        # 已处理的目录状态：PDF 文件名 -> (大小, 修改时间)，以及截图文件名集合
+        self._applied: tuple[dict[str, tuple[int, int]], frozenset[str]] | None = None
+        # 最近一次轮询看到的目录状态及其首次出现的时间
+        self._last_seen: tuple[dict[str, tuple[int, int]], frozenset[str]] | None = None
+        self._last_change: float = 0.0
+
+    def start(self, full_rebuild: bool = False) -> None:
+        """
+        执行首次完整处理，并以其结果作为增量更新的起点
+        Args:
+            full_rebuild: 忽略已有清单，重新处理所有文件
+
+        Returns:
+            None
+        """
+        self.manifest = process_invoices(
+            self.directory, self.output_dir, full_rebuild=full_rebuild,
+            formats=self.formats, optimize_images=self.optimize_images, stage_resources=self.stage_resources,
+            detect_duplicates=self.detect_duplicates, latex_fragments=self.latex_fragments,
+        )
+        self.validator.load_index(self.manifest.screenshots)
+        pdfs = {name: (entry.size, entry.mtime_ns) for name, entry in self.manifest.entries.items()}
+        self._applied = (pdfs, frozenset(self.manifest.screenshots))
+        self._last_seen = self._applied
+
+    def run(self, full_rebuild: bool = False) -> None:
+        """
+        持续轮询目录，直到被 Ctrl+C 中断；单次轮询出错时记录错误并继续轮询
+        Args:
+            full_rebuild: 首次处理时忽略已有清单
+
+        Returns:
+            None
+        """
+        self.start(full_rebuild=full_rebuild)
+        logger.info(f"watching directory '{self.directory}' every {self.interval}s, press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.poll()
+                except Exception as e:
+                    # 文件在扫描途中被删除、报告被其他程序锁定等暂时性错误不应终止监视；
+                    # 出错时已处理状态不会更新，下一次轮询会重新处理这些变化
+                    logger.error(f"failed to process directory changes: {e}", exc_info=True)
+        except KeyboardInterrupt:
+            logger.info("watch mode stopped")
+
+    def poll(self, now: float | None = None) -> bool:
+        """
+        执行一次轮询
+        Args:
+            now: 当前时间（time.monotonic），用于测试
+
+        Returns:
+            bool: 本次轮询是否处理了变化并重新生成了报告
+        """
+        if self._applied is None:
+            raise RuntimeError("watcher is not started, call start() first")
+        now = time.monotonic() if now is None else now
+
+        state = self._scan()
+        if state != self._last_seen:
+            self._last_seen = state
+            self._last_change = now
+        if state == self._applied:
+            return False
+        if now - self._last_change < self.debounce:
+            logger.debug("directory is still changing, waiting for writes to settle")
+            return False
+
+        self._apply(*state)
+        self._applied = state
+        return True
+
+    def _scan(self) -> tuple[dict[str, tuple[int, int]], frozenset[str]]:
+        """
+        扫描目录，返回当前的 PDF 状态和截图集合
+        Returns:
+            (PDF 文件名 -> (大小, 修改时间), 截图文件名集合)
+        """
+        pdf_entries, screenshot_filenames = scan_directory(self.directory)
+        pdfs: dict[str, tuple[int, int]] = {}
+        for entry in pdf_entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # 扫描期间被删除
+                continue
+            pdfs[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+        return pdfs, frozenset(screenshot_filenames)
+
+    def _apply(self, pdfs: dict[str, tuple[int, int]], screenshots: frozenset[str]) -> None:
+        """
+        将目录变化应用到内存中的发票集合，并重新生成报告
+        Args:
+            pdfs: 当前 PDF 文件名 -> (大小, 修改时间)
+            screenshots: 当前截图文件名集合
+
+        Returns:
+            None
+        """
+        applied_pdfs, applied_screenshots = self._applied
+        manifest = self.manifest
+
+        added_screenshots = screenshots - applied_screenshots
+        removed_screenshots = applied_screenshots - screenshots
+        for name in added_screenshots:
+            self.validator.add_screenshot(name)
+        for name in removed_screenshots:
+            self.validator.remove_screenshot(name)
+
+        removed_pdfs = applied_pdfs.keys() - pdfs.keys()
+        for name in removed_pdfs:
+            manifest.entries.pop(name, None)
+
+        updated_pdfs = [name for name, stat in pdfs.items() if applied_pdfs.get(name) != stat]
+        for name, invoice in zip(updated_pdfs, self.parser.parse_many(updated_pdfs)[0]):
+            size, mtime_ns = pdfs[name]
+            if invoice:
+                self.validator.validate(invoice)
+            manifest.record(name, size, mtime_ns, invoice)
+        updated_set = set(updated_pdfs)
+
+        # 截图增删只影响 basename 相同或带 '-N' 后缀的发票，仅重新匹配这些发票
+        revalidated = 0
+        for invoice_filename in self._affected_invoices(added_screenshots | removed_screenshots):
+            if invoice_filename in updated_set:
+                continue
+            entry = manifest.entries.get(invoice_filename)
+            if entry is None or entry.invoice is None:
+                continue
+            entry.invoice.screenshot_filenames.clear()
+            self.validator.validate(entry.invoice)
+            revalidated += 1
+
+        logger.info(
+            f"changes detected: {len(updated_pdfs)} PDFs added or changed, {len(removed_pdfs)} removed, "
+            f"{len(added_screenshots)} screenshots added, {len(removed_screenshots)} removed, "
+            f"{revalidated} invoices re-matched"
+        )
+
+        invoices = [entry.invoice for entry in manifest.entries.values() if entry.invoice is not None]
+        if self.detect_duplicates:
+            DuplicateDetector(self.directory, self.output_dir).detect(invoices)
+        options = prepare_reports(
+            invoices, self.directory, self.output_dir, self.formats, self.optimize_images, self.stage_resources,
+            self.latex_fragments,
+        )
+        generate_reports(invoices, self.output_dir, self.formats, options)
+        manifest.screenshots = sorted(screenshots)
+        manifest.save()
+
+    def _affected_invoices(self, screenshot_filenames: set[str] | frozenset[str]) -> set[str]:
+        """
+        计算截图变化可能影响的发票文件名
+        Args:
+            screenshot_filenames: 新增或删除的截图文件名
+
+        Returns:
+            可能受影响的发票文件名集合
+        """
+        affected: set[str] = set()
+        for name in screenshot_filenames:
+            basename, _ = os.path.splitext(name)
+            while True:
+                affected.add(f"{basename}.pdf")
+                stripped = self.SUFFIX_PATTERN.sub('', basename)
+                if stripped == basename:
+                    break
+                basename = stripped
+
+        return affected
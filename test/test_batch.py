@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from invoice_processor.batch import BatchRunner, read_directory_list
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+
+
+@pytest.fixture
+def employee_dirs(tmp_path):
+    """
+    两个员工目录，各包含一张发票，其中一个有截图
+    """
+    dirs = []
+    for name, screenshot in (("alice", True), ("bob", False)):
+        directory = tmp_path / "in" / name
+        directory.mkdir(parents=True)
+        (directory / INVOICE).write_bytes(b"%PDF")
+        if screenshot:
+            (directory / INVOICE.replace(".pdf", ".png")).write_bytes(b"png")
+        dirs.append(str(directory))
+    return dirs
+
+
+def test_batch_writes_outputs_summary_and_checkpoint(tmp_path, employee_dirs):
+    """
+    测试批量处理为每个目录生成报告，并写入汇总工作簿和检查点
+    Args:
+        tmp_path:
+        employee_dirs:
+
+    Returns:
+
+    """
+    output_root = str(tmp_path / "out")
+    results = BatchRunner(output_root, max_workers=2).run(employee_dirs)
+
+    assert [result["status"] for result in results.values()] == ["done", "done"]
+    for name in ("alice", "bob"):
+        assert os.path.exists(os.path.join(output_root, name, "invoices.xlsx"))
+
+    rows = list(load_workbook(os.path.join(output_root, "summary.xlsx")).active.iter_rows(values_only=True))
+    assert rows[1][2:6] == ("done", 1, 1, 1)
+    assert rows[2][2:6] == ("done", 1, 1, 0)
+    assert rows[-1][0] == "total" and rows[-1][7] == 100.0
+
+    with open(os.path.join(output_root, BatchRunner.CHECKPOINT_FILENAME), encoding="utf-8") as f:
+        assert sorted(json.load(f)["directories"]) == sorted(employee_dirs)
+
+
+def test_batch_resume_skips_completed(tmp_path, employee_dirs):
+    """
+    测试重新运行时跳过检查点中已完成的目录
+    Args:
+        tmp_path:
+        employee_dirs:
+
+    Returns:
+
+    """
+    output_root = str(tmp_path / "out")
+    BatchRunner(output_root, max_workers=1).run(employee_dirs[:1])
+    report = os.path.join(output_root, "alice", "invoices.xlsx")
+    mtime = os.stat(report).st_mtime_ns
+
+    results = BatchRunner(output_root, max_workers=1).run(employee_dirs)
+    assert os.stat(report).st_mtime_ns == mtime
+    assert os.path.exists(os.path.join(output_root, "bob", "invoices.xlsx"))
+    assert len(results) == 2
+
+
+def test_output_dirs_and_list_file(tmp_path):
+    """
+    测试重名目录分配不同的输出子目录，列表文件忽略空行和注释
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    list_file = tmp_path / "dirs.txt"
+    list_file.write_text("# employees\n/a/x\n\n/b/x\n/a/x\n", encoding="utf-8")
+    directories = read_directory_list(str(list_file))
+    assert directories == ["/a/x", "/b/x", "/a/x"]
+
+    outputs = BatchRunner("out").output_dirs(directories)
+    assert list(outputs.values()) == [os.path.join("out", "x"), os.path.join("out", "x-2")]
@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import date
+
+import pytest
+from click.testing import CliRunner
+
+from invoice_processor.catalog import InvoiceCatalog
+from invoice_processor.cli import main
+from invoice_processor.invoice import Invoice
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with InvoiceCatalog(str(tmp_path / "catalog.db")) as invoice_catalog:
+        yield invoice_catalog
+
+
+def _invoices():
+    return [
+        Invoice(date(2023, 7, 5), "1", 10.0, "alice", "a1.pdf", ["a1.png", "a1-1.png"]),
+        Invoice(date(2023, 8, 1), "2", 200.0, "alice", "a2.pdf"),
+        Invoice(date(2023, 10, 1), "3", 30.0, "bob", "b1.pdf", ["b1.jpg"], duplicate_of="a1.pdf"),
+    ]
+
+
+def test_upsert_and_query(tmp_path, catalog):
+    """
+    测试批量写入后按购买人、日期和金额查询，截图按原顺序返回
+    Args:
+        tmp_path:
+        catalog:
+
+    Returns:
+
+    """
+    assert catalog.upsert(str(tmp_path / "q3"), _invoices()) == 3
+
+    result = catalog.query(buyers=["alice"], start=date(2023, 7, 1), end=date(2023, 9, 30))
+    assert [inv.original_filename for inv in result] == ["a1.pdf", "a2.pdf"]
+    assert result[0].screenshot_filenames == ["a1.png", "a1-1.png"]
+
+    result = catalog.query(min_amount=20.0, max_amount=100.0)
+    assert [inv.invoice_number for inv in result] == ["3"]
+    assert result[0].duplicate_of == "a1.pdf"
+    assert result[0].screenshot_filenames == ["b1.jpg"]
+
+
+def test_upsert_replaces_directory_contents(tmp_path, catalog):
+    """
+    测试重复写入同一目录时更新已有发票、删除已不存在的发票，且不影响其他目录
+    Args:
+        tmp_path:
+        catalog:
+
+    Returns:
+
+    """
+    catalog.upsert(str(tmp_path / "q3"), _invoices())
+    catalog.upsert(str(tmp_path / "q4"), _invoices()[:1])
+
+    updated = _invoices()[:1]
+    updated[0].screenshot_filenames = ["a1.jpg"]
+    catalog.upsert(str(tmp_path / "q3"), updated)
+
+    assert len(catalog.query(directory=str(tmp_path / "q3"))) == 1
+    assert catalog.query(directory=str(tmp_path / "q3"))[0].screenshot_filenames == ["a1.jpg"]
+    assert catalog.query(directory=str(tmp_path / "q4"))[0].screenshot_filenames == ["a1.png", "a1-1.png"]
+
+
+def test_content_mismatch_round_trip(tmp_path):
+    """
+    测试 PDF 内容核对结果被写入并查询返回，早期版本创建的数据库会补充该列
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    path = str(tmp_path / "catalog.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(InvoiceCatalog.SCHEMA.replace("content_mismatch TEXT,", ""))
+    connection.close()
+
+    invoices = _invoices()
+    invoices[1].content_mismatch = "amount"
+    with InvoiceCatalog(path) as catalog:
+        catalog.upsert(str(tmp_path / "q3"), invoices)
+        assert [inv.content_mismatch for inv in catalog.query()] == [None, "amount", None]
+
+        invoices[1].content_mismatch = None
+        catalog.upsert(str(tmp_path / "q3"), invoices)
+        assert catalog.query(invoice_number="2")[0].content_mismatch is None
+
+
+def test_query_command_rejects_latex(tmp_path, monkeypatch):
+    """
+    测试 query 命令拒绝生成 TeX 报告，其引用的文件不会被放入输出目录
+    Args:
+        tmp_path:
+        monkeypatch:
+
+    Returns:
+
+    """
+    # 日志文件写入当前目录下的 logs
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "catalog.db")
+    with InvoiceCatalog(path) as catalog:
+        catalog.upsert(str(tmp_path / "q3"), _invoices())
+
+    result = CliRunner().invoke(main, ["query", "--catalog", path, "-o", str(tmp_path), "-f", "excel,latex"])
+    assert result.exit_code == 2
+    assert "latex" in result.output
+
+    result = CliRunner().invoke(main, ["query", "--catalog", path, "-o", str(tmp_path)])
+    assert result.exit_code == 0
+    assert (tmp_path / "invoices.xlsx").exists()
@@ -0,0 +1,128 @@
+import os
+import csv
+import json
+import pytest
+from datetime import date
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.duplicates import DuplicateDetector
+from invoice_processor.main import process_invoices
+
+
+def _invoice(filename: str, invoice_number: str) -> Invoice:
+    return Invoice(
+        invoice_date=date(2023, 10, 23),
+        invoice_number=invoice_number,
+        amount=50.0,
+        buyer="abc",
+        original_filename=filename,
+    )
+
+
+@pytest.fixture
+def invoice_dir(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    (directory / "a.pdf").write_bytes(b"%PDF-same")
+    (directory / "b.pdf").write_bytes(b"%PDF-same")                 # 与 a.pdf 内容相同
+    (directory / "c.pdf").write_bytes(b"%PDF-diff")                 # 大小相同但内容不同
+    (directory / "d.pdf").write_bytes(b"%PDF-unique-size")
+    (directory / "e.pdf").write_bytes(b"%PDF-other-size")
+    return directory
+
+
+def test_detects_duplicate_number_and_content(tmp_path, invoice_dir):
+    """
+    测试按发票号码和 PDF 内容检测重复发票，只对大小相同的文件计算哈希
+    Args:
+        tmp_path:
+        invoice_dir:
+
+    Returns:
+
+    """
+    invoices = [
+        _invoice("b.pdf", "2"),
+        _invoice("a.pdf", "1"),
+        _invoice("c.pdf", "3"),
+        _invoice("d.pdf", "4"),
+        _invoice("e.pdf", "4"),
+    ]
+    detector = DuplicateDetector(str(invoice_dir), str(tmp_path))
+
+    assert detector.detect(invoices) == 2
+    flags = {inv.original_filename: inv.duplicate_of for inv in invoices}
+    assert flags == {"a.pdf": None, "b.pdf": "a.pdf", "c.pdf": None, "d.pdf": None, "e.pdf": "d.pdf"}
+    assert detector.hashed_count == 3
+
+
+def test_hash_cache_reused(tmp_path, invoice_dir):
+    """
+    测试未变化的文件直接使用缓存的哈希，修改后重新计算
+    Args:
+        tmp_path:
+        invoice_dir:
+
+    Returns:
+
+    """
+    invoices = [_invoice("a.pdf", "1"), _invoice("b.pdf", "2")]
+    DuplicateDetector(str(invoice_dir), str(tmp_path)).detect(invoices)
+
+    detector = DuplicateDetector(str(invoice_dir), str(tmp_path))
+    assert detector.detect(invoices) == 1
+    assert detector.hashed_count == 0
+
+    (invoice_dir / "b.pdf").write_bytes(b"%PDF-edit")
+    os.utime(invoice_dir / "b.pdf", ns=(0, 1))
+    detector = DuplicateDetector(str(invoice_dir), str(tmp_path))
+    assert detector.detect(invoices) == 0
+    assert detector.hashed_count == 1
+    assert invoices[1].duplicate_of is None
+
+
+def test_hash_cache_pruned(tmp_path, invoice_dir):
+    """
+    测试已删除的文件的缓存条目被删除
+    Args:
+        tmp_path:
+        invoice_dir:
+
+    Returns:
+
+    """
+    DuplicateDetector(str(invoice_dir), str(tmp_path)).detect(
+        [_invoice("a.pdf", "1"), _invoice("b.pdf", "2"), _invoice("c.pdf", "3")]
+    )
+    (invoice_dir / "c.pdf").unlink()
+    DuplicateDetector(str(invoice_dir), str(tmp_path)).detect([_invoice("a.pdf", "1"), _invoice("b.pdf", "2")])
+
+    with open(tmp_path / DuplicateDetector.CACHE_FILENAME, encoding="utf-8") as f:
+        cached = json.load(f)
+    assert sorted(os.path.basename(path) for path in cached) == ["a.pdf", "b.pdf"]
+
+
+def test_disabled_detection_clears_cached_flags(tmp_path):
+    """
+    测试关闭重复检测后，清单中缓存的重复标记不会再出现在报告中
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    (invoice_dir / "2023-10-23-abc-50_0-12345678901234567890.pdf").write_bytes(b"%PDF-1")
+    (invoice_dir / "2023-10-24-abc-50_0-12345678901234567890.pdf").write_bytes(b"%PDF-2")
+    manifest = process_invoices(str(invoice_dir), str(output_dir), formats=("csv",))
+    assert manifest.entries["2023-10-24-abc-50_0-12345678901234567890.pdf"].invoice.duplicate_of is not None
+
+    (invoice_dir / "2023-10-25-abc-50_0-12345678901234567891.pdf").write_bytes(b"%PDF-3")
+    manifest = process_invoices(str(invoice_dir), str(output_dir), formats=("csv",), detect_duplicates=False)
+
+    assert all(entry.invoice.duplicate_of is None for entry in manifest.entries.values())
+    with open(output_dir / "invoices.csv", encoding="utf-8", newline="") as f:
+        assert [row["duplicate of"] for row in csv.DictReader(f)] == ["", "", ""]
@@ -16,8 +16,7 @@ def sample_invoices():
             buyer="abc",
             invoice_number="12345678901234567890",
             original_filename="2023-10-23-abc-50_0-12345678901234567890.pdf",
-            screenshot_filename="2023-10-23-abc-50_0-12345678901234567890.png",
-            is_valid=True,
+            screenshot_filenames=["2023-10-23-abc-50_0-12345678901234567890.png"],
         ),
         Invoice(
             invoice_date=date(2023, 10, 24),
@@ -25,8 +24,7 @@ def sample_invoices():
             buyer="def",
             invoice_number="09876543210987654321",
             original_filename="2023-10-24-def-75_5-09876543210987654321.pdf",
-            screenshot_filename="2023-10-24-def-75_5-09876543210987654321.png",
-            is_valid=True,
+            screenshot_filenames=["2023-10-24-def-75_5-09876543210987654321.png"],
         ),
         Invoice(
             invoice_date=date(2023, 10, 2),
@@ -34,8 +32,7 @@ def sample_invoices():
             buyer="main",
             invoice_number="09876543290987654321",
             original_filename="2023-10-24-main-75_5-09876543210987654321.pdf",
-            screenshot_filename="2023-10-24-main-75_5-09876543210987654321.png",
-            is_valid=True,
+            screenshot_filenames=["2023-10-24-main-75_5-09876543210987654321.png"],
         ),
     ]
 
@@ -50,13 +47,13 @@ def test_excel_generator_creates_valid_file(tmp_path, sample_invoices):
     Returns:
 
     """
-    output_file = tmp_path / "valid_invoices.xlsx"
+    output_file = tmp_path / "invoices.xlsx"
     generator = ExcelGenerator(tmp_path)
 
     generator.generate(sample_invoices)
 
     # 读取生成的 Excel 文件进行验证
-    df = pd.read_excel(output_file)
+    df = pd.read_excel(output_file, index_col=0, dtype={"invoice number": str})
 
     assert len(df) == 4
     assert list(df.columns) == [
@@ -65,9 +62,10 @@ def test_excel_generator_creates_valid_file(tmp_path, sample_invoices):
         "buyer",
         "invoice number",
         "invoice filename",
-        "screenshot filename",
+        "screenshot filenames",
         "valid",
-        "error",
+        "duplicate of",
+        "content mismatch",
     ]
 
     # 验证第一行数据
@@ -77,15 +75,14 @@ def test_excel_generator_creates_valid_file(tmp_path, sample_invoices):
     assert first_row["amount"] == 50.0
     assert first_row["buyer"] == "abc"
     assert first_row["invoice filename"] == "2023-10-23-abc-50_0-12345678901234567890.pdf"
-    assert first_row["screenshot filename"] == "2023-10-23-abc-50_0-12345678901234567890.png"
+    assert first_row["screenshot filenames"] == "['2023-10-23-abc-50_0-12345678901234567890.png']"
     assert first_row["valid"] == 1.0
-    assert first_row["error"] == "[]"
     assert df.iloc[-1]["amount"] == 196.0
 
 
 def test_excel_generator_no_valid_invoices(tmp_path):
     """
-    测试当没有有效发票时，Excel 文件不会生成
+    测试没有有效发票时仍会生成报告，无效发票的 valid 列为 False；没有任何发票时不生成文件
     Args:
         tmp_path:
 
@@ -95,6 +92,9 @@ def test_excel_generator_no_valid_invoices(tmp_path):
     output_file = tmp_path / "invoices.xlsx"
     generator = ExcelGenerator(tmp_path)
 
+    generator.generate([])
+    assert not output_file.exists()
+
     invalid_invoices = [
         Invoice(
             invoice_date=date(2023, 10, 23),
@@ -102,12 +102,88 @@ def test_excel_generator_no_valid_invoices(tmp_path):
             buyer="abc",
             invoice_number="12345678901234567890",
             original_filename="2023-10-23-abc-50_0-12345678901234567890.pdf",
-            screenshot_filename="",
-            is_valid=False,
-            validation_errors=["缺少对应截图文件"],
+            screenshot_filenames=[],
         )
     ]
 
     generator.generate(invalid_invoices)
 
-    assert not output_file.exists()
+    df = pd.read_excel(output_file, index_col=0, dtype={"invoice number": str})
+    assert len(df) == 2
+    assert df.iloc[0]["valid"] == 0.0
+    assert df.iloc[0]["screenshot filenames"] == "[]"
+    assert df.iloc[-1]["amount"] == 50.0
+
+
+def _make_invoices(n: int) -> list[Invoice]:
+    return [
+        Invoice(
+            invoice_date=date(2023, 10, 1 + i % 28),
+            invoice_number=str(i),
+            amount=1.5 + i,
+            buyer="abc",
+            original_filename=f"2023-10-{1 + i % 28:02d}-abc-{i}-{i}.pdf",
+            screenshot_filenames=[f"2023-10-{1 + i % 28:02d}-abc-{i}-{i}.png"] if i % 2 == 0 else [],
+        )
+        for i in range(n)
+    ]
+
+
+def test_excel_generator_streaming_matches_pandas(tmp_path):
+    """
+    测试流式（openpyxl 只写）路径与 pandas 路径输出相同的列与合计行
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    invoices = _make_invoices(5)
+    (tmp_path / "pandas").mkdir()
+    (tmp_path / "streaming").mkdir()
+
+    ExcelGenerator(str(tmp_path / "pandas")).generate(invoices)
+    ExcelGenerator(str(tmp_path / "streaming"), streaming=True).generate(iter(invoices))
+
+    expected = pd.read_excel(tmp_path / "pandas" / "invoices.xlsx", index_col=0)
+    actual = pd.read_excel(tmp_path / "streaming" / "invoices.xlsx", index_col=0)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    assert actual.loc["total", "amount"] == sum(inv.amount for inv in invoices)
+
+
+def test_excel_generator_streaming_rolls_over_sheets(tmp_path, monkeypatch):
+    """
+    测试流式路径在达到单表行数上限时切换到新的工作表
+    Args:
+        tmp_path:
+        monkeypatch:
+
+    Returns:
+
+    """
+    monkeypatch.setattr(ExcelGenerator, "MAX_SHEET_ROWS", 4)
+    invoices = _make_invoices(7)
+
+    ExcelGenerator(str(tmp_path), streaming=True).generate(invoices)
+
+    sheets = pd.read_excel(tmp_path / "invoices.xlsx", sheet_name=None, index_col=0)
+    assert list(sheets) == ["Sheet1", "Sheet2", "Sheet3"]
+    assert all(len(df) <= 3 for df in sheets.values())
+    combined = pd.concat(sheets.values())
+    assert list(combined.index) == [0, 1, 2, 3, 4, 5, 6, "total"]
+    assert combined.loc["total", "amount"] == sum(inv.amount for inv in invoices)
+
+
+def test_excel_generator_streaming_no_invoices(tmp_path):
+    """
+    测试流式路径在没有发票时不生成文件
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    ExcelGenerator(str(tmp_path), streaming=True).generate(iter([]))
+
+    assert not (tmp_path / "invoices.xlsx").exists()
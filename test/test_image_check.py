@@ -0,0 +1,112 @@
+import os
+import json
+
+import pytest
+from PIL import Image
+
+from invoice_processor.image_check import ImageIntegrityChecker
+from invoice_processor.main import process_invoices
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+GOOD = "2023-10-23-abc-50_0-12345678901234567890.png"
+TRUNCATED = "2023-10-23-abc-50_0-12345678901234567890-1.png"
+OTHER = "2023-10-24-def-20_0-12345678901234567891.pdf"
+EMPTY = "2023-10-24-def-20_0-12345678901234567891.jpg"
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    """
+    第一张发票有一张完好的和一张被截断的截图，第二张发票只有一张空截图
+    """
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    for name in (INVOICE, OTHER):
+        (invoice_dir / name).write_bytes(b"%PDF")
+    Image.new("RGB", (40, 30), "red").save(invoice_dir / GOOD)
+    data = (invoice_dir / GOOD).read_bytes()
+    (invoice_dir / TRUNCATED).write_bytes(data[:len(data) // 2])
+    (invoice_dir / EMPTY).write_bytes(b"")
+    return str(invoice_dir), str(output_dir)
+
+
+def test_broken_screenshots_are_removed(dirs):
+    """
+    测试损坏的截图被移除，只有损坏截图的发票变为无效
+    Args:
+        dirs:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    manifest = process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+
+    first = manifest.entries[INVOICE].invoice
+    second = manifest.entries[OTHER].invoice
+    assert first.screenshot_filenames == [GOOD]
+    assert second.screenshot_filenames == []
+    assert not second.is_valid
+    assert TRUNCATED not in open(os.path.join(output_dir, "invoices.tex"), encoding="utf-8").read()
+
+
+def test_results_cached_and_fixed_screenshot_rechecked(dirs):
+    """
+    测试检查结果按 (路径, 大小, 修改时间) 缓存，修复后的截图会被重新检查并恢复
+    Args:
+        dirs:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+
+    checker = ImageIntegrityChecker(invoice_dir, output_dir)
+    manifest = process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+    assert checker.check([manifest.entries[INVOICE].invoice]) == 0
+    assert checker.checked_count == 0
+
+    Image.new("RGB", (10, 10), "blue").save(os.path.join(invoice_dir, EMPTY))
+    manifest = process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+    assert manifest.entries[OTHER].invoice.screenshot_filenames == [EMPTY]
+    assert manifest.entries[INVOICE].invoice.screenshot_filenames == [GOOD]
+
+
+def test_disabling_check_restores_screenshots(dirs):
+    """
+    测试关闭截图检查后，上次检查移除的截图重新与发票匹配
+    Args:
+        dirs:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+
+    manifest = process_invoices(invoice_dir, output_dir, detect_duplicates=False)
+    assert manifest.entries[INVOICE].invoice.screenshot_filenames == [GOOD, TRUNCATED]
+    assert manifest.entries[OTHER].invoice.screenshot_filenames == [EMPTY]
+
+
+def test_cache_pruned_for_deleted_screenshots(dirs):
+    """
+    测试已删除的截图的缓存条目被删除
+    Args:
+        dirs:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+    os.remove(os.path.join(invoice_dir, TRUNCATED))
+    process_invoices(invoice_dir, output_dir, check_images=True, detect_duplicates=False)
+
+    with open(os.path.join(output_dir, ImageIntegrityChecker.CACHE_FILENAME), encoding="utf-8") as f:
+        cached = json.load(f)
+    assert sorted(os.path.basename(key) for key in cached) == sorted([GOOD, EMPTY])
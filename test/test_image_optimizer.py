@@ -0,0 +1,116 @@
+import os
+import pytest
+from datetime import date
+from PIL import Image
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.image_optimizer import ImageOptimizer, _optimize_image
+from invoice_processor.generators.latex_generator import LatexGenerator
+
+
+@pytest.fixture
+def invoices(tmp_path):
+    source_dir = tmp_path / "in"
+    source_dir.mkdir()
+    Image.new("RGBA", (3000, 6000), (255, 0, 0, 128)).save(source_dir / "a.png")
+    Image.new("RGB", (200, 100), (0, 255, 0)).save(source_dir / "b.jpg")
+    Image.new("RGB", (2000, 1000), (0, 0, 255)).save(source_dir / "b-1.jpg")
+    (source_dir / "broken.png").write_bytes(b"not an image")
+
+    def make(name, screenshots):
+        return Invoice(
+            invoice_date=date(2023, 10, 23),
+            invoice_number="1",
+            amount=1.0,
+            buyer="abc",
+            original_filename=f"{name}.pdf",
+            screenshot_filenames=screenshots,
+        )
+
+    return str(source_dir), [make("a", ["a.png"]), make("b", ["b.jpg", "b-1.jpg"]), make("c", ["broken.png"])]
+
+
+def test_image_optimizer_resizes_to_layout(tmp_path, invoices):
+    """
+    测试截图被缩放到版面所需的最大尺寸内，并重新编码为 JPEG
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    source_dir, invs = invoices
+    optimizer = ImageOptimizer(str(tmp_path / "out"), max_workers=2)
+    image_paths = optimizer.optimize(source_dir, invs)
+
+    assert set(image_paths) == {"a.png", "b.jpg", "b-1.jpg"}
+    for filename, screenshots in [("a.png", 1), ("b.jpg", 2), ("b-1.jpg", 2)]:
+        max_width, max_height = optimizer.target_size(screenshots)
+        with Image.open(tmp_path / "out" / image_paths[filename]) as image:
+            assert image.format == "JPEG"
+            assert image.width <= max_width and image.height <= max_height
+
+    # 小图不会被放大
+    with Image.open(tmp_path / "out" / image_paths["b.jpg"]) as image:
+        assert image.size == (200, 100)
+
+    tex = LatexGenerator(str(tmp_path), image_paths=image_paths)._get_tex_for_screenshot(invs[0])
+    assert "./" + image_paths["a.png"] in tex
+
+
+def test_image_optimizer_reuses_cache(tmp_path, invoices):
+    """
+    测试内容未变化的截图直接复用缓存，内容变化后重新生成
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    source_dir, invs = invoices
+    optimizer = ImageOptimizer(str(tmp_path / "out"), max_workers=1)
+    first = optimizer.optimize(source_dir, invs)
+    cached_mtime = os.stat(tmp_path / "out" / first["a.png"]).st_mtime_ns
+
+    second = optimizer.optimize(source_dir, invs)
+    assert second == first
+    assert os.stat(tmp_path / "out" / second["a.png"]).st_mtime_ns == cached_mtime
+
+    Image.new("RGB", (300, 300), (0, 0, 0)).save(os.path.join(source_dir, "a.png"))
+    third = optimizer.optimize(source_dir, invs)
+    assert third["a.png"] != first["a.png"]
+    assert third["b.jpg"] == first["b.jpg"]
+
+
+def test_image_optimizer_prunes_unused_and_failed_output(tmp_path, invoices, monkeypatch):
+    """
+    测试本次未用到的优化结果被删除，保存失败时不留下临时文件
+    Args:
+        tmp_path:
+        invoices:
+        monkeypatch:
+
+    Returns:
+
+    """
+    source_dir, invs = invoices
+    cache_dir = tmp_path / "out" / ImageOptimizer.CACHE_SUBDIR
+    optimizer = ImageOptimizer(str(tmp_path / "out"), max_workers=1)
+    first = optimizer.optimize(source_dir, invs)
+
+    second = optimizer.optimize(source_dir, invs[:1])
+    assert sorted(os.listdir(cache_dir)) == [os.path.basename(second["a.png"])]
+    assert first["b.jpg"] not in second
+
+    def fail_save(self, path, *args, **kwargs):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    # 在当前进程中直接运行任务，使替换的 save 生效
+    monkeypatch.setattr(Image.Image, "save", fail_save)
+    cache_name, cached, error = _optimize_image((os.path.join(source_dir, "a.png"), str(cache_dir), (10, 10), 85))
+    assert cache_name is None and error == "disk full"
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
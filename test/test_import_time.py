@@ -0,0 +1,72 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+
+# invoice_processor.cli 冷启动导入耗时上限（微秒）
+IMPORT_BUDGET_US = 300_000
+# 只应在选择对应输出格式后才导入的重量级依赖
+HEAVY_MODULES = ("pandas", "openpyxl", "PIL", "numpy")
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_cli_import_skips_heavy_dependencies():
+    """
+    测试导入 CLI 时不会导入 pandas、openpyxl、PIL 等重量级依赖
+    Returns:
+
+    """
+    code = (
+        "import sys, invoice_processor.cli\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert _run(code).stdout.strip() == ""
+
+
+def test_cli_import_time_within_budget():
+    """
+    测试 CLI 模块的冷启动导入耗时不超过预算
+    Returns:
+
+    """
+    result = _run("import invoice_processor.cli")
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| invoice_processor\.cli$", result.stderr, re.MULTILINE)
+    assert match is not None
+    assert int(match.group(1)) < IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("formats, expected, unexpected", [
+    (["latex"], [], ["pandas", "openpyxl"]),
+    (["excel"], ["openpyxl"], ["pandas"]),
+    (["csv", "jsonl.gz"], [], ["pandas", "openpyxl"]),
+])
+def test_generators_loaded_lazily(formats, expected, unexpected):
+    """
+    测试只有所选输出格式的生成器依赖会被导入
+    Args:
+        formats: 选择的输出格式
+        expected: 应被导入的模块
+        unexpected: 不应被导入的模块
+
+    Returns:
+
+    """
+    code = (
+        "import sys\n"
+        "from invoice_processor.generators import get_generator_class\n"
+        f"for name in {formats!r}: get_generator_class(name)\n"
+        f"print(','.join(m for m in {expected + unexpected!r} if m in sys.modules))"
+    )
+    loaded = _run(code).stdout.strip().split(",")
+    assert all(m in loaded for m in expected)
+    assert not any(m in loaded for m in unexpected)
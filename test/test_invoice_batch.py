@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from datetime import date
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.invoice_batch import InvoiceBatch
+from invoice_processor.generators.latex_generator import LatexGenerator
+
+
+@pytest.fixture
+def sample_invoices():
+    return [
+        Invoice(
+            invoice_date=date(2023, 10, 23),
+            invoice_number="1",
+            amount=50.0,
+            buyer="abc",
+            original_filename="2023-10-23-abc-50_0-1.pdf",
+            screenshot_filenames=["2023-10-23-abc-50_0-1.png", "2023-10-23-abc-50_0-1-1.png"],
+        ),
+        Invoice(
+            invoice_date=date(1969, 12, 31),
+            invoice_number="2",
+            amount=75.5,
+            buyer="def",
+            original_filename="1969-12-31-def-75_5-2.pdf",
+        ),
+        Invoice(
+            invoice_date=date(2024, 2, 29),
+            invoice_number="3",
+            amount=0.1,
+            buyer="abc",
+            original_filename="2024-02-29-abc-0_1-3.pdf",
+            screenshot_filenames=["2024-02-29-abc-0_1-3.jpg"],
+        ),
+    ]
+
+
+def test_invoice_is_slotted():
+    """
+    测试 Invoice 使用 __slots__，实例没有 __dict__
+    Returns:
+
+    """
+    invoice = Invoice(date(2023, 10, 23), "1", 1.0, "abc", "a.pdf")
+    assert not hasattr(invoice, "__dict__")
+
+
+def test_invoice_batch_round_trip(sample_invoices):
+    """
+    测试批量容器可以还原出与输入相同的 Invoice
+    Args:
+        sample_invoices:
+
+    Returns:
+
+    """
+    batch = InvoiceBatch.from_invoices(sample_invoices)
+
+    assert len(batch) == 3
+    assert list(batch) == sample_invoices
+    assert batch[-1] == sample_invoices[-1]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_invoice_batch_columns(sample_invoices):
+    """
+    测试列式数组及向量化的 is_valid、screenshot_nums
+    Args:
+        sample_invoices:
+
+    Returns:
+
+    """
+    batch = InvoiceBatch.from_invoices(sample_invoices)
+
+    assert batch.dates.tolist() == [inv.invoice_date for inv in sample_invoices]
+    np.testing.assert_array_equal(batch.amounts, [50.0, 75.5, 0.1])
+    assert batch.buyers == ["abc", "def"]
+    np.testing.assert_array_equal(batch.buyer_codes, [0, 1, 0])
+    np.testing.assert_array_equal(batch.screenshot_offsets, [0, 2, 2, 3])
+    np.testing.assert_array_equal(batch.screenshot_nums, [inv.screenshot_nums for inv in sample_invoices])
+    np.testing.assert_array_equal(batch.is_valid, [inv.is_valid for inv in sample_invoices])
+    assert batch.total_amount == pytest.approx(125.6)
+
+
+def test_generators_consume_batch(tmp_path, sample_invoices):
+    """
+    测试生成器可以直接消费 InvoiceBatch
+    Args:
+        tmp_path:
+        sample_invoices:
+
+    Returns:
+
+    """
+    generator = LatexGenerator(str(tmp_path))
+    generator.generate(sample_invoices)
+    expected = (tmp_path / "invoices.tex").read_text(encoding="utf-8")
+
+    generator.generate(InvoiceBatch.from_invoices(sample_invoices))
+    assert (tmp_path / "invoices.tex").read_text(encoding="utf-8") == expected
@@ -0,0 +1,36 @@
+from invoice_processor.json_cache import load_json_cache, save_json_cache
+
+
+def test_round_trip_without_leftover_files(tmp_path):
+    """
+    测试写入后可读回，且不留下临时文件
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    path = str(tmp_path / "cache.json")
+    assert save_json_cache(path, {"发票": [1, 2]})
+    assert load_json_cache(path) == {"发票": [1, 2]}
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_missing_or_corrupted_cache(tmp_path):
+    """
+    测试文件不存在、内容无法解析或结构不符时返回 None
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    path = tmp_path / "cache.json"
+    assert load_json_cache(str(path)) is None
+
+    path.write_text("{not json", encoding="utf-8")
+    assert load_json_cache(str(path)) is None
+
+    path.write_text('{"a": 1}', encoding="utf-8")
+    assert load_json_cache(str(path), lambda data: data["b"]) is None
+    assert load_json_cache(str(path), lambda data: data["a"]) == 1
@@ -0,0 +1,127 @@
+import pytest
+from datetime import date
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.generators.latex_generator import LatexGenerator
+
+
+@pytest.fixture
+def sample_invoices():
+    return [
+        Invoice(
+            invoice_date=date(2023, 10, 23),
+            invoice_number="12345678901234567890",
+            amount=50.0,
+            buyer="abc",
+            original_filename="2023-10-23-abc-50_0-12345678901234567890.pdf",
+            screenshot_filenames=[
+                "2023-10-23-abc-50_0-12345678901234567890.png",
+                "2023-10-23-abc-50_0-12345678901234567890-1.png",
+            ],
+        ),
+        Invoice(
+            invoice_date=date(2023, 10, 24),
+            invoice_number="09876543210987654321",
+            amount=75.5,
+            buyer="def",
+            original_filename="2023-10-24-def-75_5-09876543210987654321.pdf",
+        ),
+    ]
+
+
+def test_latex_generator_streams_document(tmp_path, sample_invoices):
+    """
+    测试 LatexGenerator 按顺序写出头部、每张发票及截图、尾部
+    Args:
+        tmp_path:
+        sample_invoices:
+
+    Returns:
+
+    """
+    generator = LatexGenerator(str(tmp_path))
+    generator.generate(sample_invoices)
+
+    expected = generator._get_tex_header()
+    for inv in sample_invoices:
+        expected += generator._get_tex_for_invoice(inv)
+        expected += generator._get_tex_for_screenshot(inv)
+    expected += generator._get_tex_footer()
+
+    content = (tmp_path / "invoices.tex").read_text(encoding="utf-8")
+    assert content == expected
+    assert "width=0.47\\textwidth" in content
+    assert "./resources/2023-10-24-def-75_5-09876543210987654321.pdf" in content
+
+
+def test_latex_generator_accepts_generator(tmp_path, sample_invoices):
+    """
+    测试 LatexGenerator 可以直接消费生成器
+    Args:
+        tmp_path:
+        sample_invoices:
+
+    Returns:
+
+    """
+    LatexGenerator(str(tmp_path / "")).generate(inv for inv in sample_invoices)
+    from_generator = (tmp_path / "invoices.tex").read_text(encoding="utf-8")
+
+    LatexGenerator(str(tmp_path)).generate(sample_invoices)
+    from_list = (tmp_path / "invoices.tex").read_text(encoding="utf-8")
+
+    assert from_generator == from_list
+
+
+def test_latex_generator_fragments_rewrite_only_changed(tmp_path, sample_invoices):
+    """
+    测试片段模式下主文件按顺序 \\input 各片段，且只重写内容变化的片段
+    Args:
+        tmp_path:
+        sample_invoices:
+
+    Returns:
+
+    """
+    generator = LatexGenerator(str(tmp_path), fragments=True)
+    generator.generate(sample_invoices)
+    assert generator.fragments_written == 2
+
+    master = (tmp_path / "invoices.tex").read_text(encoding="utf-8")
+    assert "\\input{fragments/2023-10-23-abc-50_0-12345678901234567890.tex}\n" \
+           "\\input{fragments/2023-10-24-def-75_5-09876543210987654321.tex}" in master
+    first = tmp_path / "fragments" / "2023-10-23-abc-50_0-12345678901234567890.tex"
+    assert first.read_text(encoding="utf-8") == (
+        generator._get_tex_for_invoice(sample_invoices[0]) + generator._get_tex_for_screenshot(sample_invoices[0])
+    )
+    first_mtime = first.stat().st_mtime_ns
+
+    # 只修改第二张发票，第一张发票的片段保持不变
+    sample_invoices[1].screenshot_filenames.append("2023-10-24-def-75_5-09876543210987654321.png")
+    generator.generate(sample_invoices)
+    assert generator.fragments_written == 1
+    assert first.stat().st_mtime_ns == first_mtime
+
+    # 移除的发票对应的片段被删除
+    generator.generate(sample_invoices[:1])
+    assert not (tmp_path / "fragments" / "2023-10-24-def-75_5-09876543210987654321.tex").exists()
+
+
+def test_latex_generator_fragments_stream_master(tmp_path, sample_invoices):
+    """
+    测试片段模式可消费生成器，主文件内容未变化时不被重写，且不留下临时文件
+    Args:
+        tmp_path:
+        sample_invoices:
+
+    Returns:
+
+    """
+    generator = LatexGenerator(str(tmp_path), fragments=True)
+    assert generator.generate_fragments(inv for inv in sample_invoices) == 2
+    master = tmp_path / "invoices.tex"
+    master_mtime = master.stat().st_mtime_ns
+
+    generator.generate_fragments(inv for inv in sample_invoices)
+    assert master.stat().st_mtime_ns == master_mtime
+    assert [path.name for path in tmp_path.iterdir() if path.name.endswith(".tmp")] == []
@@ -0,0 +1,61 @@
+import atexit
+import logging
+import pytest
+
+from invoice_processor.logging_config import setup_logging
+
+
+@pytest.fixture
+def root_logger():
+    """
+    测试结束后恢复根日志记录器的处理器和级别
+    """
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    for handler in root.handlers:
+        if handler not in handlers:
+            handler.close()
+    root.handlers = handlers
+    root.setLevel(level)
+
+
+def test_setup_logging_queue_mode(tmp_path, root_logger):
+    """
+    测试队列模式下日志由后台监听器写入文件，且只格式化一次
+    Args:
+        tmp_path:
+        root_logger:
+
+    Returns:
+
+    """
+    # pytest 在测试执行阶段添加了捕获处理器，清空后 basicConfig 才会生效
+    root_logger.handlers = []
+    listener = setup_logging(str(tmp_path), log_level=logging.DEBUG, use_queue=True)
+    assert listener is not None
+    assert isinstance(root_logger.handlers[0], logging.handlers.QueueHandler)
+
+    logging.getLogger("invoice_processor.test").debug("found screenshot: '%s'", "a.png")
+    listener.stop()
+    atexit.unregister(listener.stop)
+
+    (log_file,) = tmp_path.iterdir()
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert lines[-1].endswith("- DEBUG - [invoice_processor.test] - found screenshot: 'a.png'")
+    assert lines[-1].count(" - DEBUG - ") == 1
+
+
+def test_setup_logging_sync_mode(tmp_path, root_logger):
+    """
+    测试默认的同步模式不启动监听器
+    Args:
+        tmp_path:
+        root_logger:
+
+    Returns:
+
+    """
+    root_logger.handlers = []
+    assert setup_logging(str(tmp_path)) is None
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in root_logger.handlers)
@@ -0,0 +1,151 @@
+import os
+import pytest
+
+from invoice_processor import main
+from invoice_processor.main import process_invoices
+from invoice_processor.manifest import Manifest
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+SCREENSHOT = "2023-10-23-abc-50_0-12345678901234567890.png"
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    (invoice_dir / INVOICE).write_bytes(b"%PDF")
+    (invoice_dir / SCREENSHOT).write_bytes(b"png")
+    (invoice_dir / "bad-name.pdf").write_bytes(b"%PDF")
+    return str(invoice_dir), str(output_dir)
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """
+    记录 FilenameParser.parse_many 被调用的文件名
+    """
+    calls: list[str] = []
+    original = main.FilenameParser.parse_many
+
+    def parse_many(self, filenames):
+        calls.extend(filenames)
+        return original(self, filenames)
+
+    monkeypatch.setattr(main.FilenameParser, "parse_many", parse_many)
+    return calls
+
+
+def test_manifest_skips_unchanged_files(dirs, parse_calls):
+    """
+    测试第二次运行时未变化的文件不会被重新解析，报告也不会被重写
+    Args:
+        dirs:
+        parse_calls:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir)
+    assert sorted(parse_calls) == sorted([INVOICE, "bad-name.pdf"])
+    tex_mtime = os.stat(os.path.join(output_dir, "invoices.tex")).st_mtime_ns
+
+    parse_calls.clear()
+    process_invoices(invoice_dir, output_dir)
+    assert parse_calls == []
+    assert os.stat(os.path.join(output_dir, "invoices.tex")).st_mtime_ns == tex_mtime
+
+    manifest = Manifest.load(output_dir, invoice_dir)
+    assert manifest.entries[INVOICE].invoice.screenshot_filenames == [SCREENSHOT]
+    assert manifest.entries["bad-name.pdf"].invoice is None
+
+
+def test_manifest_invalidated_by_screenshot_change(dirs, parse_calls):
+    """
+    测试新增截图后缓存的匹配结果失效，但无需重新解析
+    Args:
+        dirs:
+        parse_calls:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir)
+
+    extra = "2023-10-23-abc-50_0-12345678901234567890-1.jpg"
+    open(os.path.join(invoice_dir, extra), "wb").close()
+    parse_calls.clear()
+    process_invoices(invoice_dir, output_dir)
+
+    assert parse_calls == []
+    manifest = Manifest.load(output_dir, invoice_dir)
+    assert manifest.entries[INVOICE].invoice.screenshot_filenames == [SCREENSHOT, extra]
+    with open(os.path.join(output_dir, "invoices.tex"), encoding="utf-8") as f:
+        assert extra in f.read()
+
+
+def test_manifest_full_rebuild(dirs, parse_calls):
+    """
+    测试 full_rebuild 忽略已有清单，重新解析所有文件
+    Args:
+        dirs:
+        parse_calls:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir)
+
+    parse_calls.clear()
+    process_invoices(invoice_dir, output_dir, full_rebuild=True)
+
+    assert sorted(parse_calls) == sorted([INVOICE, "bad-name.pdf"])
+
+
+def test_manifest_invalidated_by_option_change(dirs, parse_calls):
+    """
+    测试影响报告的选项变化时，即使输入未变化也会重新生成报告，且无需重新解析
+    Args:
+        dirs:
+        parse_calls:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir, stage_resources=False)
+    assert not os.path.exists(os.path.join(output_dir, "resources"))
+
+    parse_calls.clear()
+    process_invoices(invoice_dir, output_dir, stage_resources=True)
+
+    assert parse_calls == []
+    assert os.path.exists(os.path.join(output_dir, "resources", SCREENSHOT))
+    assert Manifest.load(output_dir, invoice_dir).options["stage_resources"] is True
+
+
+def test_switching_to_latex_fragments_regenerates_report(dirs, parse_calls):
+    """
+    测试对已处理的目录启用片段模式时，会写入片段并把 invoices.tex 替换为引用片段的主文件
+    Args:
+        dirs:
+        parse_calls:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    process_invoices(invoice_dir, output_dir)
+    assert not os.path.exists(os.path.join(output_dir, "fragments"))
+
+    process_invoices(invoice_dir, output_dir, latex_fragments=True)
+
+    fragment = os.path.splitext(INVOICE)[0] + ".tex"
+    assert os.path.exists(os.path.join(output_dir, "fragments", fragment))
+    with open(os.path.join(output_dir, "invoices.tex"), encoding="utf-8") as f:
+        assert f"\\input{{fragments/{fragment}}}" in f.read()
@@ -0,0 +1,51 @@
+import json
+
+from invoice_processor.main import process_invoices
+from invoice_processor.metrics import Metrics
+
+
+def test_metrics_stage_accumulates():
+    """
+    测试同名阶段多次执行时累加耗时与计数
+    Returns:
+
+    """
+    metrics = Metrics()
+    for _ in range(2):
+        with metrics.stage("parse") as stage:
+            stage.items += 3
+
+    parse = metrics.stages["parse"]
+    assert parse.calls == 2
+    assert parse.items == 6
+    assert parse.wall_seconds >= 0 and parse.cpu_seconds >= 0
+
+
+def test_process_invoices_records_stages(tmp_path):
+    """
+    测试 process_invoices 记录 scan、parse、validate 及各输出格式的统计数据
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    invoice_dir = tmp_path / "in"
+    invoice_dir.mkdir()
+    (invoice_dir / "2023-10-23-abc-50_0-1.pdf").touch()
+    (invoice_dir / "2023-10-23-abc-50_0-1.png").touch()
+    (invoice_dir / "bad.pdf").touch()
+
+    metrics = Metrics()
+    process_invoices(str(invoice_dir), str(tmp_path), metrics=metrics, stage_resources=False)
+
+    assert list(metrics.stages) == ["scan", "parse", "validate", "duplicates", "excel", "latex"]
+    assert metrics.stages["scan"].items == 3
+    assert metrics.stages["scan"].stat_calls == 2
+    assert metrics.stages["parse"].items == 2
+    assert metrics.stages["validate"].items == 1
+    assert metrics.stages["latex"].bytes_written == (tmp_path / "invoices.tex").stat().st_size
+
+    metrics.save_json(str(tmp_path / "metrics.json"))
+    data = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert [stage["name"] for stage in data["stages"]] == list(metrics.stages)
@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pytest
 from datetime import date
 from invoice_processor.parser import FilenameParser
@@ -20,15 +23,32 @@ def test_parse_valid_filename(parser):
     assert result.amount == 19.9
     assert result.buyer == 'abc'
     assert result.original_filename == filename
-    assert result.screenshot_filename == ''
+    assert result.screenshot_filenames == []
     assert result.is_valid == False
-    assert result.validation_errors == []
+
+
+@pytest.mark.parametrize("filename, expected_date", [
+    ("2023-1-15-abc-19_9-12345678901234567890.pdf", date(2023, 1, 15)),  # 月份不是两位数
+    ("2023-10-1-abc-19_9-12345678901234567890.pdf", date(2023, 10, 1)),  # 日不是两位数
+])
+def test_parse_single_digit_month_and_day(parser, filename, expected_date):
+    """
+    测试 FILE_PATTERN 接受一位数的月份和日
+    Args:
+        parser:
+        filename: 发票文件名
+        expected_date: 期望的发票日期
+
+    Returns:
+
+    """
+    result = parser.parse(filename)
+    assert result is not None
+    assert result.invoice_date == expected_date
 
 
 @pytest.mark.parametrize("invalid_filename", [
     # 正确格式：YYYY-MM-DD-<buyer>-<amount>-<invoice_number>.pdf
-    "2023-1-15-abc-19_9-12345678901234567890.pdf",  # 月份不是两位数
-    "2023-10-1-abc-19_9-12345678901234567890.pdf",  # 日不是两位数
     "23-10-15-abc-19_9-12345678901234567890.pdf",  # 年份不是四位数
     "2023_10_15-abc-19_9-12345678901234567890.pdf",  # 日期分隔符错误
     "2023-10-15-19_9-12345678901234567890.pdf",  # 缺少购买方
@@ -42,3 +62,57 @@ def test_parse_valid_filename(parser):
 def test_parse_invalid_filename(parser, invalid_filename):
     result = parser.parse(invalid_filename)
     assert result is None
+
+
+@pytest.mark.parametrize("threshold", [FilenameParser.BULK_PARSE_THRESHOLD, 0])
+def test_parse_many_matches_parse(parser, threshold):
+    """
+    测试批量解析（逐个解析和 pandas 向量化两种路径）与逐个解析返回相同的 Invoice 和相同的拒绝结果
+    Args:
+        parser:
+        threshold: 使用向量化解析的文件名数量下限
+
+    Returns:
+
+    """
+    parser.BULK_PARSE_THRESHOLD = threshold
+    filenames = [
+        "2023-10-15-abc-19_9-12345678901234567890.pdf",
+        " 2024-2-29-def-100-1.pdf ",
+        "2023-2-29-abc-1-2.pdf",                            # 非法日期
+        "2023-13-01-abc-1-2.pdf",                           # 非法月份
+        "0000-01-01-abc-1-2.pdf",                           # 非法年份
+        "2023-10-15-abc-19_9-12345678901234567890.txt",
+        "2023-10-15-abc-19_9-12345678901234567890",
+        "just_a_random_string.pdf",
+        "a.b.pdf",
+    ]
+
+    invoices, rejections = parser.parse_many(filenames)
+
+    assert invoices == [parser.parse(filename) for filename in filenames]
+    assert set(rejections) == {filename for filename in filenames if parser.parse(filename) is None}
+    assert rejections["2023-2-29-abc-1-2.pdf"] == FilenameParser.REJECT_DATE
+    assert rejections["2023-10-15-abc-19_9-12345678901234567890.txt"] == FilenameParser.REJECT_NOT_PDF
+    assert rejections["2023-10-15-abc-19_9-12345678901234567890"] == FilenameParser.REJECT_NO_EXTENSION
+    assert rejections["a.b.pdf"] == FilenameParser.REJECT_PATTERN
+
+
+def test_parse_many_empty(parser):
+    assert parser.parse_many([]) == ([], {})
+
+
+def test_parse_many_small_batch_skips_pandas():
+    """
+    测试少量文件名逐个解析，不会导入 pandas 和 numpy
+    Returns:
+
+    """
+    code = (
+        "import sys\n"
+        "from invoice_processor.parser import FilenameParser\n"
+        "FilenameParser().parse_many(['2023-10-15-abc-19_9-12345678901234567890.pdf'])\n"
+        "print(','.join(m for m in ('pandas', 'numpy') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,131 @@
+import os
+import csv
+import json
+import mmap
+import pytest
+from datetime import date
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.main import process_invoices
+from invoice_processor.pdf_check import PdfContentChecker, amount_needles, searchable_ranges
+
+
+NUMBER = "12345678901234567890"
+
+
+def _pdf(text: bytes, compressed: bytes = b"") -> bytes:
+    """
+    构造包含一个未压缩内容流和一个带 /Filter 的流的最小 PDF
+    """
+    return (
+        b"%PDF-1.4\n1 0 obj\n<< /Length 10 >>\nstream\n" + text + b"\nendstream\nendobj\n"
+        b"2 0 obj\n<< /Length 10 /Filter /FlateDecode >>\nstream\n" + compressed + b"\nendstream\nendobj\n"
+        b"3 0 obj\n<< /Title (invoice) >>\nendobj\n%%EOF\n"
+    )
+
+
+def _invoice(filename: str, invoice_number: str = NUMBER, amount: float = 1234.5) -> Invoice:
+    return Invoice(
+        invoice_date=date(2023, 10, 23),
+        invoice_number=invoice_number,
+        amount=amount,
+        buyer="abc",
+        original_filename=filename,
+    )
+
+
+def _cached_names(output_dir) -> list[str]:
+    with open(output_dir / PdfContentChecker.CACHE_FILENAME, encoding="utf-8") as f:
+        return sorted(os.path.basename(path) for path in json.load(f))
+
+
+@pytest.fixture
+def invoice_dir(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    (directory / "ok.pdf").write_bytes(_pdf(b"(No. " + NUMBER.encode() + b") Tj (1,234.50) Tj"))
+    (directory / "typo.pdf").write_bytes((directory / "ok.pdf").read_bytes())
+    # 发票号码只出现在压缩流中，不应被匹配
+    (directory / "compressed.pdf").write_bytes(_pdf(b"(1234.50) Tj", NUMBER.encode()))
+    (directory / "empty.pdf").write_bytes(b"")
+    return directory
+
+
+def test_amount_needles():
+    """
+    测试金额的两种写法
+    Returns:
+
+    """
+    assert amount_needles(1234.5) == (b"1234.50", b"1,234.50")
+    assert amount_needles(50.0) == (b"50.00",)
+
+
+def test_searchable_ranges_skip_filtered_streams(invoice_dir):
+    """
+    测试可搜索区间跳过带 /Filter 的流数据，保留未压缩的流和元数据
+    Args:
+        invoice_dir:
+
+    Returns:
+
+    """
+    with open(invoice_dir / "compressed.pdf", "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = b"".join(mm[start:end] for start, end in searchable_ranges(mm))
+    assert b"1234.50" in text
+    assert b"/Title (invoice)" in text
+    assert NUMBER.encode() not in text
+
+
+def test_check_marks_mismatches_and_caches(tmp_path, invoice_dir):
+    """
+    测试核对结果写入 content_mismatch，并按 (路径, 大小, 修改时间) 缓存；更正文件名中的号码后重新核对
+    Args:
+        tmp_path:
+        invoice_dir:
+
+    Returns:
+
+    """
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    invoices = [_invoice("ok.pdf"), _invoice("compressed.pdf"), _invoice("empty.pdf"), _invoice("typo.pdf", amount=99.0)]
+
+    checker = PdfContentChecker(str(invoice_dir), str(output_dir), max_workers=2)
+    assert checker.check(invoices) == 3
+    assert [inv.content_mismatch for inv in invoices] == [None, "invoice number", "unreadable", "amount"]
+    assert len(_cached_names(output_dir)) == 4
+
+    checker = PdfContentChecker(str(invoice_dir), str(output_dir), max_workers=2)
+    invoices = [_invoice("ok.pdf"), _invoice("compressed.pdf"), _invoice("typo.pdf", invoice_number="1" * 20)]
+    checker.check(invoices)
+    assert checker.checked_count == 1
+    assert [inv.content_mismatch for inv in invoices] == [None, "invoice number", "invoice number"]
+
+    # 本次未核对的发票（empty.pdf）的缓存条目被删除
+    assert _cached_names(output_dir) == ["compressed.pdf", "ok.pdf", "typo.pdf"]
+
+
+def test_disabling_check_clears_mismatches(tmp_path):
+    """
+    测试关闭核对后，清单中缓存的核对结果不会再出现在报告中
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    filename = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+    (invoice_dir / filename).write_bytes(_pdf(b"(nothing) Tj"))
+
+    manifest = process_invoices(str(invoice_dir), str(output_dir), formats=("csv",), verify_pdf=True)
+    assert manifest.entries[filename].invoice.content_mismatch == "invoice number, amount"
+
+    manifest = process_invoices(str(invoice_dir), str(output_dir), formats=("csv",))
+    assert manifest.entries[filename].invoice.content_mismatch is None
+    with open(output_dir / "invoices.csv", encoding="utf-8", newline="") as f:
+        assert [row["content mismatch"] for row in csv.DictReader(f)] == [""]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from openpyxl import load_workbook
+
+from invoice_processor import pipeline
+from invoice_processor.main import process_invoices_async, process_invoices_streaming
+from invoice_processor.pipeline import fan_out
+
+
+INVOICES = [
+    "2023-10-23-abc-50_0-12345678901234567890.pdf",
+    "2023-10-24-def-25_5-12345678901234567891.pdf",
+    "2023-10-25-ghi-10_0-12345678901234567892.pdf",
+]
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    for name in INVOICES:
+        (invoice_dir / name).write_bytes(b"%PDF")
+    (invoice_dir / INVOICES[0].replace(".pdf", ".png")).write_bytes(b"png")
+    (invoice_dir / "bad-name.pdf").write_bytes(b"%PDF")
+    return str(invoice_dir), str(output_dir)
+
+
+def test_streaming_pipeline_accumulates_counts(dirs, monkeypatch):
+    """
+    测试流式流水线跨多个批次边处理边累计计数，并同时生成所有格式的报告
+    Args:
+        dirs:
+        monkeypatch:
+
+    Returns:
+
+    """
+    monkeypatch.setattr(pipeline, "CHUNK_SIZE", 2)
+    invoice_dir, output_dir = dirs
+    stats = process_invoices_streaming(invoice_dir, output_dir)
+
+    assert (stats.total, stats.parsed, stats.skipped) == (4, 3, 1)
+    assert (stats.valid, stats.invalid) == (1, 2)
+    assert stats.total_amount == pytest.approx(85.5)
+
+    rows = list(load_workbook(f"{output_dir}/invoices.xlsx").active.iter_rows(values_only=True))
+    assert len(rows) == 1 + 3 + 1
+    assert rows[-1][2] == pytest.approx(85.5)
+    tex = open(f"{output_dir}/invoices.tex", encoding="utf-8").read()
+    assert all(f"./resources/{name}" in tex for name in INVOICES)
+
+
+def test_fan_out_survives_failing_consumer():
+    """
+    测试某个消费者出错时其余消费者仍能收到完整的流，且异常在结束后抛出
+    Args:
+
+    Returns:
+
+    """
+    received: list[int] = []
+
+    def failing(items):
+        next(iter(items))
+        raise ValueError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        fan_out(iter(range(5000)), {"ok": lambda items: received.extend(items), "bad": failing}, queue_size=4)
+    assert received == list(range(5000))
+
+
+def test_async_pipeline_matches_filename_order(dirs):
+    """
+    测试异步流水线的计数与同步流水线一致，且报告按文件名顺序输出
+    Args:
+        dirs:
+
+    Returns:
+
+    """
+    invoice_dir, output_dir = dirs
+    stats = asyncio.run(process_invoices_async(invoice_dir, output_dir, concurrency=4))
+
+    assert (stats.total, stats.parsed, stats.skipped) == (4, 3, 1)
+    assert (stats.valid, stats.invalid) == (1, 2)
+
+    rows = list(load_workbook(f"{output_dir}/invoices.xlsx").active.iter_rows(values_only=True))
+    assert [row[5] for row in rows[1:-1]] == sorted(INVOICES)
+    tex = open(f"{output_dir}/invoices.tex", encoding="utf-8").read()
+    positions = [tex.index(f"./resources/{name}") for name in sorted(INVOICES)]
+    assert positions == sorted(positions)
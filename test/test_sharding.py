@@ -0,0 +1,133 @@
+import os
+import queue
+import logging
+import logging.handlers
+from datetime import date
+
+import pytest
+from openpyxl import load_workbook
+
+from invoice_processor.invoice import Invoice
+from invoice_processor.sharding import ShardedReportGenerator
+
+
+@pytest.fixture
+def invoices():
+    """
+    两个购买人、两个月份的发票，其中一张无截图
+    """
+    return [
+        Invoice(date(2023, 10, 1), "1", 10.0, "alice", "2023-10-01-alice-10_0-1.pdf", ["2023-10-01-alice-10_0-1.png"]),
+        Invoice(date(2023, 10, 2), "2", 20.0, "alice", "2023-10-02-alice-20_0-2.pdf", []),
+        Invoice(date(2023, 11, 3), "3", 30.0, "alice", "2023-11-03-alice-30_0-3.pdf", ["2023-11-03-alice-30_0-3.png"]),
+        Invoice(date(2023, 10, 4), "4", 40.0, "bob", "2023-10-04-bob-40_0-4.pdf", ["2023-10-04-bob-40_0-4.jpg"]),
+    ]
+
+
+def test_partition_by_buyer_and_month(tmp_path, invoices):
+    """
+    测试按购买人和月份分片，分片按键值排序
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    generator = ShardedReportGenerator(str(tmp_path), ("buyer", "month"), ("excel",))
+    shards = generator.partition(invoices)
+
+    assert list(shards) == [("alice", "2023-10"), ("alice", "2023-11"), ("bob", "2023-10")]
+    assert [inv.invoice_number for inv in shards[("alice", "2023-10")]] == ["1", "2"]
+
+
+def test_generate_writes_shards_and_index(tmp_path, invoices):
+    """
+    测试每个分片生成 Excel 和 TeX 报告，索引工作簿列出各分片及总计
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    generator = ShardedReportGenerator(str(tmp_path), ("buyer",), ("excel", "latex"), {"excel": {"streaming": True}})
+    summaries = generator.generate(invoices)
+
+    assert [s.name for s in summaries] == ["invoices-alice", "invoices-bob"]
+    for name in ("invoices-alice.xlsx", "invoices-alice.tex", "invoices-bob.xlsx", "invoices-bob.tex"):
+        assert os.path.exists(tmp_path / name)
+
+    rows = list(load_workbook(tmp_path / "index.xlsx").active.iter_rows(values_only=True))
+    assert rows[0] == tuple(ShardedReportGenerator.INDEX_COLUMNS)
+    assert rows[1][:6] == ("invoices-alice", "alice", None, 3, 2, 60.0)
+    assert rows[2][:6] == ("invoices-bob", "bob", None, 1, 1, 40.0)
+    assert rows[3][:6] == ("total", None, None, 4, 3, 100.0)
+
+
+def test_invalid_shard_key(tmp_path):
+    """
+    测试未知的分片键会抛出 ValueError
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    with pytest.raises(ValueError):
+        ShardedReportGenerator(str(tmp_path), ("vendor",), ("excel",))
+
+
+def test_worker_errors_reach_queued_logging(tmp_path, invoices):
+    """
+    测试 CLI 的队列日志模式下，工作进程中生成器捕获并记录的错误仍会被主进程写出
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    # 与 setup_logging(use_queue=True) 相同：根日志记录器只有一个写入进程内队列的处理器
+    records: list[logging.LogRecord] = []
+    collector = logging.Handler()
+    collector.emit = records.append
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, collector)
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    listener.start()
+    # 与报告同名的目录使保存失败
+    os.mkdir(tmp_path / "invoices-bob.xlsx")
+    try:
+        ShardedReportGenerator(str(tmp_path), ("buyer",), ("excel",), max_workers=1).generate(invoices)
+    finally:
+        listener.stop()
+        root.handlers = handlers
+        root.setLevel(level)
+
+    assert any(
+        record.levelno == logging.ERROR and "invoices-bob.xlsx" in record.getMessage() for record in records
+    )
+
+
+def test_index_lists_only_written_files(tmp_path, invoices):
+    """
+    测试某个格式写入失败时，索引中只列出实际生成的报告文件
+    Args:
+        tmp_path:
+        invoices:
+
+    Returns:
+
+    """
+    # 与 Excel 报告同名的目录使保存失败
+    (tmp_path / "invoices-bob.xlsx").mkdir()
+    generator = ShardedReportGenerator(str(tmp_path), ("buyer",), ("excel", "csv"), {"excel": {"streaming": True}})
+    summaries = generator.generate(invoices)
+
+    assert [s.files for s in summaries] == [["invoices-alice.xlsx", "invoices-alice.csv"], ["invoices-bob.csv"]]
+    rows = list(load_workbook(tmp_path / "index.xlsx").active.iter_rows(values_only=True))
+    assert rows[2][-1] == "invoices-bob.csv"
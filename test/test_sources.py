@@ -0,0 +1,132 @@
+import os
+import zipfile
+
+import pytest
+
+from invoice_processor.main import process_invoices
+from invoice_processor.sources import DirectorySource, ZipSource, open_source
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+SCREENSHOT = "2023-10-23-abc-50_0-12345678901234567890.png"
+OTHER = "2023-10-24-def-20_0-12345678901234567891.pdf"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """
+    月度归档：截图与发票位于同一目录，另一张发票的截图位于其他目录
+    """
+    path = tmp_path / "2023-10.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(f"october/{INVOICE}", b"%PDF-1")
+        zf.writestr(f"october/{SCREENSHOT}", b"png")
+        zf.writestr(f"october/{OTHER}", b"%PDF-2")
+        zf.writestr(f"other/{OTHER.replace('.pdf', '.png')}", b"png")
+        zf.writestr("october/bad-name.pdf", b"%PDF-3")
+    return str(path)
+
+
+def test_open_source_detects_zip(tmp_path, archive):
+    """
+    测试根据路径选择来源类型
+    Args:
+        tmp_path:
+        archive:
+
+    Returns:
+
+    """
+    assert isinstance(open_source(archive), ZipSource)
+    assert isinstance(open_source(str(tmp_path)), DirectorySource)
+
+
+def test_process_zip_without_extracting(tmp_path, archive):
+    """
+    测试直接处理 ZIP 归档：截图只在同一目录内匹配，仅报告引用的成员被写入 resources
+    Args:
+        tmp_path:
+        archive:
+
+    Returns:
+
+    """
+    output_dir = str(tmp_path / "out")
+    os.makedirs(output_dir)
+    manifest = process_invoices(archive, output_dir)
+
+    invoices = {name: entry.invoice for name, entry in manifest.entries.items()}
+    assert invoices[f"october/{INVOICE}"].screenshot_filenames == [f"october/{SCREENSHOT}"]
+    assert invoices[f"october/{OTHER}"].screenshot_filenames == []
+    assert invoices["october/bad-name.pdf"] is None
+
+    resources = tmp_path / "out" / "resources"
+    assert (resources / "october" / INVOICE).read_bytes() == b"%PDF-1"
+    assert (resources / "october" / SCREENSHOT).exists()
+    assert not (resources / "other").exists()
+    tex = (tmp_path / "out" / "invoices.tex").read_text(encoding="utf-8")
+    assert f"./resources/october/{INVOICE}" in tex
+
+    # 归档未变化时第二次运行复用清单
+    assert process_invoices(archive, output_dir).entries.keys() == manifest.entries.keys()
+
+
+@pytest.mark.parametrize("name", [
+    f"../../escaped/{INVOICE}",
+    f"october/../../{INVOICE}",
+    f"/tmp/{INVOICE}",
+    f"C:/{INVOICE}",
+])
+def test_zip_stage_rejects_unsafe_member_names(tmp_path, name):
+    """
+    测试解压时拒绝指向 resources 目录之外的成员名（zip-slip）
+    Args:
+        tmp_path:
+        name: 不安全的成员名
+
+    Returns:
+
+    """
+    path = tmp_path / "evil.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(name, b"%PDF-evil")
+    output_dir = tmp_path / "a" / "out"
+    output_dir.mkdir(parents=True)
+
+    source = ZipSource(str(path))
+    stats = source.stage(str(output_dir), [name])
+    source.close()
+
+    assert stats == {"failed": 1}
+    assert [p for p in tmp_path.rglob("*") if p.is_file() and p.suffix == ".pdf"] == []
+
+
+def test_zip_source_closed_when_processing_fails(tmp_path, archive, monkeypatch):
+    """
+    测试处理过程中出错时归档同样被关闭
+    Args:
+        tmp_path:
+        archive:
+        monkeypatch:
+
+    Returns:
+
+    """
+    opened: list[ZipSource] = []
+    original = ZipSource.list_files
+
+    def list_files(self, *args, **kwargs):
+        opened.append(self)
+        return original(self, *args, **kwargs)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("report generation failed")
+
+    monkeypatch.setattr(ZipSource, "list_files", list_files)
+    monkeypatch.setattr("invoice_processor.main.generate_reports", fail)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    with pytest.raises(RuntimeError):
+        process_invoices(archive, str(output_dir))
+    assert opened and opened[0]._zip is None
@@ -0,0 +1,74 @@
+import os
+import pytest
+
+from invoice_processor.staging import ResourceStager
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source = tmp_path / "in"
+    source.mkdir()
+    (source / "a.pdf").write_bytes(b"%PDF" * 1000)
+    (source / "a.png").write_bytes(b"png")
+    return source
+
+
+def test_stager_links_and_skips(tmp_path, source_dir):
+    """
+    测试同一文件系统上使用硬链接，再次放置时跳过未变化的文件
+    Args:
+        tmp_path:
+        source_dir:
+
+    Returns:
+
+    """
+    stager = ResourceStager(str(tmp_path / "out"))
+    stats = stager.stage(str(source_dir), ["a.pdf", "a.png", "a.pdf"])
+
+    assert stats["linked"] + stats["reflinked"] + stats["copied"] == 2
+    assert (tmp_path / "out" / "resources" / "a.pdf").read_bytes() == (source_dir / "a.pdf").read_bytes()
+
+    assert stager.stage(str(source_dir), ["a.pdf", "a.png"]) == {"skipped": 2}
+
+
+def test_stager_copies_when_link_unavailable(tmp_path, source_dir, monkeypatch):
+    """
+    测试无法创建链接时回退到内核复制，并保留修改时间以便后续跳过
+    Args:
+        tmp_path:
+        source_dir:
+        monkeypatch:
+
+    Returns:
+
+    """
+    monkeypatch.setattr(ResourceStager, "_try_link", staticmethod(lambda source, target: False))
+    monkeypatch.setattr(ResourceStager, "_try_reflink", staticmethod(lambda source, target: False))
+    stager = ResourceStager(str(tmp_path / "out"))
+
+    assert stager.stage(str(source_dir), ["a.pdf"]) == {"copied": 1}
+    target = tmp_path / "out" / "resources" / "a.pdf"
+    assert target.read_bytes() == (source_dir / "a.pdf").read_bytes()
+    assert not os.path.samefile(target, source_dir / "a.pdf")
+    assert os.stat(target).st_mtime_ns == os.stat(source_dir / "a.pdf").st_mtime_ns
+
+    (source_dir / "a.pdf").write_bytes(b"changed")
+    assert stager.stage(str(source_dir), ["a.pdf"]) == {"copied": 1}
+    assert target.read_bytes() == b"changed"
+
+
+def test_stager_reports_missing_source(tmp_path, source_dir):
+    """
+    测试源文件不存在时记为失败而不中断其他文件
+    Args:
+        tmp_path:
+        source_dir:
+
+    Returns:
+
+    """
+    stats = ResourceStager(str(tmp_path / "out")).stage(str(source_dir), ["missing.png", "a.png"])
+
+    assert stats["failed"] == 1
+    assert (tmp_path / "out" / "resources" / "a.png").exists()
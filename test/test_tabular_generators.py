@@ -0,0 +1,96 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date
+
+import pytest
+
+from invoice_processor.generators import create_generator
+from invoice_processor.generators.excel_generator import ExcelGenerator
+from invoice_processor.invoice import Invoice
+
+
+@pytest.fixture
+def sample_invoices():
+    return [
+        Invoice(
+            invoice_date=date(2023, 10, 23),
+            invoice_number="12345678901234567890",
+            amount=50.0,
+            buyer="abc",
+            original_filename="2023-10-23-abc-50_0-12345678901234567890.pdf",
+            screenshot_filenames=[
+                "2023-10-23-abc-50_0-12345678901234567890.png",
+                "2023-10-23-abc-50_0-12345678901234567890-1.png",
+            ],
+        ),
+        Invoice(
+            invoice_date=date(2023, 10, 24),
+            invoice_number="09876543210987654321",
+            amount=75.5,
+            buyer="def",
+            original_filename="2023-10-24-def-75_5-09876543210987654321.pdf",
+        ),
+    ]
+
+
+def _read(path) -> str:
+    if str(path).endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            return f.read()
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["csv", "csv.gz"])
+def test_csv_generator(tmp_path, sample_invoices, name):
+    """
+    测试 CSV 报告的列与 Excel 报告一致，可选 gzip 压缩
+    Args:
+        tmp_path:
+        sample_invoices:
+        name:
+
+    Returns:
+
+    """
+    generator = create_generator(name, str(tmp_path))
+    assert generator.generate(iter(sample_invoices)) == 2
+
+    rows = list(csv.reader(io.StringIO(_read(tmp_path / f"invoices.{name}"))))
+    assert rows[0] == ExcelGenerator.COLUMNS
+    assert rows[1][:5] == ["2023-10-23", "50.0", "abc", "12345678901234567890", sample_invoices[0].original_filename]
+    assert rows[1][5] == ";".join(sample_invoices[0].screenshot_filenames)
+    assert rows[1][6] == "True"
+    assert rows[2][5:] == ["", "False", "", ""]
+
+
+@pytest.mark.parametrize("name", ["jsonl", "jsonl.gz"])
+def test_jsonl_generator(tmp_path, sample_invoices, name):
+    """
+    测试 JSON Lines 报告每行一个对象，键与 Excel 报告的列一致，可选 gzip 压缩
+    Args:
+        tmp_path:
+        sample_invoices:
+        name:
+
+    Returns:
+
+    """
+    create_generator(name, str(tmp_path)).generate(sample_invoices)
+
+    records = [json.loads(line) for line in _read(tmp_path / f"invoices.{name}").splitlines()]
+    assert len(records) == 2
+    assert list(records[0]) == ExcelGenerator.COLUMNS
+    assert records[0]["screenshot filenames"] == sample_invoices[0].screenshot_filenames
+    assert records[1] == {
+        "date": "2023-10-24",
+        "amount": 75.5,
+        "buyer": "def",
+        "invoice number": "09876543210987654321",
+        "invoice filename": "2023-10-24-def-75_5-09876543210987654321.pdf",
+        "screenshot filenames": [],
+        "valid": False,
+        "duplicate of": None,
+        "content mismatch": None,
+    }
@@ -24,15 +24,13 @@ def test_validator_with_screenshot(tmp_path):
         buyer='abc',
         invoice_number='12345678901234567890',
         original_filename='2023-10-23-abc-50_0-12345678901234567890.pdf',
-        screenshot_filename='',
     )
 
     validator = Validator(str(invoice_dir))
     result = validator.validate(invoice)
 
     assert result.is_valid is True
-    assert len(result.validation_errors) == 0
-    assert result.screenshot_filename == screenshot_filename
+    assert result.screenshot_filenames == [screenshot_filename]
 
 
 def test_validator_missing_screenshot(tmp_path):
@@ -53,12 +51,71 @@ def test_validator_missing_screenshot(tmp_path):
         buyer="abc",
         invoice_number="12345678901234567890",
         original_filename="2023-10-23-abc-50_0-12345678901234567890.pdf",
-        screenshot_filename="",
     )
 
     validator = Validator(str(invoice_dir))
     result = validator.validate(invoice)
 
     assert result.is_valid is False
-    assert len(result.validation_errors) == 1
-    assert "缺少对应截图文件" in result.validation_errors[0]
+    assert result.screenshot_filenames == []
+
+
+@pytest.mark.parametrize("existing_files", [
+    [],
+    ["2023-10-23-abc-50_0-1.png"],
+    ["2023-10-23-abc-50_0-1.png", "2023-10-23-abc-50_0-1.jpg", "2023-10-23-abc-50_0-1.jpeg"],
+    ["2023-10-23-abc-50_0-1-1.png", "2023-10-23-abc-50_0-1-2.jpg"],
+    ["2023-10-23-abc-50_0-1.jpg", "2023-10-23-abc-50_0-1-2.jpg", "2023-10-23-abc-50_0-1-1.png"],
+    ["2023-10-23-abc-50_0-1.jpg", "2023-10-23-abc-50_0-1-1.jpg", "2023-10-23-abc-50_0-1-3.jpg"],
+    ["2023-10-23-abc-50_0-1.pdf", "2023-10-23-abc-50_0-1.txt", "2023-10-23-abc-50_0-11.jpg"],
+])
+def test_validator_index_matches_probing(tmp_path, existing_files):
+    """
+    测试目录索引模式与逐个探测模式找到的截图及其顺序完全一致
+    Args:
+        tmp_path:
+        existing_files: 目录中预先存在的文件
+
+    Returns:
+
+    """
+    for name in existing_files:
+        (tmp_path / name).touch()
+
+    def make_invoice():
+        return Invoice(
+            invoice_date=date(2023, 10, 23),
+            invoice_number="1",
+            amount=50.0,
+            buyer="abc",
+            original_filename="2023-10-23-abc-50_0-1.pdf",
+        )
+
+    probed = Validator(str(tmp_path)).validate(make_invoice())
+    indexed = Validator(str(tmp_path), use_index=True).validate(make_invoice())
+
+    assert indexed.screenshot_filenames == probed.screenshot_filenames
+
+
+def test_validator_index_case_insensitive_extension(tmp_path):
+    """
+    测试目录索引模式对扩展名大小写不敏感，并返回磁盘上的实际文件名
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    (tmp_path / "2023-10-23-abc-50_0-1.PNG").touch()
+    (tmp_path / "2023-10-23-abc-50_0-1-1.Jpg").touch()
+
+    invoice = Invoice(
+        invoice_date=date(2023, 10, 23),
+        invoice_number="1",
+        amount=50.0,
+        buyer="abc",
+        original_filename="2023-10-23-abc-50_0-1.pdf",
+    )
+    result = Validator(str(tmp_path), use_index=True).validate(invoice)
+
+    assert result.screenshot_filenames == ["2023-10-23-abc-50_0-1.PNG", "2023-10-23-abc-50_0-1-1.Jpg"]
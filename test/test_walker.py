@@ -0,0 +1,121 @@
+import io
+import os
+import csv
+import pytest
+
+from invoice_processor.main import process_invoices
+from invoice_processor.manifest import Manifest
+from invoice_processor.walker import walk_directories
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+SCREENSHOT = "2023-10-23-abc-50_0-12345678901234567890.png"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    构造嵌套目录：根目录、a、a/b 中各有一张同名发票，仅 a 中有截图，输出目录位于根目录内
+    """
+    root = tmp_path / "in"
+    (root / "a" / "b").mkdir(parents=True)
+    for directory in (root, root / "a", root / "a" / "b"):
+        (directory / INVOICE).write_bytes(b"%PDF")
+    (root / "a" / SCREENSHOT).write_bytes(b"png")
+    output_dir = root / "out"
+    (output_dir / "resources").mkdir(parents=True)
+    (output_dir / "resources" / INVOICE).write_bytes(b"%PDF")
+    return str(root), str(output_dir)
+
+
+def test_walk_directories_scans_all_subdirectories(tree):
+    """
+    测试并行扫描会返回每个子目录，文件名为相对路径，并跳过排除的目录
+    Args:
+        tree:
+
+    Returns:
+
+    """
+    root, output_dir = tree
+    listings = {listing.path: listing for listing in walk_directories(root, exclude=[output_dir])}
+
+    assert sorted(listings) == ["", "a", "a/b"]
+    assert [entry.name for entry in listings["a/b"].pdf_entries] == [INVOICE]
+    assert listings["a"].screenshot_filenames == [f"a/{SCREENSHOT}"]
+    assert listings[""].screenshot_filenames == []
+
+
+def test_process_invoices_recursive_scopes_screenshots(tree):
+    """
+    测试递归模式下截图只与同一目录中的发票匹配，清单以相对路径记录
+    Args:
+        tree:
+
+    Returns:
+
+    """
+    root, output_dir = tree
+    manifest = process_invoices(root, output_dir, recursive=True, detect_duplicates=False)
+
+    invoices = {name: entry.invoice for name, entry in manifest.entries.items()}
+    assert sorted(invoices) == sorted([INVOICE, f"a/{INVOICE}", f"a/b/{INVOICE}"])
+    assert invoices[f"a/{INVOICE}"].screenshot_filenames == [f"a/{SCREENSHOT}"]
+    assert invoices[INVOICE].screenshot_filenames == []
+    assert invoices[f"a/b/{INVOICE}"].screenshot_filenames == []
+    assert os.path.exists(os.path.join(output_dir, "resources", "a", SCREENSHOT))
+
+    # 第二次运行复用清单
+    assert Manifest.load(output_dir, root).lookup(
+        f"a/{INVOICE}", 4, os.stat(os.path.join(root, "a", INVOICE)).st_mtime_ns
+    ) is not None
+
+
+def test_recursive_output_inside_input_root(tmp_path):
+    """
+    测试输出目录与发票目录相同时，第二次递归运行不会把 resources 和 fragments 中的文件当作发票
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    root = tmp_path / "in"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / INVOICE).write_bytes(b"%PDF")
+    (root / "a" / SCREENSHOT).write_bytes(b"png")
+
+    process_invoices(str(root), str(root), recursive=True, latex_fragments=True)
+    assert os.path.exists(root / "resources" / "a" / INVOICE)
+    manifest = process_invoices(str(root), str(root), recursive=True, latex_fragments=True)
+
+    assert list(manifest.entries) == [f"a/{INVOICE}"]
+    assert manifest.entries[f"a/{INVOICE}"].invoice.duplicate_of is None
+    assert manifest.screenshots == [f"a/{SCREENSHOT}"]
+
+
+def test_recursive_report_order_is_stable(tmp_path):
+    """
+    测试递归扫描的报告按相对路径排序，两次运行生成的 CSV 和 LaTeX 主文件完全相同
+    Args:
+        tmp_path:
+
+    Returns:
+
+    """
+    root = tmp_path / "in"
+    for i in range(12):
+        directory = root / f"d{i:02d}"
+        directory.mkdir(parents=True)
+        (directory / f"2023-10-23-abc-50_0-123456789012345678{i:02d}.pdf").write_bytes(b"%PDF")
+    outputs = []
+    for name in ("out1", "out2"):
+        output_dir = tmp_path / name
+        output_dir.mkdir()
+        process_invoices(str(root), str(output_dir), formats=("csv", "latex"), latex_fragments=True, recursive=True)
+        outputs.append(((output_dir / "invoices.csv").read_bytes(), (output_dir / "invoices.tex").read_bytes()))
+
+    assert outputs[0] == outputs[1]
+    rows = csv.DictReader(io.StringIO(outputs[0][0].decode("utf-8-sig")))
+    filenames = [row["invoice filename"] for row in rows]
+    assert len(filenames) == 12 and filenames == sorted(filenames)
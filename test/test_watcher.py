@@ -0,0 +1,114 @@
+import os
+import pytest
+from click.testing import CliRunner
+
+from invoice_processor.cli import main
+from invoice_processor.watcher import InvoiceWatcher
+
+
+INVOICE = "2023-10-23-abc-50_0-12345678901234567890.pdf"
+SCREENSHOT = "2023-10-23-abc-50_0-12345678901234567890.png"
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    invoice_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    invoice_dir.mkdir()
+    output_dir.mkdir()
+    (invoice_dir / INVOICE).write_bytes(b"%PDF")
+    watcher = InvoiceWatcher(str(invoice_dir), str(output_dir), debounce=1.0)
+    watcher.start()
+    return watcher
+
+
+def _invoices(watcher):
+    return {name: entry.invoice for name, entry in watcher.manifest.entries.items()}
+
+
+def test_watcher_debounces_and_matches_new_screenshot(watcher):
+    """
+    测试新增截图在稳定 debounce 秒后才会被处理，并且只重新匹配受影响的发票
+    Args:
+        watcher:
+
+    Returns:
+
+    """
+    assert _invoices(watcher)[INVOICE].screenshot_filenames == []
+    assert watcher.poll(now=100.0) is False
+
+    open(os.path.join(watcher.directory, SCREENSHOT), "wb").close()
+    assert watcher.poll(now=200.0) is False
+    assert watcher.poll(now=200.5) is False
+    assert watcher.poll(now=201.5) is True
+
+    assert _invoices(watcher)[INVOICE].screenshot_filenames == [SCREENSHOT]
+    with open(os.path.join(watcher.output_dir, "invoices.tex"), encoding="utf-8") as f:
+        assert SCREENSHOT in f.read()
+    assert watcher.poll(now=300.0) is False
+
+
+def test_watcher_handles_new_and_deleted_pdfs(watcher):
+    """
+    测试新增和删除 PDF 会更新内存中的发票集合
+    Args:
+        watcher:
+
+    Returns:
+
+    """
+    new_invoice = "2023-10-24-def-75_5-09876543210987654321.pdf"
+    open(os.path.join(watcher.directory, new_invoice), "wb").close()
+    os.remove(os.path.join(watcher.directory, INVOICE))
+
+    watcher.poll(now=10.0)
+    assert watcher.poll(now=20.0) is True
+
+    invoices = _invoices(watcher)
+    assert list(invoices) == [new_invoice]
+    assert invoices[new_invoice].amount == 75.5
+
+
+def test_watcher_keeps_polling_after_error(watcher, monkeypatch):
+    """
+    测试单次轮询中的暂时性错误不会终止监视
+    Args:
+        watcher:
+        monkeypatch:
+
+    Returns:
+
+    """
+    results = iter([OSError("report is locked"), True, KeyboardInterrupt()])
+    calls: list[int] = []
+
+    def poll():
+        calls.append(1)
+        result = next(results)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    monkeypatch.setattr(watcher, "start", lambda full_rebuild=False: None)
+    monkeypatch.setattr(watcher, "poll", poll)
+    monkeypatch.setattr("invoice_processor.watcher.time.sleep", lambda seconds: None)
+    watcher.run()
+
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("option", ["--catalog", "--metrics-json", "--profile"])
+def test_watch_rejects_unsupported_options(tmp_path, option):
+    """
+    测试 --watch 与监视模式不支持的选项同时使用时报错，而不是忽略这些选项
+    Args:
+        tmp_path:
+        option: 不支持的选项
+
+    Returns:
+
+    """
+    result = CliRunner().invoke(main, ["-d", str(tmp_path), "-o", str(tmp_path), "--watch", option, str(tmp_path / "x")])
+    assert result.exit_code == 2
+    assert f"--watch cannot be combined with {option}" in result.output